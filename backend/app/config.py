@@ -13,11 +13,27 @@ class Settings(BaseSettings):
     """
     # Database
     DATABASE_URL: str
+    DATABASE_ASYNC: bool = False  # Endpoints assíncronos usam asyncpg/aiosqlite em vez de threads
+    DB_POOL_SIZE: int = 10  # Conexões mantidas abertas por processo (por engine)
+    DB_MAX_OVERFLOW: int = 20  # Conexões extras quando o pool está cheio (fechadas ao devolver)
+    DB_POOL_TIMEOUT: float = 30  # Segundos esperando conexão livre antes de erro
+    DB_POOL_RECYCLE: int = 1800  # Reabre conexões mais velhas que isso, em segundos (-1 = nunca)
+    DB_POOL_PRE_PING: bool = True  # Testa a conexão a cada checkout (uma ida ao banco a mais)
+    METRICS_TOKEN: Optional[str] = None  # Token fixo para coletar /metrics (sem ele, só administradores)
+    CONSULTAS_MONITORAR: bool = True  # Conta consultas por requisição (Server-Timing e aviso de N+1)
+    CONSULTAS_REPETIDAS_LIMITE: int = 10  # Execuções da mesma consulta numa requisição antes do aviso de N+1
 
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 480
+    AUTH_VERIFICACAO_SEGUNDOS: int = 30  # Intervalo para reler usuários desativados/alterados
+    BCRYPT_ROUNDS: int = 12  # Custo do bcrypt; hashes com outro custo são refeitos no login
+    LOGIN_THREADS: int = 2  # Threads dedicadas à verificação de senha
+    LOGIN_FILA_MAXIMA: int = 20  # Logins aguardando verificação antes de responder 503
+    LOGIN_TENTATIVAS_POR_LOGIN: int = 5  # Falhas por login na janela antes de bloquear (429)
+    LOGIN_TENTATIVAS_POR_IP: int = 20  # Falhas por IP na janela antes de bloquear (429)
+    LOGIN_JANELA_SEGUNDOS: int = 300  # Janela de contagem das falhas de login
 
     # Application
     APP_NAME: str = "Expresso Embuibe"
@@ -27,6 +43,16 @@ class Settings(BaseSettings):
     # Configurações de Negócio
     DESTINO_PADRAO: str = "Embu das Artes"
     NUMERO_PASSAGEM_INICIAL: int = 30000
+    NUMERO_PASSAGEM_BLOCO: int = 10  # Números reservados por processo a cada ida ao banco
+    CATALOGO_VERIFICACAO_SEGUNDOS: int = 30  # Intervalo para conferir alterações em cidades/locais/motoristas
+    CATALOGO_VERIFICACAO_FALTA_SEGUNDOS: int = 2  # Intervalo mínimo entre conferências forçadas por IDs não encontrados
+    CATALOGO_CACHE_MAX_AGE: int = 0  # Segundos que o navegador usa as listas auxiliares sem revalidar (ETag)
+    SUGESTOES_VERIFICACAO_SEGUNDOS: int = 30  # Intervalo para ler clientes alterados por outros processos
+
+    # PDF
+    PDF_PROCESSOS: int = 2  # Processos da fila de PDFs (emissão com pdf_assincrono)
+    PDF_COMPRESSAO: bool = False  # Comprime o conteúdo das páginas (PDFs menores, emissão mais lenta)
+    PDF_CACHE_DIR: Path = Path(__file__).parent.parent / "cache" / "pdf"
 
     class Config:
         # Procura o .env na raiz do projeto (pasta pai da pasta backend)
@@ -2,22 +2,118 @@
 Configuração do banco de dados - Expresso Embuibe
 Gerencia a conexão com PostgreSQL usando SQLAlchemy
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
 from .config import settings
+from .utils.metricas_pool import classe_pool_medida, instrumentar_engine
+
+# Driver assíncrono de cada banco (modo DATABASE_ASYNC)
+DRIVERS_ASSINCRONOS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def url_assincrona(url: str) -> str:
+    """
+    Converte a URL do banco para o driver assíncrono equivalente
+
+    Ex.: postgresql://... -> postgresql+asyncpg://...,
+    sqlite:///... -> sqlite+aiosqlite:///...
+
+    Raises:
+        ValueError: Se o banco não tiver driver assíncrono configurado
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in DRIVERS_ASSINCRONOS:
+        raise ValueError(f"Banco sem driver assíncrono configurado: {backend}")
+    return url.set(drivername=DRIVERS_ASSINCRONOS[backend]).render_as_string(hide_password=False)
+
+
+# Espera pelo lock de escrita do SQLite antes de "database is locked"
+# (o padrão do driver é 5 s, curto com muitas emissões simultâneas)
+SQLITE_TIMEOUT_SEGUNDOS = 30
+
+
+def _connect_args(url: str) -> dict:
+    """Argumentos de conexão do driver para o banco da URL"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"timeout": SQLITE_TIMEOUT_SEGUNDOS}
+    return {}
+
+
+def _criar_engine(nome: str, url: str, criar):
+    """
+    Cria um engine com o pool configurado em Settings e medido
+
+    A classe de pool é a padrão do SQLAlchemy para o banco/driver (QueuePool,
+    AsyncAdaptedQueuePool, NullPool...); tamanho, overflow e timeout só
+    valem para os pools com fila. As métricas ficam em metricas_pools[nome].
+
+    Args:
+        nome: Nome do pool nas métricas ("sync" ou "async")
+        url: URL do banco
+        criar: create_engine ou create_async_engine
+    """
+    url_banco = make_url(url)
+    classe_base = url_banco.get_dialect().get_pool_class(url_banco)
+    opcoes_pool = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,  # Verifica conexões antes de usar
+        "pool_recycle": settings.DB_POOL_RECYCLE,  # Evita conexões derrubadas pelo servidor/proxy
+    }
+    if issubclass(classe_base, QueuePool):
+        opcoes_pool.update(
+            pool_size=settings.DB_POOL_SIZE,  # Número de conexões no pool
+            max_overflow=settings.DB_MAX_OVERFLOW,  # Conexões adicionais quando o pool está cheio
+            pool_timeout=settings.DB_POOL_TIMEOUT  # Espera máxima por uma conexão livre
+        )
+
+    novo_engine = criar(
+        url,
+        poolclass=classe_pool_medida(nome, classe_base),
+        connect_args=_connect_args(url),
+        **opcoes_pool
+    )
+    instrumentar_engine(nome, getattr(novo_engine, "sync_engine", novo_engine), opcoes_pool)
+    return novo_engine
+
 
 # Cria o engine do SQLAlchemy
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # Verifica conexões antes de usar
-    pool_size=10,  # Número de conexões no pool
-    max_overflow=20  # Conexões adicionais quando o pool está cheio
-)
+engine = _criar_engine("sync", settings.DATABASE_URL, create_engine)
 
 # Cria a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrono (asyncpg/aiosqlite), só com DATABASE_ASYNC=true
+async_engine = None
+AsyncSessionLocal = None
+if settings.DATABASE_ASYNC:
+    async_engine = _criar_engine("async", url_assincrona(settings.DATABASE_URL), create_async_engine)
+    if async_engine.dialect.name == "sqlite":
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _sqlite_sem_begin_implicito(dbapi_connection, connection_record):
+            # O BEGIN passa a ser emitido pelo evento abaixo, não pelo driver
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(async_engine.sync_engine, "begin")
+        def _sqlite_begin_immediate(conn):
+            # Com muitas transações intercaladas no event loop, um BEGIN
+            # comum que depois tenta escrever cai no "database is locked"
+            # sem espera (detecção de deadlock do SQLite). IMMEDIATE pega o
+            # lock de escrita no início e espera a vez (SQLITE_TIMEOUT_SEGUNDOS).
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    # Objetos continuam legíveis após o commit, sem ida implícita ao banco
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
 # Base para os models
 Base = declarative_base()
 
@@ -39,6 +135,59 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependência dos endpoints assíncronos (emissão, manifesto, dashboard
+    e busca de clientes).
+
+    Com DATABASE_ASYNC=true fornece uma AsyncSession: as consultas são
+    aguardadas no event loop, sem ocupar uma thread por requisição. Sem o
+    modo assíncrono, fornece uma Session comum. Nos dois casos, use
+    executar() para rodar o código do ORM.
+
+    Uso:
+        @app.get("/endpoint")
+        async def endpoint(db = Depends(get_async_db)):
+            return await executar(db, funcao_sincrona, arg)
+    """
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def executar(db, funcao, *args, **kwargs):
+    """
+    Executa uma função do ORM síncrono a partir de um endpoint async
+
+    Com AsyncSession usa run_sync: a função roda no próprio event loop e
+    cada consulta é aguardada pelo driver assíncrono. Com Session comum,
+    roda em uma thread do pool do Starlette, como um endpoint def.
+
+    Com run_sync a função não pode usar o engine síncrono (SessionLocal,
+    engine.connect), que bloquearia o event loop: os serviços em memória
+    chamados nela (como o catálogo) respondem sem ir ao banco.
+
+    Args:
+        db: Sessão fornecida por get_async_db
+        funcao: Função que recebe a Session como primeiro argumento; deve
+            devolver dados já carregados (schemas, tuplas)
+        *args, **kwargs: Demais argumentos da função
+
+    Returns:
+        O retorno da função
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(funcao, *args, **kwargs)
+    return await run_in_threadpool(funcao, db, *args, **kwargs)
+
+
 def init_db():
     """
     Inicializa o banco de dados criando todas as tabelas.
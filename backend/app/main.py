@@ -9,7 +9,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from .config import settings
-from .database import init_db
+from .database import init_db, SessionLocal, async_engine
+from .services.resumo_service import resumo_service
+from .services.pdf_fila_service import pdf_fila_service
+from .services.login_service import login_service
+from .services.catalogo_service import catalogo_service
+from .services.busca_cliente_service import busca_cliente_service
+from .services.indice_service import indice_service
+from .services.sugestao_cliente_service import sugestao_cliente_service
+from .utils.metricas_consultas import ConsultasPorRequisicaoMiddleware
+from .utils.security import situacao_usuarios
 
 # Cria a aplicação FastAPI
 app = FastAPI(
@@ -37,17 +46,58 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Consultas e tempo de banco por requisição (Server-Timing e aviso de N+1)
+if settings.CONSULTAS_MONITORAR:
+    app.add_middleware(ConsultasPorRequisicaoMiddleware)
+
 
 @app.on_event("startup")
 async def startup_event():
     """
     Evento executado ao iniciar a aplicação.
-    Inicializa o banco de dados.
+    Inicializa o banco de dados (e a versão dos usuários em
+    bancos antigos), monta o resumo diário
+    em bancos que ainda não o possuem, prepara os índices
+    de busca de clientes, avisa se os índices de passagens e
+    viagens estão desatualizados e carrega o catálogo de dados
+    de referência e o índice de sugestões de clientes.
     """
     init_db()
+    situacao_usuarios.preparar()
+
+    db = SessionLocal()
+    try:
+        if resumo_service.precisa_reconstruir(db):
+            resumo_service.reconstruir(db)
+            db.commit()
+    finally:
+        db.close()
+
+    busca_cliente_service.preparar()
+
+    # Criar índices em tabelas grandes é tarefa do migrate_indices.py, não do startup
+    if indice_service.pendentes():
+        print("Aviso: índices de passagens/viagens desatualizados, rode migrate_indices.py")
+
+    catalogo_service.obter()
+    sugestao_cliente_service.carregar()
+
     print(f"{settings.APP_NAME} v{settings.APP_VERSION} iniciado!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Evento executado ao encerrar a aplicação.
+    Finaliza os processos da fila de PDFs, as threads de login
+    e as conexões do engine assíncrono.
+    """
+    pdf_fila_service.encerrar()
+    login_service.encerrar()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 @app.get("/api/v1")
 async def root():
     """
@@ -69,7 +119,7 @@ async def health():
 
 
 # Import e registro dos routers
-from .routers import auth, clientes, passagens, relatorios, viagens, dashboard, auxiliares
+from .routers import auth, clientes, passagens, relatorios, viagens, dashboard, auxiliares, metricas
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Autenticação"])
 app.include_router(clientes.router, prefix="/api/v1/clientes", tags=["Clientes"])
 app.include_router(passagens.router, prefix="/api/v1/passagens", tags=["Passagens"])
@@ -77,6 +127,7 @@ app.include_router(relatorios.router, prefix="/api/v1/relatorios", tags=["Relat
 app.include_router(viagens.router, prefix="/api/v1/viagens", tags=["Viagens"])
 app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["Dashboard"])
 app.include_router(auxiliares.router, prefix="/api/v1", tags=["Auxiliares"])
+app.include_router(metricas.router, prefix="/api/v1/metrics", tags=["Métricas"])
 
 # Servir arquivos estáticos do frontend em produção
 FRONTEND_DIR = Path(__file__).parent.parent.parent / "frontend"
@@ -10,6 +10,9 @@ from .cidade import Cidade
 from .local_embarque import LocalEmbarque
 from .passagem import Passagem
 from .viagem import Viagem
+from .contador import Contador
+from .resumo_diario import ResumoDiario
+from .importacao import Importacao, ImportacaoParte
 
 __all__ = [
     "Usuario",
@@ -20,4 +23,8 @@ __all__ = [
     "LocalEmbarque",
     "Passagem",
     "Viagem",
+    "Contador",
+    "ResumoDiario",
+    "Importacao",
+    "ImportacaoParte",
 ]
@@ -2,14 +2,19 @@
 Model de Clientes - Expresso Embuibe
 Gerencia passageiros cadastrados no sistema
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from ..database import Base
+from ..utils.texto import normalizar_busca, somente_digitos
 
 
 class Cliente(Base):
     __tablename__ = "clientes"
+    __table_args__ = (
+        # Listagem em ordem alfabética paginada por cursor (nome, id)
+        Index('ix_clientes_nome_id', 'nome', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(200), nullable=False, index=True)
@@ -20,10 +25,24 @@ class Cliente(Base):
     cep = Column(String(10), nullable=True)
     ativo = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
+
+    # Colunas de busca (preenchidas automaticamente a partir de nome/telefone)
+    nome_busca = Column(String(200), nullable=True, index=True)
+    telefone_digitos = Column(String(20), nullable=True, index=True)
 
     # Relacionamentos
     passagens = relationship("Passagem", back_populates="cliente")
 
+    @validates("nome")
+    def _atualizar_nome_busca(self, key, nome):
+        self.nome_busca = normalizar_busca(nome)
+        return nome
+
+    @validates("telefone")
+    def _atualizar_telefone_digitos(self, key, telefone):
+        self.telefone_digitos = somente_digitos(telefone)
+        return telefone
+
     def __repr__(self):
         return f"<Cliente(id={self.id}, nome='{self.nome}', telefone='{self.telefone}')>"
@@ -0,0 +1,16 @@
+"""
+Model de Contadores - Expresso Embuibe
+Guarda contadores nomeados usados na numeração sequencial
+"""
+from sqlalchemy import Column, Integer, String
+from ..database import Base
+
+
+class Contador(Base):
+    __tablename__ = "contadores"
+
+    nome = Column(String(50), primary_key=True)
+    valor = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<Contador(nome='{self.nome}', valor={self.valor})>"
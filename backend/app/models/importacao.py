@@ -0,0 +1,72 @@
+"""
+Model de Importações - Expresso Embuibe
+Controle das importações em lote (partes do arquivo e checkpoint de cada uma)
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+
+class Importacao(Base):
+    """
+    Importação de um arquivo
+
+    O arquivo é identificado pelo tipo e pelo SHA-256 do conteúdo: rodar
+    de novo o mesmo arquivo retoma as partes pendentes, ou não faz nada
+    se ele já foi importado por completo.
+    """
+    __tablename__ = "importacoes"
+    __table_args__ = (
+        UniqueConstraint('tipo', 'assinatura', name='uix_importacao_tipo_assinatura'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String(30), nullable=False)  # historico
+    arquivo = Column(String(500), nullable=False)
+    assinatura = Column(String(64), nullable=False)  # SHA-256 do arquivo
+    tamanho = Column(BigInteger, nullable=False)
+    total_linhas = Column(Integer, nullable=False)
+    numero_inicial = Column(Integer, nullable=True)  # Primeiro número de passagem reservado
+    status = Column(String(20), nullable=False, default="EM_ANDAMENTO")  # EM_ANDAMENTO, CONCLUIDA, FALHOU
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    concluida_em = Column(DateTime(timezone=True), nullable=True)
+
+    # Relacionamentos
+    partes = relationship("ImportacaoParte", back_populates="importacao", order_by="ImportacaoParte.ordem")
+
+    def __repr__(self):
+        return f"<Importacao(id={self.id}, tipo='{self.tipo}', status={self.status})>"
+
+
+class ImportacaoParte(Base):
+    """
+    Faixa de bytes do arquivo processada por um worker
+
+    A faixa começa e termina em início de linha. Os dados da parte e a
+    mudança para CONCLUIDA são gravados na mesma transação: uma parte
+    concluída nunca é processada de novo.
+    """
+    __tablename__ = "importacoes_partes"
+    __table_args__ = (
+        UniqueConstraint('importacao_id', 'ordem', name='uix_importacao_parte_ordem'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    importacao_id = Column(Integer, ForeignKey("importacoes.id"), nullable=False, index=True)
+    ordem = Column(Integer, nullable=False)
+    inicio_byte = Column(BigInteger, nullable=False)
+    fim_byte = Column(BigInteger, nullable=False)  # Exclusivo
+    linhas = Column(Integer, nullable=False)
+    numero_inicial = Column(Integer, nullable=True)  # Número da primeira linha da parte
+    status = Column(String(20), nullable=False, default="PENDENTE")  # PENDENTE, CONCLUIDA, ERRO
+    gravadas = Column(Integer, nullable=True)
+    estatisticas = Column(JSON, nullable=True)
+    erro = Column(Text, nullable=True)
+    concluida_em = Column(DateTime(timezone=True), nullable=True)
+
+    # Relacionamentos
+    importacao = relationship("Importacao", back_populates="partes")
+
+    def __repr__(self):
+        return f"<ImportacaoParte(importacao_id={self.importacao_id}, ordem={self.ordem}, status={self.status})>"
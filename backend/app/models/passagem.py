@@ -2,7 +2,7 @@
 Model de Passagens - Expresso Embuibe
 Gerencia passagens emitidas
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Date, Time, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Date, Time, Text, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -10,14 +10,27 @@ from ..database import Base
 
 class Passagem(Base):
     __tablename__ = "passagens"
+    __table_args__ = (
+        # Passagens de uma viagem (manifesto, emissão, conciliação); o prefixo
+        # data_viagem atende os filtros por dia e período (dashboard, relatórios)
+        Index('ix_passagens_viagem_status', 'data_viagem', 'horario', 'motorista_id', 'status'),
+        # Passagens ainda não embarcadas: manifesto antes da saída
+        Index(
+            'ix_passagens_emitidas', 'data_viagem', 'horario', 'motorista_id',
+            sqlite_where=text("status = 'EMITIDA'"),
+            postgresql_where=text("status = 'EMITIDA'")
+        ),
+        # Relatório por motorista no período
+        Index('ix_passagens_motorista_data', 'motorista_id', 'data_viagem'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     numero = Column(Integer, unique=True, nullable=False, index=True)
     cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False, index=True)
     local_embarque_id = Column(Integer, ForeignKey("locais_embarque.id"), nullable=False)
-    motorista_id = Column(Integer, ForeignKey("motoristas.id"), nullable=False, index=True)
-    horario = Column(Time, nullable=False, index=True)
-    data_viagem = Column(Date, nullable=False, index=True)
+    motorista_id = Column(Integer, ForeignKey("motoristas.id"), nullable=False)
+    horario = Column(Time, nullable=False)
+    data_viagem = Column(Date, nullable=False)
     data_emissao = Column(DateTime(timezone=True), server_default=func.now())
     valor = Column(Numeric(10, 2), nullable=False)
     forma_pagamento = Column(String(20), nullable=False)  # DINHEIRO, CARTAO, PIX
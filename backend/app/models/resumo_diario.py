@@ -0,0 +1,30 @@
+"""
+Model de Resumo Diário - Expresso Embuibe
+Totais de passagens por dia, motorista, forma de pagamento e cidade
+"""
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Numeric, UniqueConstraint
+from ..database import Base
+
+
+class ResumoDiario(Base):
+    """
+    Consolidado mantido na emissão, no cancelamento e na transferência
+
+    Conta apenas passagens não canceladas, pela data da viagem e pela
+    cidade do local de embarque.
+    """
+    __tablename__ = "resumos_diarios"
+    __table_args__ = (
+        UniqueConstraint('data', 'motorista_id', 'forma_pagamento', 'cidade_id', name='uix_resumo_diario'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    data = Column(Date, nullable=False, index=True)
+    motorista_id = Column(Integer, ForeignKey("motoristas.id"), nullable=False)
+    forma_pagamento = Column(String(20), nullable=False)
+    cidade_id = Column(Integer, ForeignKey("cidades.id"), nullable=False)
+    total_passagens = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Numeric(12, 2), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ResumoDiario(data={self.data}, motorista_id={self.motorista_id}, forma='{self.forma_pagamento}', total={self.total_passagens})>"
@@ -2,7 +2,7 @@
 Model de Usuários - Expresso Embuibe
 Gerencia usuários do sistema (admin e atendentes)
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, literal_column
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -18,6 +18,8 @@ class Usuario(Base):
     ativo = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Incrementada a cada alteração; o token guarda a versão da emissão
+    versao = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("versao") + 1)
 
     def __repr__(self):
         return f"<Usuario(id={self.id}, nome='{self.nome}', tipo='{self.tipo}')>"
@@ -2,7 +2,7 @@
 Model de Viagens - Expresso Embuibe
 Gerencia registro de saída das viagens
 """
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Numeric, Date, Time, String, UniqueConstraint
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Numeric, Date, Time, String, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -11,11 +11,14 @@ from ..database import Base
 class Viagem(Base):
     __tablename__ = "viagens"
     __table_args__ = (
+        # Também é o índice das consultas por data (prefixo)
         UniqueConstraint('data', 'horario', 'motorista_id', name='uix_viagem_data_horario_motorista'),
+        # Viagens de um motorista no período
+        Index('ix_viagens_motorista_data', 'motorista_id', 'data'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
-    data = Column(Date, nullable=False, index=True)
+    data = Column(Date, nullable=False)
     horario = Column(Time, nullable=False)
     motorista_id = Column(Integer, ForeignKey("motoristas.id"), nullable=False)
     total_passageiros = Column(Integer, nullable=False, default=0)
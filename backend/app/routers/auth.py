@@ -2,38 +2,49 @@
 Router de Autenticação - Expresso Embuibe
 Gerencia endpoints de login e autenticação
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from ..schemas.usuario import LoginRequest, LoginResponse, UsuarioPublic
-from ..utils.security import authenticate_user, create_access_token, get_current_user
-from ..models.usuario import Usuario
+from ..services.login_service import login_service, LoginBloqueado
+from ..utils.security import claims_usuario, create_access_token, get_current_user, UsuarioAutenticado
 
 router = APIRouter()
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(
+async def login(
     credentials: LoginRequest,
-    db: Session = Depends(get_db)
+    request: Request
 ):
     """
     Endpoint de login
 
-    Autentica um usuário e retorna um token JWT de acesso.
+    Autentica um usuário e retorna um token JWT de acesso. A senha é
+    verificada no pool dedicado do login_service, sem bloquear os demais
+    endpoints.
 
     Args:
         credentials: Login e senha do usuário
-        db: Sessão do banco de dados
+        request: Requisição HTTP (IP de origem para o limite de tentativas)
 
     Returns:
         Token JWT e dados do usuário
 
     Raises:
         HTTPException 401: Se as credenciais forem inválidas
+        HTTPException 429: Se houver falhas demais para o login ou IP
+        HTTPException 503: Se houver logins demais aguardando verificação
     """
+    ip = request.client.host if request.client else "desconhecido"
+
     # Autentica o usuário
-    user = authenticate_user(db, credentials.login, credentials.senha)
+    try:
+        user = await login_service.autenticar(credentials.login, credentials.senha, ip)
+    except LoginBloqueado as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.segundos)},
+        )
 
     if not user:
         raise HTTPException(
@@ -42,8 +53,8 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Cria o token JWT
-    access_token = create_access_token(data={"sub": str(user.id)})
+    # Cria o token JWT (com nome/tipo, para autenticar sem ir ao banco)
+    access_token = create_access_token(data=claims_usuario(user))
 
     # Retorna o token e os dados do usuário
     return LoginResponse(
@@ -59,7 +70,7 @@ def login(
 
 @router.get("/me", response_model=UsuarioPublic)
 def get_me(
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Endpoint para obter dados do usuário logado
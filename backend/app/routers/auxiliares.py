@@ -2,18 +2,13 @@
 Router de Endpoints Auxiliares - Expresso Embuibe
 Gerencia endpoints auxiliares: cidades, locais de embarque e motoristas
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
 from decimal import Decimal
-from typing import List
-from ..database import get_db
-from ..models.cidade import Cidade
-from ..models.local_embarque import LocalEmbarque
-from ..models.motorista import Motorista
-from ..models.proprietario import Proprietario
-from ..models.usuario import Usuario
-from ..utils.security import get_current_user
+from typing import List, Optional
+from ..config import settings
+from ..services.catalogo_service import catalogo_service, Catalogo, MotoristaCatalogo
+from ..utils.security import get_current_user, UsuarioAutenticado
 
 router = APIRouter()
 
@@ -64,34 +59,86 @@ class MotoristaResponse(BaseModel):
         from_attributes = True
 
 
+# ============================================================================
+# CACHE HTTP (ETag / If-None-Match)
+# ============================================================================
+
+def _nao_modificado(
+    request: Request,
+    response: Response,
+    catalogo: Catalogo,
+    recurso: str
+) -> Optional[Response]:
+    """
+    Aplica ETag e Cache-Control à resposta de uma lista do catálogo
+
+    O ETag combina a versão do catálogo com o recurso (rota e filtros),
+    então só muda quando cidades, locais, motoristas ou proprietários
+    são alterados.
+
+    Args:
+        request: Requisição (lê o If-None-Match)
+        response: Resposta do endpoint (recebe os cabeçalhos)
+        catalogo: Catálogo usado para montar a resposta
+        recurso: Identificação da lista (ex.: "cidades", "locais-3")
+
+    Returns:
+        Resposta 304 se o cliente já tem a versão atual, senão None
+    """
+    etag = f'"catalogo-{catalogo.versao}-{recurso}"'
+    cabecalhos = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.CATALOGO_CACHE_MAX_AGE}, must-revalidate",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        recebidos = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in recebidos or etag in recebidos:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+
+    response.headers.update(cabecalhos)
+    return None
+
+
 # ============================================================================
 # ENDPOINTS - CIDADES
 # ============================================================================
 
 @router.get("/cidades", response_model=List[CidadeResponse])
 def listar_cidades(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Lista todas as cidades ordenadas pela ordem definida
 
+    Servido do catálogo em memória (sem consulta ao banco), com ETag:
+    responde 304 se o If-None-Match corresponder à versão atual.
+
     Args:
-        db: Sessão do banco de dados
+        request: Requisição HTTP
+        response: Resposta HTTP (cabeçalhos de cache)
         current_user: Usuário autenticado
 
     Returns:
         Lista de cidades ordenadas
     """
-    cidades = db.query(Cidade).order_by(Cidade.ordem).all()
-    return [CidadeResponse.model_validate(c) for c in cidades]
+    catalogo = catalogo_service.obter()
+    nao_modificado = _nao_modificado(request, response, catalogo, "cidades")
+    if nao_modificado:
+        return nao_modificado
+
+    return [CidadeResponse(**c._asdict()) for c in catalogo.cidades_ordenadas]
 
 
 @router.get("/cidades/{cidade_id}/locais", response_model=List[LocalEmbarqueResponse])
 def listar_locais_por_cidade(
     cidade_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Lista todos os locais de embarque de uma cidade específica
@@ -100,7 +147,8 @@ def listar_locais_por_cidade(
 
     Args:
         cidade_id: ID da cidade
-        db: Sessão do banco de dados
+        request: Requisição HTTP
+        response: Resposta HTTP (cabeçalhos de cache)
         current_user: Usuário autenticado
 
     Returns:
@@ -110,83 +158,86 @@ def listar_locais_por_cidade(
         HTTPException 404: Se a cidade não for encontrada
     """
     # Verifica se a cidade existe
-    cidade = db.query(Cidade).filter(Cidade.id == cidade_id).first()
-    if not cidade:
+    if not catalogo_service.cidade(cidade_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cidade não encontrada"
         )
 
-    # Busca locais ativos da cidade
-    locais = db.query(LocalEmbarque).filter(
-        LocalEmbarque.cidade_id == cidade_id,
-        LocalEmbarque.ativo == True
-    ).order_by(LocalEmbarque.nome).all()
+    catalogo = catalogo_service.obter()
+    nao_modificado = _nao_modificado(request, response, catalogo, f"locais-{cidade_id}")
+    if nao_modificado:
+        return nao_modificado
 
-    return [LocalEmbarqueResponse.model_validate(l) for l in locais]
+    locais = catalogo.locais_ativos_por_cidade.get(cidade_id, [])
+    return [
+        LocalEmbarqueResponse(id=l.id, nome=l.nome, valor=l.valor, ativo=l.ativo)
+        for l in locais
+    ]
 
 
 # ============================================================================
 # ENDPOINTS - MOTORISTAS
 # ============================================================================
 
+def _motorista_response(motorista: MotoristaCatalogo) -> MotoristaResponse:
+    """Monta a resposta do motorista com o proprietário do catálogo"""
+    proprietario = catalogo_service.proprietario(motorista.proprietario_id)
+
+    return MotoristaResponse(
+        id=motorista.id,
+        nome=motorista.nome,
+        vagas=motorista.vagas,
+        ativo=motorista.ativo,
+        proprietario=ProprietarioSimples(
+            id=proprietario.id,
+            nome=proprietario.nome
+        )
+    )
+
+
 @router.get("/motoristas", response_model=List[MotoristaResponse])
 def listar_motoristas(
+    request: Request,
+    response: Response,
     apenas_ativos: bool = True,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Lista todos os motoristas com seus proprietários
 
     Args:
+        request: Requisição HTTP
+        response: Resposta HTTP (cabeçalhos de cache)
         apenas_ativos: Se True, retorna apenas motoristas ativos (padrão: True)
-        db: Sessão do banco de dados
         current_user: Usuário autenticado
 
     Returns:
         Lista de motoristas com dados do proprietário
     """
-    query = db.query(Motorista)
+    catalogo = catalogo_service.obter()
+    recurso = "motoristas-ativos" if apenas_ativos else "motoristas-todos"
+    nao_modificado = _nao_modificado(request, response, catalogo, recurso)
+    if nao_modificado:
+        return nao_modificado
 
-    if apenas_ativos:
-        query = query.filter(Motorista.ativo == True)
-
-    motoristas = query.order_by(Motorista.nome).all()
-
-    # Monta resposta com dados do proprietário
-    resultado = []
-    for motorista in motoristas:
-        proprietario = db.query(Proprietario).filter(
-            Proprietario.id == motorista.proprietario_id
-        ).first()
-
-        resultado.append(MotoristaResponse(
-            id=motorista.id,
-            nome=motorista.nome,
-            vagas=motorista.vagas,
-            ativo=motorista.ativo,
-            proprietario=ProprietarioSimples(
-                id=proprietario.id,
-                nome=proprietario.nome
-            )
-        ))
-
-    return resultado
+    return [
+        _motorista_response(motorista)
+        for motorista in catalogo.motoristas_ordenados
+        if motorista.ativo or not apenas_ativos
+    ]
 
 
 @router.get("/motoristas/{motorista_id}", response_model=MotoristaResponse)
 def buscar_motorista(
     motorista_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Busca um motorista específico por ID
 
     Args:
         motorista_id: ID do motorista
-        db: Sessão do banco de dados
         current_user: Usuário autenticado
 
     Returns:
@@ -195,7 +246,7 @@ def buscar_motorista(
     Raises:
         HTTPException 404: Se o motorista não for encontrado
     """
-    motorista = db.query(Motorista).filter(Motorista.id == motorista_id).first()
+    motorista = catalogo_service.motorista(motorista_id)
 
     if not motorista:
         raise HTTPException(
@@ -203,20 +254,7 @@ def buscar_motorista(
             detail="Motorista não encontrado"
         )
 
-    proprietario = db.query(Proprietario).filter(
-        Proprietario.id == motorista.proprietario_id
-    ).first()
-
-    return MotoristaResponse(
-        id=motorista.id,
-        nome=motorista.nome,
-        vagas=motorista.vagas,
-        ativo=motorista.ativo,
-        proprietario=ProprietarioSimples(
-            id=proprietario.id,
-            nome=proprietario.nome
-        )
-    )
+    return _motorista_response(motorista)
 
 
 # ============================================================================
@@ -225,8 +263,9 @@ def buscar_motorista(
 
 @router.get("/locais-embarque", response_model=List[dict])
 def listar_todos_locais(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Lista todos os locais de embarque agrupados por cidade
@@ -234,20 +273,21 @@ def listar_todos_locais(
     Retorna apenas locais ativos, agrupados e ordenados.
 
     Args:
-        db: Sessão do banco de dados
+        request: Requisição HTTP
+        response: Resposta HTTP (cabeçalhos de cache)
         current_user: Usuário autenticado
 
     Returns:
         Lista de cidades com seus locais de embarque
     """
-    cidades = db.query(Cidade).order_by(Cidade.ordem).all()
+    catalogo = catalogo_service.obter()
+    nao_modificado = _nao_modificado(request, response, catalogo, "locais-embarque")
+    if nao_modificado:
+        return nao_modificado
 
     resultado = []
-    for cidade in cidades:
-        locais = db.query(LocalEmbarque).filter(
-            LocalEmbarque.cidade_id == cidade.id,
-            LocalEmbarque.ativo == True
-        ).order_by(LocalEmbarque.nome).all()
+    for cidade in catalogo.cidades_ordenadas:
+        locais = catalogo.locais_ativos_por_cidade.get(cidade.id)
 
         if locais:  # Só adiciona cidades que têm locais
             resultado.append({
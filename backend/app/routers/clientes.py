@@ -4,85 +4,168 @@ Gerencia endpoints CRUD de clientes/passageiros
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import tuple_
 from typing import Optional
+import base64
+import binascii
+import json
 import math
-from ..database import get_db
+from ..database import get_db, get_async_db, executar
 from ..models.cliente import Cliente
-from ..models.usuario import Usuario
 from ..schemas.cliente import (
     ClienteCreate,
     ClienteUpdate,
     ClienteResponse,
     ClienteListItem,
+    ClienteSugestao,
     ClientePaginatedResponse
 )
-from ..utils.security import get_current_user
+from ..utils.security import get_current_user, UsuarioAutenticado
+from ..services.busca_cliente_service import busca_cliente_service
+from ..services.sugestao_cliente_service import sugestao_cliente_service
 
 router = APIRouter()
 
+# Maior página aceita em uma requisição (listas maiores: siga o next_cursor)
+LIMITE_MAXIMO_PAGINA = 1000
+
+
+def _codificar_cursor(cliente: Cliente) -> str:
+    """Cursor opaco apontando para depois do cliente (ordem nome, id)"""
+    conteudo = json.dumps([cliente.nome, cliente.id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(conteudo.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decodificar_cursor(cursor: str) -> tuple[str, int]:
+    """
+    Lê o cursor gerado por _codificar_cursor
+
+    Raises:
+        HTTPException 400: Se o cursor for inválido
+    """
+    try:
+        conteudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        nome, cliente_id = json.loads(conteudo.decode("utf-8"))
+        if not isinstance(nome, str) or not isinstance(cliente_id, int):
+            raise ValueError(cursor)
+        return nome, cliente_id
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
 
 @router.get("", response_model=ClientePaginatedResponse)
-def listar_clientes(
+async def listar_clientes(
     q: Optional[str] = Query(None, description="Busca por nome ou telefone"),
-    page: int = Query(1, ge=1, description="Página atual"),
-    limit: int = Query(20, ge=1, le=50000, description="Itens por página"),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    page: int = Query(1, ge=1, description="Página atual (ignorada quando há cursor)"),
+    limit: int = Query(20, ge=1, le=LIMITE_MAXIMO_PAGINA, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    contar: bool = Query(True, description="Calcula total e total_pages (desligue no autocomplete)"),
+    db=Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Lista clientes com busca e paginação
 
-    Permite buscar por nome ou telefone parcial.
-    Retorna apenas clientes ativos.
+    Permite buscar por nome (sem diferenciar acentos e maiúsculas) ou
+    telefone parcial (só os dígitos contam), usando os índices de busca.
+    Retorna apenas clientes ativos, em ordem de nome.
+
+    Para percorrer a lista, passe o next_cursor recebido no parâmetro
+    cursor: a próxima página é buscada a partir do último (nome, id), com
+    o mesmo custo em qualquer ponto da lista. A paginação por page
+    (OFFSET) continua aceita, mas fica mais lenta nas páginas finais.
 
     Args:
         q: Termo de busca (opcional)
-        page: Número da página
+        page: Número da página (sem cursor)
         limit: Itens por página
+        cursor: Cursor da próxima página (opcional)
+        contar: Se False, não conta os resultados (total e total_pages nulos);
+            com cursor a contagem nunca é feita, já veio na primeira página
         db: Sessão do banco de dados
         current_user: Usuário autenticado
 
     Returns:
-        Lista paginada de clientes
+        Lista paginada de clientes com next_cursor (None na última página)
+
+    Raises:
+        HTTPException 400: Se o cursor for inválido
     """
+    return await executar(db, _listar_clientes, q, page, limit, cursor, contar)
+
+
+def _listar_clientes(
+    db: Session, q: Optional[str], page: int, limit: int, cursor: Optional[str], contar: bool
+) -> ClientePaginatedResponse:
+    """Consultas da listagem de clientes (ver listar_clientes)"""
     # Query base
     query = db.query(Cliente).filter(Cliente.ativo == True)
 
     # Aplica filtro de busca se fornecido
     if q:
-        search_term = f"%{q}%"
-        query = query.filter(
-            or_(
-                Cliente.nome.ilike(search_term),
-                Cliente.telefone.ilike(search_term)
-            )
-        )
-
-    # Conta total de resultados
-    total = query.count()
-
-    # Calcula total de páginas
-    total_pages = math.ceil(total / limit)
-
-    # Aplica paginação e ordenação alfabética
-    offset = (page - 1) * limit
-    clientes = query.order_by(Cliente.nome).offset(offset).limit(limit).all()
+        query = busca_cliente_service.filtrar(query, q)
+
+    # Conta total de resultados (só na primeira consulta da listagem)
+    total = total_pages = None
+    if contar and not cursor:
+        total = query.count()
+        total_pages = math.ceil(total / limit)
+
+    # Ordenação alfabética; busca um a mais para saber se há próxima página
+    pagina = query.order_by(Cliente.nome, Cliente.id)
+    if cursor:
+        pagina = pagina.filter(tuple_(Cliente.nome, Cliente.id) > _decodificar_cursor(cursor))
+    else:
+        pagina = pagina.offset((page - 1) * limit)
+    clientes = pagina.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(clientes) > limit:
+        clientes = clientes[:limit]
+        next_cursor = _codificar_cursor(clientes[-1])
 
     return ClientePaginatedResponse(
         items=[ClienteListItem.model_validate(c) for c in clientes],
         total=total,
         page=page,
         limit=limit,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor
     )
 
 
+@router.get("/sugestoes", response_model=list[ClienteSugestao])
+async def sugerir_clientes(
+    prefix: str = Query(..., min_length=1, description="Início do nome ou do telefone"),
+    limit: int = Query(10, ge=1, le=50, description="Quantidade máxima de sugestões"),
+    current_user: UsuarioAutenticado = Depends(get_current_user)
+):
+    """
+    Sugestões de clientes para o autocomplete da emissão
+
+    Servido de um índice em memória (sem consulta ao banco): nomes são
+    comparados sem acentos/maiúsculas e telefones só pelos dígitos.
+    Para buscar por trecho no meio do nome, use GET /clientes?q=.
+
+    Args:
+        prefix: Início do nome ou do telefone
+        limit: Quantidade máxima de sugestões
+        current_user: Usuário autenticado
+
+    Returns:
+        Clientes ativos cujo nome ou telefone começa com o prefixo
+    """
+    return [ClienteSugestao(**s._asdict()) for s in sugestao_cliente_service.sugerir(prefix, limit)]
+
+
 @router.get("/{cliente_id}", response_model=ClienteResponse)
 def buscar_cliente(
     cliente_id: int,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Busca um cliente por ID
@@ -113,7 +196,7 @@ def buscar_cliente(
 def criar_cliente(
     cliente_data: ClienteCreate,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Cria um novo cliente
@@ -146,6 +229,7 @@ def criar_cliente(
     db.add(cliente)
     db.commit()
     db.refresh(cliente)
+    sugestao_cliente_service.atualizar(cliente)
 
     return ClienteResponse.model_validate(cliente)
 
@@ -155,7 +239,7 @@ def atualizar_cliente(
     cliente_id: int,
     cliente_data: ClienteUpdate,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Atualiza um cliente existente
@@ -203,6 +287,7 @@ def atualizar_cliente(
 
     db.commit()
     db.refresh(cliente)
+    sugestao_cliente_service.atualizar(cliente)
 
     return ClienteResponse.model_validate(cliente)
 
@@ -211,7 +296,7 @@ def atualizar_cliente(
 def desativar_cliente(
     cliente_id: int,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Desativa um cliente (soft delete)
@@ -236,6 +321,7 @@ def desativar_cliente(
 
     cliente.ativo = False
     db.commit()
+    sugestao_cliente_service.atualizar(cliente)
 
     return None
 
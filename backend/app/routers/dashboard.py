@@ -4,19 +4,19 @@ Gerencia endpoints de métricas e resumos para dashboard
 """
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case
 from pydantic import BaseModel
 from datetime import date, datetime, timedelta, time
 from decimal import Decimal
 from typing import List, Optional
-from ..database import get_db
+from ..database import executar, get_async_db
 from ..models.passagem import Passagem
 from ..models.viagem import Viagem
 from ..models.motorista import Motorista
 from ..models.proprietario import Proprietario
-from ..models.usuario import Usuario
 from ..models.cliente import Cliente
-from ..utils.security import get_current_user
+from ..models.resumo_diario import ResumoDiario
+from ..utils.security import get_current_user, UsuarioAutenticado
 
 router = APIRouter()
 
@@ -86,10 +86,10 @@ class DashboardResumo(BaseModel):
 
 
 @router.get("/resumo", response_model=DashboardResumo)
-def dashboard_resumo(data: Optional[date] = Query(
+async def dashboard_resumo(data: Optional[date] = Query(
     None, description="Data de referência (opcional, padrão: hoje)"),
-                     db: Session = Depends(get_db),
-                     current_user: Usuario = Depends(get_current_user)):
+                           db=Depends(get_async_db),
+                           current_user: UsuarioAutenticado = Depends(get_current_user)):
     """
     Retorna resumo completo para o dashboard
 
@@ -104,6 +104,11 @@ def dashboard_resumo(data: Optional[date] = Query(
     Returns:
         Resumo completo do dashboard
     """
+    return await executar(db, _calcular_resumo, data)
+
+
+def _calcular_resumo(db: Session, data: Optional[date]) -> DashboardResumo:
+    """Consultas do resumo do dashboard (ver dashboard_resumo)"""
     # Data de referência
     if data is None:
         data_ref = datetime.now().date()
@@ -114,128 +119,124 @@ def dashboard_resumo(data: Optional[date] = Query(
     inicio_semana = data_ref - timedelta(
         days=data_ref.weekday())  # Segunda-feira
     inicio_mes = data_ref.replace(day=1)
+    inicio_periodo = min(inicio_semana, inicio_mes)
 
-    # Métricas de HOJE
-    passagens_hoje = db.query(Passagem).filter(
-        Passagem.data_viagem == data_ref, Passagem.status
-        != "CANCELADA").all()
+    eh_hoje = ResumoDiario.data == data_ref
+    na_semana = ResumoDiario.data >= inicio_semana
+    no_mes = ResumoDiario.data >= inicio_mes
 
-    viagens_hoje = db.query(Viagem).filter(Viagem.data == data_ref).count()
+    def _contar(condicao):
+        return func.coalesce(
+            func.sum(case((condicao, ResumoDiario.total_passagens), else_=0)), 0)
 
-    metricas_hoje = MetricasPeriodo(
-        passageiros=len(passagens_hoje),
-        valor=sum(p.valor
-                  for p in passagens_hoje) if passagens_hoje else Decimal('0'),
-        viagens=viagens_hoje)
+    def _somar(condicao):
+        return func.coalesce(
+            func.sum(case((condicao, ResumoDiario.valor_total), else_=0)), 0)
 
-    # Métricas da SEMANA
-    passagens_semana = db.query(Passagem).filter(
-        Passagem.data_viagem >= inicio_semana, Passagem.data_viagem
-        <= data_ref, Passagem.status != "CANCELADA").all()
+    # Passageiros e valores de HOJE, SEMANA e MÊS lidos do resumo diário
+    totais = db.query(
+        _contar(eh_hoje), _somar(eh_hoje),
+        _contar(na_semana), _somar(na_semana),
+        _contar(no_mes), _somar(no_mes)
+    ).filter(ResumoDiario.data >= inicio_periodo,
+             ResumoDiario.data <= data_ref).one()
 
-    viagens_semana = db.query(Viagem).filter(Viagem.data >= inicio_semana,
-                                             Viagem.data <= data_ref).count()
+    # Viagens de HOJE, SEMANA e MÊS em uma única consulta
+    viagens_totais = db.query(
+        func.coalesce(func.sum(case((Viagem.data == data_ref, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Viagem.data >= inicio_semana, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Viagem.data >= inicio_mes, 1), else_=0)), 0)
+    ).filter(Viagem.data >= inicio_periodo, Viagem.data <= data_ref).one()
 
-    metricas_semana = MetricasPeriodo(
-        passageiros=len(passagens_semana),
-        valor=sum(
-            p.valor
-            for p in passagens_semana) if passagens_semana else Decimal('0'),
-        viagens=viagens_semana)
+    viagens_hoje, viagens_semana, viagens_mes = (int(v) for v in viagens_totais)
 
-    # Métricas do MÊS
-    passagens_mes = db.query(Passagem).filter(
-        Passagem.data_viagem >= inicio_mes, Passagem.data_viagem <= data_ref,
-        Passagem.status != "CANCELADA").all()
+    metricas_hoje = MetricasPeriodo(passageiros=int(totais[0]),
+                                    valor=Decimal(totais[1]),
+                                    viagens=viagens_hoje)
 
-    viagens_mes = db.query(Viagem).filter(Viagem.data >= inicio_mes,
-                                          Viagem.data <= data_ref).count()
+    metricas_semana = MetricasPeriodo(passageiros=int(totais[2]),
+                                      valor=Decimal(totais[3]),
+                                      viagens=viagens_semana)
 
-    metricas_mes = MetricasPeriodo(
-        passageiros=len(passagens_mes),
-        valor=sum(p.valor
-                  for p in passagens_mes) if passagens_mes else Decimal('0'),
-        viagens=viagens_mes)
+    metricas_mes = MetricasPeriodo(passageiros=int(totais[4]),
+                                   valor=Decimal(totais[5]),
+                                   viagens=viagens_mes)
 
     # Últimas 5 viagens registradas
-    ultimas_viagens_db = db.query(Viagem).order_by(
-        Viagem.data.desc(), Viagem.horario.desc()).limit(5).all()
-
-    ultimas_viagens = []
-    for viagem in ultimas_viagens_db:
-        motorista = db.query(Motorista).filter(
-            Motorista.id == viagem.motorista_id).first()
-        proprietario = db.query(Proprietario).filter(
-            Proprietario.id == motorista.proprietario_id).first()
-
-        ultimas_viagens.append(
-            UltimaViagemDashboard(data=viagem.data,
-                                  horario=viagem.horario,
-                                  motorista=motorista.nome,
-                                  proprietario=proprietario.nome,
-                                  passageiros=viagem.total_passageiros,
-                                  valor=viagem.valor_total))
+    ultimas_viagens_db = db.query(
+        Viagem, Motorista.nome, Proprietario.nome
+    ).join(Motorista, Motorista.id == Viagem.motorista_id).join(
+        Proprietario, Proprietario.id == Motorista.proprietario_id).order_by(
+            Viagem.data.desc(), Viagem.horario.desc()).limit(5).all()
+
+    ultimas_viagens = [
+        UltimaViagemDashboard(data=viagem.data,
+                              horario=viagem.horario,
+                              motorista=motorista_nome,
+                              proprietario=proprietario_nome,
+                              passageiros=viagem.total_passageiros,
+                              valor=viagem.valor_total)
+        for viagem, motorista_nome, proprietario_nome in ultimas_viagens_db
+    ]
 
     # Top 5 motoristas do mês
-    from collections import defaultdict
-    motoristas_stats = defaultdict(
-        lambda: {
-            'total_passageiros': 0,
-            'total_viagens': 0,
-            'valor_total': Decimal('0'),
-            'proprietario': ''
-        })
-
-    viagens_mes_db = db.query(Viagem).filter(Viagem.data >= inicio_mes,
-                                             Viagem.data <= data_ref).all()
-
-    for viagem in viagens_mes_db:
-        motorista = db.query(Motorista).filter(
-            Motorista.id == viagem.motorista_id).first()
-        proprietario = db.query(Proprietario).filter(
-            Proprietario.id == motorista.proprietario_id).first()
-
-        motoristas_stats[
-            motorista.nome]['total_passageiros'] += viagem.total_passageiros
-        motoristas_stats[motorista.nome]['total_viagens'] += 1
-        motoristas_stats[motorista.nome]['valor_total'] += viagem.valor_total
-        motoristas_stats[motorista.nome]['proprietario'] = proprietario.nome
-
-    # Ordena por total de passageiros e pega top 5
-    top_motoristas = sorted(motoristas_stats.items(),
-                            key=lambda x: x[1]['total_passageiros'],
-                            reverse=True)[:5]
+    total_passageiros_motorista = func.sum(Viagem.total_passageiros)
+    top_motoristas = db.query(
+        Motorista.nome, Proprietario.nome, total_passageiros_motorista,
+        func.count(Viagem.id), func.sum(Viagem.valor_total)
+    ).join(Motorista, Motorista.id == Viagem.motorista_id).join(
+        Proprietario, Proprietario.id == Motorista.proprietario_id).filter(
+            Viagem.data >= inicio_mes, Viagem.data <= data_ref).group_by(
+                Motorista.id, Motorista.nome, Proprietario.nome).order_by(
+                    total_passageiros_motorista.desc()).limit(5).all()
 
     top_motoristas_list = [
         TopMotorista(motorista=nome,
-                     proprietario=stats['proprietario'],
-                     total_passageiros=stats['total_passageiros'],
-                     total_viagens=stats['total_viagens'],
-                     valor_total=stats['valor_total'])
-        for nome, stats in top_motoristas
+                     proprietario=proprietario,
+                     total_passageiros=passageiros or 0,
+                     total_viagens=viagens,
+                     valor_total=valor or Decimal('0'))
+        for nome, proprietario, passageiros, viagens, valor in top_motoristas
     ]
 
-    # Resumo por forma de pagamento (hoje)
-    formas_stats = defaultdict(lambda: {'total': 0, 'valor': Decimal('0')})
+    # Formas de pagamento de hoje e do mês lidas do resumo diário
+    formas_db = db.query(
+        ResumoDiario.forma_pagamento, _contar(eh_hoje), _somar(eh_hoje),
+        func.sum(ResumoDiario.total_passagens),
+        func.sum(ResumoDiario.valor_total)
+    ).filter(ResumoDiario.data >= inicio_mes,
+             ResumoDiario.data <= data_ref).group_by(
+                 ResumoDiario.forma_pagamento).all()
+
+    total_passagens_hoje = metricas_hoje.passageiros
+    total_passageiros_mes = metricas_mes.passageiros
+    formas_pagamento = []
+    formas_pagamento_mes = []
 
-    for passagem in passagens_hoje:
-        formas_stats[passagem.forma_pagamento]['total'] += 1
-        formas_stats[passagem.forma_pagamento]['valor'] += passagem.valor
+    for forma, total_hoje, valor_hoje, total_mes, valor_mes in formas_db:
+        if not total_mes:
+            continue  # Linhas zeradas por cancelamento/transferência
 
-    total_passagens_hoje = len(passagens_hoje)
-    formas_pagamento = []
+        if total_hoje:
+            percentual = (total_hoje / total_passagens_hoje *
+                          100) if total_passagens_hoje > 0 else 0
+            formas_pagamento.append(
+                ResumoFormaPagamento(forma=forma,
+                                     total=total_hoje,
+                                     valor=Decimal(valor_hoje),
+                                     percentual=round(percentual, 2)))
 
-    for forma, stats in formas_stats.items():
-        percentual = (stats['total'] / total_passagens_hoje *
-                      100) if total_passagens_hoje > 0 else 0
-        formas_pagamento.append(
+        percentual = (total_mes / total_passageiros_mes *
+                      100) if total_passageiros_mes > 0 else 0
+        formas_pagamento_mes.append(
             ResumoFormaPagamento(forma=forma,
-                                 total=stats['total'],
-                                 valor=stats['valor'],
+                                 total=total_mes,
+                                 valor=valor_mes or Decimal('0'),
                                  percentual=round(percentual, 2)))
 
     # Ordena por total
     formas_pagamento.sort(key=lambda x: x.total, reverse=True)
+    formas_pagamento_mes.sort(key=lambda x: x.total, reverse=True)
 
     # === NOVOS CÁLCULOS PARA O DASHBOARD ADMIN ===
 
@@ -245,18 +246,17 @@ def dashboard_resumo(data: Optional[date] = Query(
         Cliente.created_at <= datetime.combine(data_ref, time.max)).count()
 
     # Distribuição por cidade (baseado nos passageiros do mês)
-    cidades_stats = defaultdict(lambda: 0)
-    for passagem in passagens_mes:
-        cliente = db.query(Cliente).filter(
-            Cliente.id == passagem.cliente_id).first()
-        if cliente and cliente.cidade:
-            cidades_stats[cliente.cidade] += 1
-
-    total_passageiros_mes = len(passagens_mes)
+    total_cidade = func.count(Passagem.id)
+    cidades_db = db.query(Cliente.cidade, total_cidade).join(
+        Cliente, Cliente.id == Passagem.cliente_id).filter(
+            Passagem.data_viagem >= inicio_mes,
+            Passagem.data_viagem <= data_ref,
+            Passagem.status != "CANCELADA", Cliente.cidade.isnot(None),
+            Cliente.cidade != "").group_by(Cliente.cidade).order_by(
+                total_cidade.desc()).limit(5).all()
+
     distribuicao_cidades = []
-    for cidade, total in sorted(cidades_stats.items(),
-                                key=lambda x: x[1],
-                                reverse=True)[:5]:
+    for cidade, total in cidades_db:
         percentual = (total / total_passageiros_mes *
                       100) if total_passageiros_mes > 0 else 0
         distribuicao_cidades.append(
@@ -264,23 +264,6 @@ def dashboard_resumo(data: Optional[date] = Query(
                                total=total,
                                percentual=round(percentual, 1)))
 
-    # Formas de pagamento do mês (não só hoje)
-    formas_stats_mes = defaultdict(lambda: {'total': 0, 'valor': Decimal('0')})
-    for passagem in passagens_mes:
-        formas_stats_mes[passagem.forma_pagamento]['total'] += 1
-        formas_stats_mes[passagem.forma_pagamento]['valor'] += passagem.valor
-
-    formas_pagamento_mes = []
-    for forma, stats in formas_stats_mes.items():
-        percentual = (stats['total'] / total_passageiros_mes *
-                      100) if total_passageiros_mes > 0 else 0
-        formas_pagamento_mes.append(
-            ResumoFormaPagamento(forma=forma,
-                                 total=stats['total'],
-                                 valor=stats['valor'],
-                                 percentual=round(percentual, 2)))
-    formas_pagamento_mes.sort(key=lambda x: x.total, reverse=True)
-
     return DashboardResumo(
         hoje=metricas_hoje,
         semana=metricas_semana,
@@ -290,13 +273,13 @@ def dashboard_resumo(data: Optional[date] = Query(
         formas_pagamento_hoje=formas_pagamento,
         # Novos campos diretos para o frontend
         viagens_hoje=viagens_hoje,
-        passageiros_hoje=len(passagens_hoje),
+        passageiros_hoje=metricas_hoje.passageiros,
         faturamento_hoje=metricas_hoje.valor,
         viagens_semana=viagens_semana,
-        passageiros_semana=len(passagens_semana),
+        passageiros_semana=metricas_semana.passageiros,
         faturamento_semana=metricas_semana.valor,
         viagens_mes=viagens_mes,
-        passageiros_mes=len(passagens_mes),
+        passageiros_mes=metricas_mes.passageiros,
         faturamento_mes=metricas_mes.valor,
         novos_clientes_semana=novos_clientes_semana,
         distribuicao_cidades=distribuicao_cidades,
@@ -304,8 +287,8 @@ def dashboard_resumo(data: Optional[date] = Query(
 
 
 @router.get("/metricas-rapidas")
-def metricas_rapidas(db: Session = Depends(get_db),
-                     current_user: Usuario = Depends(get_current_user)):
+async def metricas_rapidas(db=Depends(get_async_db),
+                           current_user: UsuarioAutenticado = Depends(get_current_user)):
     """
     Retorna métricas rápidas para atualização em tempo real
 
@@ -316,27 +299,25 @@ def metricas_rapidas(db: Session = Depends(get_db),
     Returns:
         Métricas básicas do dia
     """
+    return await executar(db, _calcular_metricas_rapidas)
+
+
+def _calcular_metricas_rapidas(db: Session) -> dict:
+    """Consultas das métricas rápidas (ver metricas_rapidas)"""
     hoje = datetime.now().date()
 
-    # Passagens do dia
-    passagens_hoje = db.query(Passagem).filter(Passagem.data_viagem == hoje,
-                                               Passagem.status
-                                               != "CANCELADA").count()
+    # Passagens e valor total do dia lidos do resumo diário
+    passagens_hoje, valor_total = db.query(
+        func.coalesce(func.sum(ResumoDiario.total_passagens), 0),
+        func.sum(ResumoDiario.valor_total)).filter(
+            ResumoDiario.data == hoje).one()
 
     # Viagens registradas hoje
     viagens_hoje = db.query(Viagem).filter(Viagem.data == hoje).count()
 
-    # Valor total do dia
-    passagens = db.query(Passagem).filter(Passagem.data_viagem == hoje,
-                                          Passagem.status
-                                          != "CANCELADA").all()
-
-    valor_total = sum(p.valor
-                      for p in passagens) if passagens else Decimal('0')
-
     return {
         "passagens": passagens_hoje,
         "viagens": viagens_hoje,
-        "valor_total": float(valor_total),
+        "valor_total": float(valor_total or 0),
         "data": hoje.isoformat()
     }
@@ -0,0 +1,83 @@
+"""
+Router de Métricas - Expresso Embuibe
+Expõe métricas de operação (pool de conexões do banco) em JSON ou no
+formato texto do Prometheus e as consultas repetidas (N+1) detectadas
+"""
+import hmac
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from ..config import settings
+from ..utils.metricas_pool import metricas_pools, formatar_prometheus
+from ..utils.metricas_consultas import consultas_repetidas
+from ..utils.security import security, get_current_user
+
+router = APIRouter()
+
+# Content-Type do formato texto do Prometheus
+CONTENT_TYPE_PROMETHEUS = "text/plain; version=0.0.4"
+
+
+async def autorizar_metricas(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    Libera as métricas para o token de coleta (METRICS_TOKEN) ou administradores
+
+    Raises:
+        HTTPException 401/403: Se o token não for o de coleta nem de um administrador
+    """
+    token = credentials.credentials
+    if settings.METRICS_TOKEN and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        return
+
+    user = await get_current_user(credentials)
+    if user.tipo != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso permitido apenas para administradores",
+        )
+
+
+@router.get("/db-pool", dependencies=[Depends(autorizar_metricas)])
+async def metricas_pool_banco(
+    formato: str = Query("json", pattern="^(json|prometheus)$", description="json ou prometheus")
+):
+    """
+    Métricas dos pools de conexões do banco deste processo
+
+    Para cada engine ("sync" e, com DATABASE_ASYNC, "async"): conexões em
+    uso, livres e de overflow, pico de uso, checkouts, esperas com o pool
+    esgotado, timeouts e histogramas (segundos) da latência do checkout e
+    do tempo de espera. Contadores e histogramas são acumulados desde o
+    início do processo; com vários workers, cada um responde os seus.
+
+    Args:
+        formato: json (padrão) ou prometheus (texto para coleta)
+
+    Returns:
+        Métricas por pool
+    """
+    dados = [metricas.dados() for metricas in metricas_pools.values()]
+
+    if formato == "prometheus":
+        return PlainTextResponse(formatar_prometheus(dados), media_type=CONTENT_TYPE_PROMETHEUS)
+
+    return {"pools": dados}
+
+
+@router.get("/consultas-repetidas", dependencies=[Depends(autorizar_metricas)])
+async def metricas_consultas_repetidas():
+    """
+    Consultas executadas mais de CONSULTAS_REPETIDAS_LIMITE vezes em uma
+    mesma requisição (provável N+1), por endpoint, desde o início do processo
+
+    Returns:
+        Limite configurado e ocorrências (endpoint, forma da consulta,
+        requisições afetadas e maior repetição em uma requisição)
+    """
+    return {
+        "monitorando": settings.CONSULTAS_MONITORAR,
+        "limite": settings.CONSULTAS_REPETIDAS_LIMITE,
+        "ocorrencias": consultas_repetidas.dados(),
+    }
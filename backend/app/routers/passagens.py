@@ -2,19 +2,18 @@
 Router de Passagens - Expresso Embuibe
 Gerencia endpoints de emissão e consulta de passagens
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
 from datetime import date, datetime
-from ..database import get_db
+from decimal import Decimal
+from ..database import get_db, get_async_db, executar
 from ..models.passagem import Passagem
 from ..models.cliente import Cliente
 from ..models.local_embarque import LocalEmbarque
-from ..models.motorista import Motorista
 from ..models.cidade import Cidade
-from ..models.proprietario import Proprietario
 from ..models.usuario import Usuario
-from ..models.viagem import Viagem
 from ..schemas.passagem import (
     PassagemCreate,
     PassagemResponse,
@@ -23,85 +22,150 @@ from ..schemas.passagem import (
     PassagemListItem,
     PassagemCancelar,
     PassagemTransferir,
-    PassagemAlteradaResponse
+    PassagemAlteradaResponse,
+    PassagemPDFStatus,
+    PassagemLoteCreate,
+    PassagemLoteEmitidaResponse
 )
-from ..utils.security import get_current_user
+from ..utils.security import get_current_user, UsuarioAutenticado
 from ..services.pdf_service import pdf_service
-from ..config import settings
+from ..services.numeracao_service import numeracao_service
+from ..services.resumo_service import resumo_service
+from ..services.viagem_service import viagem_service
+from ..services.pdf_fila_service import pdf_fila_service, PDF_PRONTO
+from ..services.pdf_cache_service import pdf_cache_service
+from ..services.catalogo_service import catalogo_service
 import base64
 
 router = APIRouter()
 
 
-def _gerar_numero_passagem(db: Session) -> int:
+def _reservar_vagas(db: Session, data: date, horario, motorista_id: int, quantidade: int, valor: Decimal, atendente_id: int):
     """
-    Gera o próximo número de passagem sequencial
+    Ocupa vagas na viagem ou recusa a venda se ela estiver lotada
 
-    Args:
-        db: Sessão do banco de dados
-
-    Returns:
-        Próximo número disponível
+    Raises:
+        HTTPException 409: Se não houver vagas suficientes
     """
-    # Busca o maior número de passagem existente
-    ultimo_numero = db.query(func.max(Passagem.numero)).scalar()
+    if not viagem_service.reservar_vagas(db, data, horario, motorista_id, quantidade, valor, atendente_id):
+        ocupadas, vagas = viagem_service.ocupacao(db, data, horario, motorista_id)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Viagem lotada: {ocupadas} de {vagas} vagas ocupadas (solicitado: {quantidade})"
+        )
 
-    if ultimo_numero is None:
-        # Se não houver passagens, usa o número inicial configurado
-        return settings.NUMERO_PASSAGEM_INICIAL
 
-    return ultimo_numero + 1
+def _endereco_cliente(cliente: Cliente):
+    """Monta o endereço do cliente (endereço, bairro, cidade) como endereço de embarque padrão"""
+    if not cliente.endereco:
+        return None
 
+    partes = [cliente.endereco]
+    if cliente.bairro:
+        partes.append(cliente.bairro)
+    if cliente.cidade:
+        partes.append(cliente.cidade)
+    return ", ".join(partes)
+
+
+def _dados_pdf(passagem: Passagem, cliente_nome: str, cidade_nome: str, local_nome: str, atendente_nome: str) -> dict:
+    """Monta os argumentos do PDF de uma passagem (pdf_service.gerar_passagem_pdf)"""
+    return {
+        "numero": passagem.numero,
+        "cliente_nome": cliente_nome,
+        "cidade": cidade_nome,
+        "local_embarque": local_nome,
+        "endereco_embarque": passagem.endereco_embarque or "",
+        "data_viagem": passagem.data_viagem.strftime("%d/%m/%Y"),
+        "horario": passagem.horario.strftime("%H:%M"),
+        "valor": passagem.valor,
+        "forma_pagamento": passagem.forma_pagamento,
+        "data_emissao": passagem.data_emissao,
+        "atendente_nome": atendente_nome,
+    }
+
+
+def _gravar_pdf_cache(passagem_id: int, chave: str, pdf_bytes: bytes):
+    """Grava o PDF no cache em disco; falhas de disco não impedem a resposta"""
+    try:
+        return pdf_cache_service.gravar(passagem_id, chave, pdf_bytes)
+    except OSError as e:
+        print(f"Erro ao gravar PDF da passagem {passagem_id} no cache: {e}")
+        return None
+
+
+def _url_pdf(passagem_id: int) -> str:
+    """Endereço de download do PDF da passagem"""
+    return f"/api/v1/passagens/{passagem_id}/pdf"
 
-def _atualizar_viagem_contadores(db: Session, data: date, horario, motorista_id: int, delta_passageiros: int, delta_valor: float):
-    """
-    Atualiza os contadores de uma viagem (passageiros e valor)
-    
-    Args:
-        db: Sessão do banco de dados
-        data: Data da viagem
-        horario: Horário da viagem
-        motorista_id: ID do motorista
-        delta_passageiros: Quantidade a adicionar/remover (pode ser negativo)
-        delta_valor: Valor a adicionar/remover (pode ser negativo)
-    """
-    viagem = db.query(Viagem).filter(
-        Viagem.data == data,
-        Viagem.horario == horario,
-        Viagem.motorista_id == motorista_id
-    ).first()
-    
-    if viagem:
-        viagem.total_passageiros += delta_passageiros
-        viagem.valor_total += delta_valor
-        
-        # Remove viagem se ficou sem passageiros
-        if viagem.total_passageiros <= 0:
-            db.delete(viagem)
+
+def _cidade_da_passagem(passagem: Passagem) -> int:
+    """Retorna o ID da cidade do local de embarque da passagem"""
+    return catalogo_service.local(passagem.local_embarque_id).cidade_id
 
 
 @router.post("", response_model=PassagemEmitidaResponse, status_code=status.HTTP_201_CREATED)
-def emitir_passagem(
+async def emitir_passagem(
     passagem_data: PassagemCreate,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    pdf_assincrono: bool = Query(False, description="Gera o PDF em segundo plano e responde sem o pdf_base64"),
+    db=Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Emite uma nova passagem
 
-    Gera número sequencial, calcula o valor e cria o PDF.
+    Gera número sequencial, calcula o valor e cria o PDF. Com
+    pdf_assincrono o PDF vai para a fila de processos e a resposta sai
+    sem esperar o ReportLab; o PDF é baixado depois em pdf_url. Sem ele,
+    o PDF é gerado em uma thread, fora do event loop.
 
     Args:
         passagem_data: Dados da passagem
+        pdf_assincrono: Gera o PDF fora da requisição
         db: Sessão do banco de dados
         current_user: Usuário autenticado
 
     Returns:
-        Passagem emitida com PDF em base64
+        Passagem emitida com PDF em base64 (ou pdf_status PENDENTE)
 
     Raises:
         HTTPException 404: Se cliente, local ou motorista não forem encontrados
         HTTPException 400: Se a forma de pagamento for inválida
+        HTTPException 409: Se a viagem estiver lotada
+    """
+    # Número antes da transação da emissão. A reserva de um bloco novo usa
+    # conexão própria e pode esperar por lock: roda numa thread, sem travar
+    # o event loop (uma emissão recusada deixa o número sem uso)
+    numero = numeracao_service.numero_em_memoria()
+    if numero is None:
+        numero = await run_in_threadpool(numeracao_service.proximo_numero)
+
+    passagem, dados_pdf = await executar(db, _gravar_passagem, passagem_data, numero, current_user)
+
+    if pdf_assincrono:
+        # Gera o PDF na fila de processos
+        pdf_fila_service.enfileirar(passagem.id, dados_pdf)
+        return PassagemEmitidaResponse(
+            passagem=passagem,
+            pdf_status=pdf_fila_service.status(passagem.id),
+            pdf_url=_url_pdf(passagem.id)
+        )
+
+    pdf_bytes = await run_in_threadpool(_gerar_pdf_emissao, passagem.id, dados_pdf)
+
+    return PassagemEmitidaResponse(
+        passagem=passagem,
+        pdf_base64=base64.b64encode(pdf_bytes).decode('utf-8'),
+        pdf_url=_url_pdf(passagem.id)
+    )
+
+
+def _gravar_passagem(db: Session, passagem_data: PassagemCreate, numero: int, current_user: UsuarioAutenticado):
+    """
+    Valida e grava uma passagem com vaga e resumo diário (ver emitir_passagem)
+
+    Returns:
+        Tupla (passagem gravada, argumentos do PDF)
     """
     # Valida forma de pagamento
     formas_validas = ["DINHEIRO", "CARTAO", "PIX"]
@@ -120,9 +184,7 @@ def emitir_passagem(
         )
 
     # Busca o local de embarque
-    local = db.query(LocalEmbarque).filter(
-        LocalEmbarque.id == passagem_data.local_embarque_id
-    ).first()
+    local = catalogo_service.local(passagem_data.local_embarque_id)
     if not local:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -130,31 +192,24 @@ def emitir_passagem(
         )
 
     # Busca a cidade do local
-    cidade = db.query(Cidade).filter(Cidade.id == local.cidade_id).first()
+    cidade = catalogo_service.cidade(local.cidade_id)
 
     # Busca o motorista
-    motorista = db.query(Motorista).filter(
-        Motorista.id == passagem_data.motorista_id
-    ).first()
+    motorista = catalogo_service.motorista(passagem_data.motorista_id)
     if not motorista:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Motorista não encontrado"
         )
 
-    # Gera o número da passagem
-    numero = _gerar_numero_passagem(db)
+    # Ocupa a vaga na viagem (recusa a venda se estiver lotada)
+    _reservar_vagas(
+        db, passagem_data.data_viagem, passagem_data.horario, motorista.id,
+        1, local.valor, current_user.id
+    )
 
     # Define endereço de embarque: usa o passado ou monta do cliente
-    endereco_embarque = passagem_data.endereco_embarque
-    if not endereco_embarque and cliente.endereco:
-        # Monta endereço do cliente como padrão
-        partes = [cliente.endereco]
-        if cliente.bairro:
-            partes.append(cliente.bairro)
-        if cliente.cidade:
-            partes.append(cliente.cidade)
-        endereco_embarque = ", ".join(partes)
+    endereco_embarque = passagem_data.endereco_embarque or _endereco_cliente(cliente)
 
     # Cria a passagem
     passagem = Passagem(
@@ -172,53 +227,150 @@ def emitir_passagem(
     )
 
     db.add(passagem)
-    db.flush()  # Garante que a passagem está no banco antes de criar/atualizar viagem
-
-    # Atualizar ou criar viagem automaticamente
-    viagem = db.query(Viagem).filter(
-        Viagem.data == passagem_data.data_viagem,
-        Viagem.horario == passagem_data.horario,
-        Viagem.motorista_id == passagem_data.motorista_id
-    ).first()
-
-    if viagem:
-        # Viagem existe - incrementar contadores
-        viagem.total_passageiros += 1
-        viagem.valor_total += local.valor
-    else:
-        # Criar nova viagem
-        nova_viagem = Viagem(
-            data=passagem_data.data_viagem,
-            horario=passagem_data.horario,
-            motorista_id=passagem_data.motorista_id,
-            total_passageiros=1,
-            valor_total=local.valor,
-            atendente_id=current_user.id,
-            status="PENDENTE"
-        )
-        db.add(nova_viagem)
+
+    # Atualiza o resumo diário na mesma transação
+    resumo_service.registrar_passagem(db, passagem, local.cidade_id)
 
     db.commit()
     db.refresh(passagem)
 
-    # Gera o PDF
-    pdf_base64 = pdf_service.gerar_passagem_pdf(
-        numero=passagem.numero,
-        cliente_nome=cliente.nome,
-        cidade=cidade.nome,
-        local_embarque=local.nome,
-        endereco_embarque=endereco_embarque,
-        data_viagem=passagem.data_viagem.strftime("%d/%m/%Y"),
-        horario=passagem.horario.strftime("%H:%M"),
-        valor=passagem.valor,
-        forma_pagamento=passagem.forma_pagamento,
-        data_emissao=passagem.data_emissao,
-        atendente_nome=current_user.nome
+    dados_pdf = _dados_pdf(passagem, cliente.nome, cidade.nome, local.nome, current_user.nome)
+    return PassagemResponse.model_validate(passagem), dados_pdf
+
+
+def _gerar_pdf_emissao(passagem_id: int, dados_pdf: dict) -> bytes:
+    """Gera o PDF e já deixa em cache para a reimpressão"""
+    pdf_bytes = pdf_service.gerar_passagem_pdf(**dados_pdf)
+    _gravar_pdf_cache(passagem_id, pdf_cache_service.chave(dados_pdf), pdf_bytes)
+    return pdf_bytes
+
+
+@router.post("/lote", response_model=PassagemLoteEmitidaResponse, status_code=status.HTTP_201_CREATED)
+def emitir_passagens_lote(
+    lote: PassagemLoteCreate,
+    db: Session = Depends(get_db),
+    current_user: UsuarioAutenticado = Depends(get_current_user)
+):
+    """
+    Emite as passagens de um grupo (mesma viagem) de uma só vez
+
+    Tudo em uma transação: local, motorista e clientes são validados uma
+    vez, os números são consecutivos, a viagem e o resumo diário são
+    atualizados uma única vez e o PDF sai com uma página por passagem.
+
+    Args:
+        lote: Dados da viagem e lista de passageiros
+        db: Sessão do banco de dados
+        current_user: Usuário autenticado
+
+    Returns:
+        Passagens emitidas, valor total e PDF em base64
+
+    Raises:
+        HTTPException 404: Se algum cliente, o local ou o motorista não forem encontrados
+        HTTPException 400: Se a forma de pagamento for inválida
+        HTTPException 409: Se a viagem não tiver vagas para o grupo todo
+    """
+    # Valida forma de pagamento
+    formas_validas = ["DINHEIRO", "CARTAO", "PIX"]
+    forma_pagamento = lote.forma_pagamento.upper()
+    if forma_pagamento not in formas_validas:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Forma de pagamento inválida. Use: {', '.join(formas_validas)}"
+        )
+
+    # Busca todos os clientes do grupo em uma consulta
+    ids_clientes = {p.cliente_id for p in lote.passageiros}
+    clientes = {
+        c.id: c for c in db.query(Cliente).filter(Cliente.id.in_(ids_clientes)).all()
+    }
+    faltando = sorted(ids_clientes - clientes.keys())
+    if faltando:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Cliente(s) não encontrado(s): {', '.join(map(str, faltando))}"
+        )
+
+    # Busca o local de embarque e sua cidade
+    local = catalogo_service.local(lote.local_embarque_id)
+    if not local:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Local de embarque não encontrado"
+        )
+    cidade = catalogo_service.cidade(local.cidade_id)
+
+    # Busca o motorista
+    motorista = catalogo_service.motorista(lote.motorista_id)
+    if not motorista:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Motorista não encontrado"
+        )
+
+    quantidade = len(lote.passageiros)
+    valor_total = local.valor * quantidade
+
+    # Ocupa as vagas do grupo todo de uma vez (ou recusa o grupo inteiro)
+    _reservar_vagas(
+        db, lote.data_viagem, lote.horario, motorista.id,
+        quantidade, valor_total, current_user.id
     )
 
-    return PassagemEmitidaResponse(
-        passagem=PassagemResponse.model_validate(passagem),
-        pdf_base64=pdf_base64
+    # Números consecutivos para o grupo, só depois das vagas garantidas:
+    # um grupo recusado não consome números
+    numeros = numeracao_service.proximos_numeros(quantidade, db)
+
+    passagens = []
+    for numero, passageiro in zip(numeros, lote.passageiros):
+        cliente = clientes[passageiro.cliente_id]
+        passagens.append(Passagem(
+            numero=numero,
+            cliente_id=cliente.id,
+            local_embarque_id=local.id,
+            motorista_id=motorista.id,
+            horario=lote.horario,
+            data_viagem=lote.data_viagem,
+            valor=local.valor,  # Valor vem do local de embarque
+            forma_pagamento=forma_pagamento,
+            atendente_id=current_user.id,
+            status="EMITIDA",
+            endereco_embarque=passageiro.endereco_embarque or _endereco_cliente(cliente)
+        ))
+
+    db.add_all(passagens)
+    db.flush()
+
+    # Todas as passagens caem na mesma linha do resumo diário
+    resumo_service.registrar(
+        db=db,
+        data=lote.data_viagem,
+        motorista_id=lote.motorista_id,
+        forma_pagamento=forma_pagamento,
+        cidade_id=local.cidade_id,
+        delta_passagens=quantidade,
+        delta_valor=valor_total
+    )
+
+    ids_passagens = [p.id for p in passagens]
+    db.commit()
+
+    # Recarrega as passagens do grupo em uma consulta
+    passagens = db.query(Passagem).filter(
+        Passagem.id.in_(ids_passagens)
+    ).order_by(Passagem.numero).all()
+
+    # Um PDF com uma página por passagem
+    pdf_bytes = pdf_service.gerar_passagens_pdf([
+        _dados_pdf(passagem, clientes[passagem.cliente_id].nome, cidade.nome, local.nome, current_user.nome)
+        for passagem in passagens
+    ])
+
+    return PassagemLoteEmitidaResponse(
+        passagens=[PassagemResponse.model_validate(p) for p in passagens],
+        valor_total=valor_total,
+        pdf_base64=base64.b64encode(pdf_bytes).decode('utf-8')
     )
 
 
@@ -226,7 +378,7 @@ def emitir_passagem(
 def buscar_passagem(
     passagem_id: int,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Busca uma passagem por ID com todos os dados relacionados
@@ -252,10 +404,10 @@ def buscar_passagem(
 
     # Carrega dados relacionados
     cliente = db.query(Cliente).filter(Cliente.id == passagem.cliente_id).first()
-    local = db.query(LocalEmbarque).filter(LocalEmbarque.id == passagem.local_embarque_id).first()
-    cidade = db.query(Cidade).filter(Cidade.id == local.cidade_id).first()
-    motorista = db.query(Motorista).filter(Motorista.id == passagem.motorista_id).first()
-    proprietario = db.query(Proprietario).filter(Proprietario.id == motorista.proprietario_id).first()
+    local = catalogo_service.local(passagem.local_embarque_id)
+    cidade = catalogo_service.cidade(local.cidade_id)
+    motorista = catalogo_service.motorista(passagem.motorista_id)
+    proprietario = catalogo_service.proprietario(motorista.proprietario_id)
     atendente = db.query(Usuario).filter(Usuario.id == passagem.atendente_id).first()
 
     return PassagemDetalhada(
@@ -282,11 +434,16 @@ def buscar_passagem(
 def gerar_pdf_passagem(
     passagem_id: int,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Gera o PDF de uma passagem existente
 
+    O PDF fica em cache no disco, endereçado pelos campos impressos;
+    reimpressões são servidas direto do arquivo. Se o PDF foi
+    enfileirado na emissão, usa o resultado da fila (aguardando a
+    geração, se ainda estiver pendente).
+
     Args:
         passagem_id: ID da passagem
         db: Sessão do banco de dados
@@ -306,45 +463,91 @@ def gerar_pdf_passagem(
             detail="Passagem não encontrada"
         )
 
-    # Carrega dados relacionados
-    cliente = db.query(Cliente).filter(Cliente.id == passagem.cliente_id).first()
-    local = db.query(LocalEmbarque).filter(LocalEmbarque.id == passagem.local_embarque_id).first()
-    cidade = db.query(Cidade).filter(Cidade.id == local.cidade_id).first()
-    atendente = db.query(Usuario).filter(Usuario.id == passagem.atendente_id).first()
-
-    # Gera o PDF
-    pdf_base64 = pdf_service.gerar_passagem_pdf(
-        numero=passagem.numero,
-        cliente_nome=cliente.nome,
-        cidade=cidade.nome,
-        local_embarque=local.nome,
-        endereco_embarque=passagem.endereco_embarque or "",
-        data_viagem=passagem.data_viagem.strftime("%d/%m/%Y"),
-        horario=passagem.horario.strftime("%H:%M"),
-        valor=passagem.valor,
-        forma_pagamento=passagem.forma_pagamento,
-        data_emissao=passagem.data_emissao,
-        atendente_nome=atendente.nome
-    )
-
-    # Decodifica base64 para bytes
-    pdf_bytes = base64.b64decode(pdf_base64)
+    # Campos impressos em uma única consulta
+    nomes = db.query(
+        Cliente.nome, Cidade.nome, LocalEmbarque.nome, Usuario.nome
+    ).select_from(Passagem).join(
+        Cliente, Cliente.id == Passagem.cliente_id
+    ).join(
+        LocalEmbarque, LocalEmbarque.id == Passagem.local_embarque_id
+    ).join(
+        Cidade, Cidade.id == LocalEmbarque.cidade_id
+    ).join(
+        Usuario, Usuario.id == Passagem.atendente_id
+    ).filter(Passagem.id == passagem.id).one()
+
+    dados_pdf = _dados_pdf(passagem, *nomes)
+    chave = pdf_cache_service.chave(dados_pdf)
+    nome_arquivo = f"passagem_{passagem.numero}.pdf"
+
+    # Reimpressão: serve o arquivo do cache direto do disco
+    caminho = pdf_cache_service.buscar(passagem.id, chave)
+    if caminho:
+        return FileResponse(caminho, media_type="application/pdf", filename=nome_arquivo)
+
+    # Usa o PDF da fila (emissão assíncrona) ou gera na hora
+    pdf_bytes = pdf_fila_service.obter(passagem.id)
+    if pdf_bytes is None:
+        pdf_bytes = pdf_service.gerar_passagem_pdf(**dados_pdf)
+
+    caminho = _gravar_pdf_cache(passagem.id, chave, pdf_bytes)
+    if caminho:
+        pdf_fila_service.descartar(passagem.id)
+        return FileResponse(caminho, media_type="application/pdf", filename=nome_arquivo)
 
     # Retorna como PDF
     return Response(
         content=pdf_bytes,
         media_type="application/pdf",
         headers={
-            "Content-Disposition": f"attachment; filename=passagem_{passagem.numero}.pdf"
+            "Content-Disposition": f"attachment; filename={nome_arquivo}"
         }
     )
 
 
+@router.get("/{passagem_id}/pdf/status", response_model=PassagemPDFStatus)
+def status_pdf_passagem(
+    passagem_id: int,
+    db: Session = Depends(get_db),
+    current_user: UsuarioAutenticado = Depends(get_current_user)
+):
+    """
+    Situação do PDF de uma passagem emitida com pdf_assincrono
+
+    Passagens fora da fila são PRONTO, pois o PDF é gerado na hora
+    do download.
+
+    Args:
+        passagem_id: ID da passagem
+        db: Sessão do banco de dados
+        current_user: Usuário autenticado
+
+    Returns:
+        Situação do PDF (PENDENTE, PRONTO ou ERRO) e endereço de download
+
+    Raises:
+        HTTPException 404: Se a passagem não for encontrada
+    """
+    existe = db.query(Passagem.id).filter(Passagem.id == passagem_id).first()
+
+    if not existe:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Passagem não encontrada"
+        )
+
+    return PassagemPDFStatus(
+        passagem_id=passagem_id,
+        pdf_status=pdf_fila_service.status(passagem_id) or PDF_PRONTO,
+        pdf_url=_url_pdf(passagem_id)
+    )
+
+
 @router.get("/dia/{data}", response_model=list[PassagemListItem])
 def listar_passagens_dia(
     data: date,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Lista todas as passagens de um dia específico
@@ -384,7 +587,7 @@ def cancelar_passagem(
     passagem_id: int,
     dados: PassagemCancelar,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Cancela uma passagem existente
@@ -437,18 +640,25 @@ def cancelar_passagem(
     passagem.motivo_alteracao = dados.motivo
     passagem.alterado_por_id = current_user.id
     
-    # Atualiza contadores da viagem (decrementa)
-    _atualizar_viagem_contadores(
+    # Devolve a vaga na viagem
+    viagem_service.liberar_vagas(
         db=db,
         data=passagem.data_viagem,
         horario=passagem.horario,
         motorista_id=passagem.motorista_id,
-        delta_passageiros=-1,
-        delta_valor=-float(passagem.valor)
+        quantidade=1,
+        valor=passagem.valor
     )
+
+    # Remove a passagem do resumo diário
+    resumo_service.registrar_passagem(db, passagem, _cidade_da_passagem(passagem), sinal=-1)
     
     db.commit()
     db.refresh(passagem)
+
+    # PDFs da fila e do cache ficaram desatualizados
+    pdf_fila_service.descartar(passagem.id)
+    pdf_cache_service.invalidar(passagem.id)
     
     return PassagemAlteradaResponse(
         id=passagem.id,
@@ -468,7 +678,7 @@ def transferir_passagem(
     passagem_id: int,
     dados: PassagemTransferir,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Transfere uma passagem para outra data/horário/motorista
@@ -510,7 +720,7 @@ def transferir_passagem(
         )
     
     # Valida novo motorista
-    novo_motorista = db.query(Motorista).filter(Motorista.id == dados.novo_motorista_id).first()
+    novo_motorista = catalogo_service.motorista(dados.novo_motorista_id)
     if not novo_motorista:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -523,14 +733,24 @@ def transferir_passagem(
         passagem.horario_original = passagem.horario
         passagem.motorista_original_id = passagem.motorista_id
     
-    # Decrementa contadores da viagem original
-    _atualizar_viagem_contadores(
+    # Retira a passagem do resumo diário da data/motorista originais
+    cidade_id = _cidade_da_passagem(passagem)
+    resumo_service.registrar_passagem(db, passagem, cidade_id, sinal=-1)
+
+    # Devolve a vaga na viagem original
+    viagem_service.liberar_vagas(
         db=db,
         data=passagem.data_viagem,
         horario=passagem.horario,
         motorista_id=passagem.motorista_id,
-        delta_passageiros=-1,
-        delta_valor=-float(passagem.valor)
+        quantidade=1,
+        valor=passagem.valor
+    )
+
+    # Ocupa a vaga na nova viagem (recusa a transferência se estiver lotada)
+    _reservar_vagas(
+        db, dados.nova_data, dados.novo_horario, dados.novo_motorista_id,
+        1, passagem.valor, current_user.id
     )
     
     # Atualiza passagem com novos dados
@@ -542,32 +762,15 @@ def transferir_passagem(
     passagem.motivo_alteracao = dados.motivo
     passagem.alterado_por_id = current_user.id
     
-    # Busca ou cria viagem para nova data/horário
-    viagem_nova = db.query(Viagem).filter(
-        Viagem.data == dados.nova_data,
-        Viagem.horario == dados.novo_horario,
-        Viagem.motorista_id == dados.novo_motorista_id
-    ).first()
-    
-    if viagem_nova:
-        # Incrementa contadores
-        viagem_nova.total_passageiros += 1
-        viagem_nova.valor_total += passagem.valor
-    else:
-        # Cria nova viagem
-        nova_viagem = Viagem(
-            data=dados.nova_data,
-            horario=dados.novo_horario,
-            motorista_id=dados.novo_motorista_id,
-            total_passageiros=1,
-            valor_total=passagem.valor,
-            atendente_id=current_user.id,
-            status="PENDENTE"
-        )
-        db.add(nova_viagem)
-    
+    # Inclui a passagem no resumo diário da nova data/motorista
+    resumo_service.registrar_passagem(db, passagem, cidade_id)
+
     db.commit()
     db.refresh(passagem)
+
+    # PDFs da fila e do cache ficaram desatualizados
+    pdf_fila_service.descartar(passagem.id)
+    pdf_cache_service.invalidar(passagem.id)
     
     return PassagemAlteradaResponse(
         id=passagem.id,
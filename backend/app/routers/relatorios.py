@@ -3,18 +3,18 @@ Router de Relatórios - Expresso Embuibe
 Gerencia endpoints de geração de relatórios
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import date, datetime
 from typing import Optional
 from ..database import get_db
-from ..models.usuario import Usuario
 from ..schemas.relatorio import (
     RelatorioDiario,
     RelatorioPeriodo,
     RelatorioMotorista
 )
 from ..services.relatorio_service import relatorio_service
-from ..utils.security import get_current_user
+from ..utils.security import get_current_user, UsuarioAutenticado
 
 router = APIRouter()
 
@@ -23,7 +23,7 @@ router = APIRouter()
 def relatorio_diario(
     data: Optional[date] = Query(None, description="Data do relatório (YYYY-MM-DD). Se não informada, usa hoje"),
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Gera relatório diário agrupado por horário
@@ -58,7 +58,7 @@ def relatorio_periodo(
     data_inicio: date = Query(..., description="Data inicial (YYYY-MM-DD)"),
     data_fim: date = Query(..., description="Data final (YYYY-MM-DD)"),
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Gera relatório por período
@@ -95,13 +95,57 @@ def relatorio_periodo(
         )
 
 
+@router.get("/periodo/exportar")
+def exportar_relatorio_periodo(
+    data_inicio: date = Query(..., description="Data inicial (YYYY-MM-DD)"),
+    data_fim: date = Query(..., description="Data final (YYYY-MM-DD)"),
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Formato: ndjson ou csv"),
+    current_user: UsuarioAutenticado = Depends(get_current_user)
+):
+    """
+    Exporta o relatório por período em streaming
+
+    Envia as passagens à medida que são lidas do banco, seguidas dos
+    resumos por motorista, por forma de pagamento e dos totais. O uso
+    de memória não depende do tamanho do período.
+
+    Args:
+        data_inicio: Data inicial do período
+        data_fim: Data final do período
+        formato: ndjson (uma linha JSON por registro) ou csv
+        current_user: Usuário autenticado
+
+    Returns:
+        Relatório do período em NDJSON ou CSV
+
+    Raises:
+        HTTPException 400: Se data_inicio > data_fim
+    """
+    # Valida datas
+    if data_inicio > data_fim:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Data inicial não pode ser maior que data final"
+        )
+
+    media_type = "text/csv" if formato == "csv" else "application/x-ndjson"
+
+    return StreamingResponse(
+        relatorio_service.exportar_relatorio_periodo(data_inicio, data_fim, formato),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename=relatorio_{data_inicio}_{data_fim}.{formato}"
+        }
+    )
+
+
 @router.get("/motorista/{motorista_id}", response_model=RelatorioMotorista)
 def relatorio_motorista(
     motorista_id: int,
     data_inicio: date = Query(..., description="Data inicial (YYYY-MM-DD)"),
     data_fim: date = Query(..., description="Data final (YYYY-MM-DD)"),
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Gera relatório por motorista
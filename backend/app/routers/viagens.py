@@ -5,18 +5,16 @@ Gerencia endpoints de registro de saídas de viagens
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
-from datetime import date, time
+from datetime import date, time, datetime
 from decimal import Decimal
 from typing import List
-from ..database import get_db
+from ..database import get_db, get_async_db, executar
 from ..models.viagem import Viagem
 from ..models.passagem import Passagem
-from ..models.cliente import Cliente
-from ..models.local_embarque import LocalEmbarque
-from ..models.motorista import Motorista
-from ..models.proprietario import Proprietario
-from ..models.usuario import Usuario
-from ..utils.security import get_current_user
+from ..services.manifesto_service import manifesto_service, LinhaManifesto
+from ..services.catalogo_service import catalogo_service
+from ..services.viagem_service import viagem_service
+from ..utils.security import get_current_user, get_current_admin_user, UsuarioAutenticado
 
 router = APIRouter()
 
@@ -54,11 +52,55 @@ class RegistrarSaidaResponse(BaseModel):
     passageiros: List[PassageiroManifesto]
 
 
+class DivergenciaViagemResponse(BaseModel):
+    """Schema de viagem com contadores diferentes das passagens"""
+    data: date
+    horario: time
+    motorista_id: int
+    situacao: str
+    registrado_passageiros: int
+    calculado_passageiros: int
+    registrado_valor: Decimal
+    calculado_valor: Decimal
+
+
+class ConciliacaoResponse(BaseModel):
+    """Schema de resposta da conciliação das viagens"""
+    viagens_no_periodo: int
+    divergentes: int
+    sem_viagem: int
+    diferenca_passageiros: int
+    diferenca_valor: Decimal
+    corrigidas: int
+    exemplos: List[DivergenciaViagemResponse]
+
+
+def _passageiro_manifesto(linha: LinhaManifesto) -> PassageiroManifesto:
+    """Converte uma linha do manifesto no schema de resposta"""
+    return PassageiroManifesto(
+        numero_passagem=linha.numero_passagem,
+        nome=linha.cliente_nome,
+        local_embarque=linha.local_embarque,
+        cidade=linha.cidade,
+        valor=linha.valor
+    )
+
+
+def _marcar_utilizadas(db: Session, passageiros: List[LinhaManifesto]):
+    """Marca as passagens do manifesto como UTILIZADA em um único UPDATE"""
+    if not passageiros:
+        return
+
+    db.query(Passagem).filter(
+        Passagem.id.in_([p.passagem_id for p in passageiros])
+    ).update({"status": "UTILIZADA"}, synchronize_session=False)
+
+
 @router.post("/buscar-manifesto", response_model=dict)
-def buscar_manifesto(
+async def buscar_manifesto(
     dados: RegistrarSaidaRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db=Depends(get_async_db),
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Busca o manifesto de passageiros ANTES de confirmar a saída
@@ -76,63 +118,45 @@ def buscar_manifesto(
     Raises:
         HTTPException 404: Se motorista não for encontrado
     """
-    # Busca o motorista
-    motorista = db.query(Motorista).filter(Motorista.id == dados.motorista_id).first()
+    return await executar(db, _montar_manifesto, dados)
+
+
+def _montar_manifesto(db: Session, dados: RegistrarSaidaRequest) -> dict:
+    """Consultas do manifesto de uma viagem ainda não registrada (ver buscar_manifesto)"""
+    # Busca o motorista (já com o proprietário)
+    motorista = manifesto_service.buscar_motorista(db, dados.motorista_id)
     if not motorista:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Motorista não encontrado"
         )
 
-    # Busca o proprietário do motorista
-    from ..models.proprietario import Proprietario
-    proprietario = db.query(Proprietario).filter(
-        Proprietario.id == motorista.proprietario_id
-    ).first()
-
-    # Busca todas as passagens EMITIDAS para esta viagem
-    passagens = db.query(Passagem).filter(
-        Passagem.data_viagem == dados.data,
-        Passagem.horario == dados.horario,
-        Passagem.motorista_id == dados.motorista_id,
-        Passagem.status == "EMITIDA"
-    ).all()
+    # Busca todos os passageiros EMITIDOS para esta viagem (ordenados por nome)
+    passageiros = manifesto_service.buscar_passageiros(
+        db, dados.data, dados.horario, dados.motorista_id, status=["EMITIDA"]
+    )
 
     # Monta lista de passageiros para o manifesto
-    passageiros_manifesto = []
-    valor_total = Decimal(0)
-
-    for passagem in passagens:
-        cliente = db.query(Cliente).filter(Cliente.id == passagem.cliente_id).first()
-        local = db.query(LocalEmbarque).filter(
-            LocalEmbarque.id == passagem.local_embarque_id
-        ).first()
-
-        # Busca a cidade do local
-        from ..models.cidade import Cidade
-        cidade = db.query(Cidade).filter(Cidade.id == local.cidade_id).first()
-
-        passageiros_manifesto.append({
-            "numero_passagem": passagem.numero,
-            "nome": cliente.nome if cliente else "Desconhecido",
-            "cliente_nome": cliente.nome if cliente else "Desconhecido",
-            "cliente_telefone": cliente.telefone if cliente and cliente.telefone else "N/A",
-            "local_embarque": local.nome if local else "N/A",
-            "cidade": cidade.nome if cidade else "N/A",
-            "valor": float(passagem.valor) if passagem.valor else 0.0,
-            "forma_pagamento": passagem.forma_pagamento or "N/A"
-        })
-
-        valor_total += passagem.valor or 0
-
-    # Ordena passageiros por nome
-    passageiros_manifesto.sort(key=lambda p: p["cliente_nome"])
+    passageiros_manifesto = [
+        {
+            "numero_passagem": p.numero_passagem,
+            "nome": p.cliente_nome,
+            "cliente_nome": p.cliente_nome,
+            "cliente_telefone": p.cliente_telefone,
+            "local_embarque": p.local_embarque,
+            "cidade": p.cidade,
+            "valor": float(p.valor),
+            "forma_pagamento": p.forma_pagamento
+        }
+        for p in passageiros
+    ]
+    valor_total = sum((p.valor for p in passageiros), Decimal(0))
 
     return {
         "total_passageiros": len(passageiros_manifesto),
         "valor_total": float(valor_total),
         "motorista_nome": motorista.nome,
-        "proprietario_nome": proprietario.nome if proprietario else "N/A",
+        "proprietario_nome": motorista.proprietario.nome if motorista.proprietario else "N/A",
         "passageiros": passageiros_manifesto
     }
 
@@ -141,7 +165,7 @@ def buscar_manifesto(
 def registrar_saida(
     dados: RegistrarSaidaRequest,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Registra a saída de uma viagem
@@ -161,36 +185,28 @@ def registrar_saida(
         HTTPException 404: Se motorista não for encontrado
         HTTPException 400: Se não houver passagens para a viagem
     """
-    # Busca o motorista
-    motorista = db.query(Motorista).filter(Motorista.id == dados.motorista_id).first()
+    # Busca o motorista (já com o proprietário)
+    motorista = manifesto_service.buscar_motorista(db, dados.motorista_id)
     if not motorista:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Motorista não encontrado"
         )
 
-    # Busca o proprietário
-    proprietario = db.query(Proprietario).filter(
-        Proprietario.id == motorista.proprietario_id
-    ).first()
-
-    # Busca todas as passagens da viagem
-    passagens = db.query(Passagem).filter(
-        Passagem.data_viagem == dados.data,
-        Passagem.horario == dados.horario,
-        Passagem.motorista_id == dados.motorista_id,
-        Passagem.status == "EMITIDA"
-    ).all()
+    # Busca todos os passageiros da viagem
+    passageiros = manifesto_service.buscar_passageiros(
+        db, dados.data, dados.horario, dados.motorista_id, status=["EMITIDA"]
+    )
 
-    if not passagens:
+    if not passageiros:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Não há passagens emitidas para {motorista.nome} no dia {dados.data} às {dados.horario}"
         )
 
     # Calcula totais
-    total_passageiros = len(passagens)
-    valor_total = sum(p.valor for p in passagens)
+    total_passageiros = len(passageiros)
+    valor_total = sum(p.valor for p in passageiros)
 
     # Verifica se já existe registro para esta viagem
     viagem_existente = db.query(Viagem).filter(
@@ -216,36 +232,12 @@ def registrar_saida(
     )
 
     db.add(viagem)
-    db.commit()
-    db.refresh(viagem)
 
     # Atualiza status das passagens para UTILIZADA
-    for passagem in passagens:
-        passagem.status = "UTILIZADA"
-    db.commit()
-
-    # Monta lista de passageiros para o manifesto
-    passageiros_manifesto = []
-    for passagem in passagens:
-        cliente = db.query(Cliente).filter(Cliente.id == passagem.cliente_id).first()
-        local = db.query(LocalEmbarque).filter(
-            LocalEmbarque.id == passagem.local_embarque_id
-        ).first()
-
-        # Busca a cidade do local
-        from ..models.cidade import Cidade
-        cidade = db.query(Cidade).filter(Cidade.id == local.cidade_id).first()
-
-        passageiros_manifesto.append(PassageiroManifesto(
-            numero_passagem=passagem.numero,
-            nome=cliente.nome,
-            local_embarque=local.nome,
-            cidade=cidade.nome,
-            valor=passagem.valor
-        ))
+    _marcar_utilizadas(db, passageiros)
 
-    # Ordena passageiros por nome
-    passageiros_manifesto.sort(key=lambda p: p.nome)
+    db.commit()
+    db.refresh(viagem)
 
     return RegistrarSaidaResponse(
         viagem=ViagemRegistrada(
@@ -253,11 +245,11 @@ def registrar_saida(
             data=viagem.data,
             horario=viagem.horario,
             motorista_nome=motorista.nome,
-            proprietario_nome=proprietario.nome,
+            proprietario_nome=motorista.proprietario.nome,
             total_passageiros=viagem.total_passageiros,
             valor_total=viagem.valor_total
         ),
-        passageiros=passageiros_manifesto
+        passageiros=[_passageiro_manifesto(p) for p in passageiros]
     )
 
 
@@ -267,7 +259,7 @@ def listar_viagens(
     data_fim: date = None,
     motorista_id: int = None,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Lista viagens registradas com filtros opcionais
@@ -297,10 +289,8 @@ def listar_viagens(
     # Monta lista de resposta
     resultado = []
     for viagem in viagens:
-        motorista = db.query(Motorista).filter(Motorista.id == viagem.motorista_id).first()
-        proprietario = db.query(Proprietario).filter(
-            Proprietario.id == motorista.proprietario_id
-        ).first()
+        motorista = catalogo_service.motorista(viagem.motorista_id)
+        proprietario = catalogo_service.proprietario(motorista.proprietario_id)
 
         resultado.append(ViagemRegistrada(
             id=viagem.id,
@@ -315,11 +305,56 @@ def listar_viagens(
     return resultado
 
 
+@router.post("/conciliar", response_model=ConciliacaoResponse)
+def conciliar_viagens(
+    data_inicio: date = None,
+    data_fim: date = None,
+    simular: bool = False,
+    db: Session = Depends(get_db),
+    current_user: UsuarioAutenticado = Depends(get_current_admin_user)
+):
+    """
+    Confere os contadores das viagens com as passagens e corrige as divergências
+
+    Recalcula passageiros e valor de todas as viagens do período com um
+    único INSERT ... SELECT ... GROUP BY (ver viagem_service.conciliar).
+    Apenas administradores.
+
+    Args:
+        data_inicio: Data inicial (opcional, padrão: todo o histórico)
+        data_fim: Data final (opcional)
+        simular: Só confere e lista as divergências, sem gravar
+        db: Sessão do banco de dados
+        current_user: Usuário admin autenticado
+
+    Returns:
+        Quantidade de divergências, diferença total, viagens corrigidas
+        e as primeiras divergências
+
+    Raises:
+        HTTPException 400: Se data_inicio > data_fim
+    """
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Data inicial não pode ser maior que data final"
+        )
+
+    resultado = viagem_service.conciliar(db, data_inicio, data_fim, corrigir=not simular)
+    db.commit()
+
+    return ConciliacaoResponse(
+        **resultado._replace(
+            exemplos=[DivergenciaViagemResponse(**d._asdict()) for d in resultado.exemplos]
+        )._asdict()
+    )
+
+
 @router.get("/{viagem_id}/manifesto", response_model=List[PassageiroManifesto])
 def obter_manifesto(
     viagem_id: int,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Obtém o manifesto de passageiros de uma viagem registrada
@@ -343,43 +378,19 @@ def obter_manifesto(
             detail="Viagem não encontrada"
         )
 
-    # Busca as passagens da viagem
-    passagens = db.query(Passagem).filter(
-        Passagem.data_viagem == viagem.data,
-        Passagem.horario == viagem.horario,
-        Passagem.motorista_id == viagem.motorista_id
-    ).all()
-
-    # Monta lista de passageiros
-    passageiros_manifesto = []
-    for passagem in passagens:
-        cliente = db.query(Cliente).filter(Cliente.id == passagem.cliente_id).first()
-        local = db.query(LocalEmbarque).filter(
-            LocalEmbarque.id == passagem.local_embarque_id
-        ).first()
-
-        from ..models.cidade import Cidade
-        cidade = db.query(Cidade).filter(Cidade.id == local.cidade_id).first()
-
-        passageiros_manifesto.append(PassageiroManifesto(
-            numero_passagem=passagem.numero,
-            nome=cliente.nome,
-            local_embarque=local.nome,
-            cidade=cidade.nome,
-            valor=passagem.valor
-        ))
-
-    # Ordena passageiros por nome
-    passageiros_manifesto.sort(key=lambda p: p.nome)
+    # Busca os passageiros da viagem (ordenados por nome)
+    passageiros = manifesto_service.buscar_passageiros(
+        db, viagem.data, viagem.horario, viagem.motorista_id
+    )
 
-    return passageiros_manifesto
+    return [_passageiro_manifesto(p) for p in passageiros]
 
 
 @router.post("/confirmar-saida")
 def confirmar_saida(
     dados: RegistrarSaidaRequest,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UsuarioAutenticado = Depends(get_current_user)
 ):
     """
     Confirma a saída de uma viagem
@@ -399,9 +410,7 @@ def confirmar_saida(
         HTTPException 404: Se viagem não for encontrada
         HTTPException 400: Se viagem já foi confirmada
     """
-    from datetime import datetime
     from ..services.pdf_service import pdf_service
-    from ..models.cidade import Cidade
 
     # Busca a viagem
     viagem = db.query(Viagem).filter(
@@ -426,38 +435,30 @@ def confirmar_saida(
     viagem.status = "SAIU"
     viagem.data_saida = datetime.now()
 
-    # Buscar e atualizar status das passagens para UTILIZADA
-    passagens = db.query(Passagem).filter(
-        Passagem.data_viagem == dados.data,
-        Passagem.horario == dados.horario,
-        Passagem.motorista_id == dados.motorista_id,
-        Passagem.status == "EMITIDA"
-    ).all()
+    # Buscar passageiros e atualizar status das passagens para UTILIZADA
+    passageiros = manifesto_service.buscar_passageiros(
+        db, dados.data, dados.horario, dados.motorista_id, status=["EMITIDA"]
+    )
+    _marcar_utilizadas(db, passageiros)
 
     # Preparar lista de passageiros para o manifesto
-    passageiros_lista = []
-    for passagem in passagens:
-        passagem.status = "UTILIZADA"
-        cliente = db.query(Cliente).filter(Cliente.id == passagem.cliente_id).first()
-        local = db.query(LocalEmbarque).filter(LocalEmbarque.id == passagem.local_embarque_id).first()
-        cidade = db.query(Cidade).filter(Cidade.id == local.cidade_id).first() if local else None
-
-        passageiros_lista.append({
-            "numero_passagem": passagem.numero,
-            "cliente_nome": cliente.nome if cliente else "N/A",
-            "cidade": cidade.nome if cidade else "N/A",
-            "local_embarque": local.nome if local else "N/A",
-            "valor": float(passagem.valor) if passagem.valor else 0
-        })
+    passageiros_lista = [
+        {
+            "numero_passagem": p.numero_passagem,
+            "cliente_nome": p.cliente_nome,
+            "cidade": p.cidade,
+            "local_embarque": p.local_embarque,
+            "valor": float(p.valor)
+        }
+        for p in passageiros
+    ]
 
     db.commit()
     db.refresh(viagem)
 
     # Buscar motorista e proprietário para retorno
-    motorista = db.query(Motorista).filter(Motorista.id == viagem.motorista_id).first()
-    proprietario = db.query(Proprietario).filter(
-        Proprietario.id == motorista.proprietario_id
-    ).first()
+    motorista = manifesto_service.buscar_motorista(db, viagem.motorista_id)
+    proprietario = motorista.proprietario
 
     # Gerar PDF do manifesto
     pdf_base64 = pdf_service.gerar_manifesto_viagem_pdf(
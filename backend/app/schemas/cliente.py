@@ -63,10 +63,20 @@ class ClienteListItem(BaseModel):
         from_attributes = True
 
 
+class ClienteSugestao(BaseModel):
+    """Schema de sugestão do autocomplete de clientes"""
+    id: int
+    nome: str
+    telefone: str
+    cidade: str
+    bairro: Optional[str] = None
+
+
 class ClientePaginatedResponse(BaseModel):
     """Schema para resposta paginada de clientes"""
     items: list[ClienteListItem]
-    total: int
+    total: Optional[int] = None  # None quando a listagem é pedida com contar=false
     page: int
     limit: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Passe em ?cursor= para a próxima página
@@ -3,7 +3,7 @@ Schemas Pydantic de Passagens - Expresso Embuibe
 Define os schemas de validação para passagens
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, date, time
 from decimal import Decimal
 
@@ -78,7 +78,39 @@ class PassagemDetalhada(BaseModel):
 class PassagemEmitidaResponse(BaseModel):
     """Schema de resposta após emissão de passagem"""
     passagem: PassagemResponse
-    pdf_base64: str = Field(..., description="PDF da passagem em base64")
+    pdf_base64: Optional[str] = Field(None, description="PDF da passagem em base64 (vazio se gerado em segundo plano)")
+    pdf_status: str = Field("PRONTO", description="Situação do PDF: PRONTO, PENDENTE ou ERRO")
+    pdf_url: str = Field(..., description="Endereço para baixar o PDF")
+
+
+class PassagemPDFStatus(BaseModel):
+    """Schema de situação do PDF de uma passagem"""
+    passagem_id: int
+    pdf_status: str = Field(..., description="PRONTO, PENDENTE ou ERRO")
+    pdf_url: str
+
+
+class PassageiroLote(BaseModel):
+    """Passageiro de uma emissão em lote"""
+    cliente_id: int = Field(..., description="ID do cliente/passageiro")
+    endereco_embarque: Optional[str] = Field(None, description="Endereço onde a van vai buscar o passageiro")
+
+
+class PassagemLoteCreate(BaseModel):
+    """Schema para emissão de várias passagens na mesma viagem (grupo/família)"""
+    local_embarque_id: int = Field(..., description="ID do local de embarque")
+    motorista_id: int = Field(..., description="ID do motorista")
+    horario: time = Field(..., description="Horário da viagem (HH:MM)")
+    data_viagem: date = Field(..., description="Data da viagem (YYYY-MM-DD)")
+    forma_pagamento: str = Field(..., description="Forma de pagamento: DINHEIRO, CARTAO ou PIX")
+    passageiros: List[PassageiroLote] = Field(..., min_length=1, max_length=50, description="Passageiros do grupo")
+
+
+class PassagemLoteEmitidaResponse(BaseModel):
+    """Schema de resposta após emissão em lote"""
+    passagens: List[PassagemResponse]
+    valor_total: Decimal
+    pdf_base64: str = Field(..., description="PDF com uma página por passagem, em base64")
 
 
 class PassagemListItem(BaseModel):
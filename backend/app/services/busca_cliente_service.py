@@ -0,0 +1,233 @@
+"""
+Serviço de Busca de Clientes - Expresso Embuibe
+Busca indexada por nome (sem acentos) e telefone (só dígitos)
+"""
+from sqlalchemy import bindparam, false, inspect, literal_column, or_, select, table, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query
+from ..database import engine
+from ..models.cliente import Cliente
+from ..utils.texto import normalizar_busca, somente_digitos
+
+# Termos menores que isso não formam trigrama: "contém" sem índice
+TAMANHO_MINIMO_TRIGRAMA = 3
+
+# Tabela FTS5 (SQLite) espelhando as colunas de busca de clientes
+TABELA_FTS = "clientes_busca"
+
+# Clientes atualizados por vez ao preencher as colunas de busca
+TAMANHO_LOTE_PREENCHIMENTO = 1000
+
+# Índices trigrama no PostgreSQL (nome do índice, coluna)
+INDICES_TRIGRAMA = [
+    ("ix_clientes_nome_busca_trgm", "nome_busca"),
+    ("ix_clientes_telefone_digitos_trgm", "telefone_digitos"),
+]
+
+# Mantém a tabela FTS5 sincronizada com clientes (tabela de conteúdo externo)
+GATILHOS_FTS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON clientes BEGIN
+        INSERT INTO {TABELA_FTS}(rowid, nome_busca, telefone_digitos)
+        VALUES (new.id, new.nome_busca, new.telefone_digitos);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON clientes BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, nome_busca, telefone_digitos)
+        VALUES ('delete', old.id, old.nome_busca, old.telefone_digitos);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au AFTER UPDATE OF nome_busca, telefone_digitos ON clientes BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, nome_busca, telefone_digitos)
+        VALUES ('delete', old.id, old.nome_busca, old.telefone_digitos);
+        INSERT INTO {TABELA_FTS}(rowid, nome_busca, telefone_digitos)
+        VALUES (new.id, new.nome_busca, new.telefone_digitos);
+    END
+    """,
+]
+
+
+class BuscaClienteService:
+    """
+    Busca de clientes por nome ou telefone usando índices
+
+    O nome é guardado normalizado (sem acentos, minúsculo) em
+    clientes.nome_busca e o telefone só com dígitos em
+    clientes.telefone_digitos. A busca por "contém" usa índices trigrama:
+    pg_trgm (GIN) no PostgreSQL e FTS5 com tokenizer trigram no SQLite.
+    Termos com menos de 3 caracteres não formam trigrama e usam LIKE
+    '%termo%' sem índice, com a mesma semântica de "contém"; na listagem,
+    ordenada por nome com LIMIT, a varredura para ao completar a página.
+    """
+
+    def __init__(self, bind: Engine = None):
+        self.bind = bind or engine
+        self.indice_trigrama = False
+
+    def preparar(self):
+        """
+        Cria/atualiza as estruturas de busca (idempotente)
+
+        Adiciona as colunas de busca em bancos antigos, preenche as que
+        estão vazias e cria os índices do banco em uso (inclusive o de
+        nome/id da listagem por cursor e o de updated_at, usado pelas
+        sugestões para ler alterações). Se o banco não
+        suportar índice trigrama, a busca continua funcionando sem ele.
+        """
+        with self.bind.begin() as conn:
+            colunas = {c["name"] for c in inspect(conn).get_columns("clientes")}
+            for coluna, tamanho in (("nome_busca", 200), ("telefone_digitos", 20)):
+                if coluna not in colunas:
+                    conn.execute(text(f"ALTER TABLE clientes ADD COLUMN {coluna} VARCHAR({tamanho})"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_clientes_nome_busca ON clientes (nome_busca)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_clientes_telefone_digitos ON clientes (telefone_digitos)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_clientes_nome_id ON clientes (nome, id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_clientes_updated_at ON clientes (updated_at)"))
+
+        self.preencher_colunas()
+
+        if self.bind.dialect.name == "postgresql":
+            self.indice_trigrama = self._criar_indices_pg_trgm()
+        elif self.bind.dialect.name == "sqlite":
+            self.indice_trigrama = self._criar_fts5()
+
+    def preencher_colunas(self) -> int:
+        """
+        Preenche nome_busca/telefone_digitos dos clientes que não os têm
+
+        Clientes gravados pelo ORM já saem preenchidos; isto cobre bancos
+        antigos e inserções feitas por SQL direto.
+
+        Returns:
+            Quantidade de clientes atualizados
+        """
+        atualizacao = (
+            update(Cliente)
+            .where(Cliente.id == bindparam("b_id"))
+            .values(nome_busca=bindparam("b_nome"), telefone_digitos=bindparam("b_telefone"))
+        )
+
+        total = 0
+        while True:
+            with self.bind.begin() as conn:
+                linhas = conn.execute(
+                    select(Cliente.id, Cliente.nome, Cliente.telefone)
+                    .where(or_(Cliente.nome_busca.is_(None), Cliente.telefone_digitos.is_(None)))
+                    .limit(TAMANHO_LOTE_PREENCHIMENTO)
+                ).all()
+                if not linhas:
+                    return total
+
+                conn.execute(
+                    atualizacao.execution_options(synchronize_session=False),
+                    [
+                        {
+                            "b_id": id_,
+                            "b_nome": normalizar_busca(nome),
+                            "b_telefone": somente_digitos(telefone),
+                        }
+                        for id_, nome, telefone in linhas
+                    ]
+                )
+                total += len(linhas)
+
+    def filtrar(self, query: Query, termo: str) -> Query:
+        """
+        Aplica o filtro de busca por nome ou telefone à consulta de clientes
+
+        Args:
+            query: Consulta sobre Cliente
+            termo: Texto digitado (nome, parte do nome ou telefone)
+
+        Returns:
+            Consulta filtrada (sem resultados se o termo for vazio após normalizar)
+        """
+        nome = normalizar_busca(termo)
+        digitos = somente_digitos(termo)
+
+        if self.indice_trigrama and self.bind.dialect.name == "sqlite":
+            condicoes = self._condicoes_fts5(nome, digitos)
+        else:
+            condicoes = []
+            if nome:
+                condicoes.append(self._contem(Cliente.nome_busca, nome))
+            if digitos:
+                condicoes.append(self._contem(Cliente.telefone_digitos, digitos))
+
+        if not condicoes:
+            return query.filter(false())
+        return query.filter(or_(*condicoes))
+
+    def _contem(self, coluna, valor: str):
+        """"Contém" (LIKE '%valor%'; usa o índice trigrama a partir de 3 caracteres)"""
+        return coluna.contains(valor, autoescape=True)
+
+    def _condicoes_fts5(self, nome: str, digitos: str) -> list:
+        """Condições de busca usando a tabela FTS5 (SQLite)"""
+        termos_fts = []
+        condicoes = []
+
+        for coluna, valor in (("nome_busca", nome), ("telefone_digitos", digitos)):
+            if not valor:
+                continue
+            if len(valor) >= TAMANHO_MINIMO_TRIGRAMA:
+                frase = valor.replace('"', '""')
+                termos_fts.append(f'{coluna} : "{frase}"')
+            else:
+                condicoes.append(self._contem(getattr(Cliente, coluna), valor))
+
+        if termos_fts:
+            condicoes.append(Cliente.id.in_(
+                select(literal_column("rowid"))
+                .select_from(table(TABELA_FTS))
+                .where(text(f"{TABELA_FTS} MATCH :expressao_fts").bindparams(
+                    expressao_fts=" OR ".join(termos_fts)
+                ))
+            ))
+
+        return condicoes
+
+    def _criar_indices_pg_trgm(self) -> bool:
+        """Cria a extensão pg_trgm e os índices GIN (PostgreSQL)"""
+        try:
+            with self.bind.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                for nome_indice, coluna in INDICES_TRIGRAMA:
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS {nome_indice} "
+                        f"ON clientes USING gin ({coluna} gin_trgm_ops)"
+                    ))
+            return True
+        except Exception as e:
+            print(f"Aviso: índices pg_trgm indisponíveis, busca de clientes sem índice trigrama: {e}")
+            return False
+
+    def _criar_fts5(self) -> bool:
+        """Cria a tabela FTS5 com tokenizer trigram e seus gatilhos (SQLite)"""
+        try:
+            with self.bind.begin() as conn:
+                existia = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"),
+                    {"nome": TABELA_FTS}
+                ).scalar()
+
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5("
+                    "nome_busca, telefone_digitos, "
+                    "content='clientes', content_rowid='id', tokenize='trigram')"
+                ))
+                for gatilho in GATILHOS_FTS:
+                    conn.execute(text(gatilho))
+
+                if not existia:
+                    conn.execute(text(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')"))
+            return True
+        except Exception as e:
+            print(f"Aviso: FTS5 indisponível, busca de clientes sem índice trigrama: {e}")
+            return False
+
+
+# Instância global do serviço
+busca_cliente_service = BuscaClienteService()
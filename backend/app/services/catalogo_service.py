@@ -0,0 +1,290 @@
+"""
+Serviço de Catálogo - Expresso Embuibe
+Mantém em memória os dados de referência (cidades, locais de embarque,
+motoristas e proprietários), que mudam poucas vezes por ano
+"""
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import engine, SessionLocal
+from ..models.cidade import Cidade
+from ..models.contador import Contador
+from ..models.local_embarque import LocalEmbarque
+from ..models.motorista import Motorista
+from ..models.proprietario import Proprietario
+
+# Contador (tabela contadores) com a versão atual do catálogo
+CONTADOR_CATALOGO = "catalogo_versao"
+
+# Models cujas alterações invalidam o catálogo
+MODELS_CATALOGO = (Cidade, LocalEmbarque, Motorista, Proprietario)
+
+
+class CidadeCatalogo(NamedTuple):
+    id: int
+    nome: str
+    ordem: int
+
+
+class LocalCatalogo(NamedTuple):
+    id: int
+    cidade_id: int
+    nome: str
+    valor: Decimal
+    ativo: bool
+
+
+class ProprietarioCatalogo(NamedTuple):
+    id: int
+    nome: str
+    ativo: bool
+
+
+class MotoristaCatalogo(NamedTuple):
+    id: int
+    nome: str
+    proprietario_id: int
+    vagas: int
+    ativo: bool
+
+
+class Catalogo:
+    """
+    Foto imutável dos dados de referência em uma versão
+
+    Nunca é alterada depois de montada: uma nova versão substitui a
+    foto inteira, então leitores em outras threads não precisam de lock.
+    """
+
+    def __init__(
+        self,
+        versao: int,
+        cidades: List[CidadeCatalogo],
+        locais: List[LocalCatalogo],
+        proprietarios: List[ProprietarioCatalogo],
+        motoristas: List[MotoristaCatalogo]
+    ):
+        self.versao = versao
+        self.cidades: Dict[int, CidadeCatalogo] = {c.id: c for c in cidades}
+        self.locais: Dict[int, LocalCatalogo] = {l.id: l for l in locais}
+        self.proprietarios: Dict[int, ProprietarioCatalogo] = {p.id: p for p in proprietarios}
+        self.motoristas: Dict[int, MotoristaCatalogo] = {m.id: m for m in motoristas}
+
+        # Listas já ordenadas como as telas exibem
+        self.cidades_ordenadas = sorted(cidades, key=lambda c: (c.ordem, c.id))
+        self.motoristas_ordenados = sorted(motoristas, key=lambda m: (m.nome, m.id))
+        self.locais_ativos_por_cidade: Dict[int, List[LocalCatalogo]] = {}
+        for local in sorted(locais, key=lambda l: (l.nome, l.id)):
+            if local.ativo:
+                self.locais_ativos_por_cidade.setdefault(local.cidade_id, []).append(local)
+
+
+class CatalogoService:
+    """
+    Catálogo de dados de referência em memória, versionado
+
+    A versão fica na tabela contadores e é incrementada na mesma
+    transação de qualquer alteração em Cidade, LocalEmbarque, Motorista
+    ou Proprietario feita pelo ORM (evento before_flush). O processo que
+    alterou recarrega após o commit; os demais conferem a versão no banco
+    no máximo a cada CATALOGO_VERIFICACAO_SEGUNDOS. Um ID não encontrado
+    antecipa a conferência, no máximo uma vez a cada
+    CATALOGO_VERIFICACAO_FALTA_SEGUNDOS: IDs inválidos repetidos não
+    viram uma consulta por requisição.
+
+    Só a primeira carga (feita no startup) lê o banco na chamada; as
+    conferências e recargas rodam em uma thread de fundo e as consultas
+    seguem com a foto atual. Assim as buscas podem ser feitas dentro de
+    run_sync (DATABASE_ASYNC) sem parar o event loop. O lock protege só
+    a troca da foto e o controle da thread, nunca uma consulta.
+    """
+
+    def __init__(self, bind: Engine = None, intervalo_verificacao: float = None, intervalo_falta: float = None):
+        self.bind = bind or engine
+        self.intervalo_verificacao = (
+            settings.CATALOGO_VERIFICACAO_SEGUNDOS
+            if intervalo_verificacao is None else intervalo_verificacao
+        )
+        self.intervalo_falta = (
+            settings.CATALOGO_VERIFICACAO_FALTA_SEGUNDOS
+            if intervalo_falta is None else intervalo_falta
+        )
+        self._lock = threading.Lock()
+        self._catalogo: Optional[Catalogo] = None
+        self._verificado_em = 0.0
+        self._falta_verificada_em = 0.0
+        self._atualizando = False
+        self._repetir = False
+
+    def obter(self) -> Catalogo:
+        """
+        Retorna o catálogo atual
+
+        Só consulta o banco na chamada se o catálogo nunca foi carregado;
+        com o intervalo de verificação vencido, agenda a conferência em
+        segundo plano e devolve a foto atual.
+
+        Returns:
+            Foto imutável dos dados de referência
+        """
+        catalogo = self._catalogo
+        if catalogo is None:
+            return self._verificar()
+
+        if time.monotonic() - self._verificado_em >= self.intervalo_verificacao:
+            self._agendar_verificacao()
+        return catalogo
+
+    def cidade(self, cidade_id: int) -> Optional[CidadeCatalogo]:
+        """Cidade por ID (None se não existir)"""
+        return self._buscar("cidades", cidade_id)
+
+    def local(self, local_id: int) -> Optional[LocalCatalogo]:
+        """Local de embarque por ID (None se não existir)"""
+        return self._buscar("locais", local_id)
+
+    def motorista(self, motorista_id: int) -> Optional[MotoristaCatalogo]:
+        """Motorista por ID (None se não existir)"""
+        return self._buscar("motoristas", motorista_id)
+
+    def proprietario(self, proprietario_id: int) -> Optional[ProprietarioCatalogo]:
+        """Proprietário por ID (None se não existir)"""
+        return self._buscar("proprietarios", proprietario_id)
+
+    def invalidar(self):
+        """Recarrega em segundo plano o catálogo alterado por este processo"""
+        self._agendar_verificacao()
+
+    def _buscar(self, tabela: str, item_id: int):
+        """
+        Busca por ID na foto atual
+
+        Se não achar, agenda a conferência da versão (com intervalo
+        mínimo): um ID cadastrado há pouco por outro processo aparece
+        assim que a recarga termina.
+        """
+        item = getattr(self.obter(), tabela).get(item_id)
+        if item is None and time.monotonic() - self._falta_verificada_em >= self.intervalo_falta:
+            self._falta_verificada_em = time.monotonic()
+            self._agendar_verificacao()
+        return item
+
+    def _agendar_verificacao(self):
+        """Dispara a conferência em segundo plano (ou pede outra rodada à que já está rodando)"""
+        with self._lock:
+            if self._atualizando:
+                # A rodada em andamento pode ter lido a versão antes do pedido
+                self._repetir = True
+                return
+            self._atualizando = True
+        threading.Thread(target=self._verificar_em_segundo_plano, name="catalogo", daemon=True).start()
+
+    def _verificar_em_segundo_plano(self):
+        repetir = True
+        while repetir:
+            try:
+                self._verificar()
+            except Exception as e:
+                print(f"Aviso: falha ao atualizar o catálogo: {e}")
+                with self._lock:
+                    # Tenta de novo só no próximo intervalo
+                    self._verificado_em = time.monotonic()
+            with self._lock:
+                repetir, self._repetir = self._repetir, False
+                if not repetir:
+                    self._atualizando = False
+
+    def _verificar(self) -> Catalogo:
+        """Confere a versão no banco e recarrega se mudou (consultas fora do lock)"""
+        catalogo = self._catalogo
+        if catalogo is None or self._versao_banco() != catalogo.versao:
+            catalogo = self._carregar()
+
+        with self._lock:
+            if self._catalogo is None or catalogo.versao >= self._catalogo.versao:
+                self._catalogo = catalogo
+            self._verificado_em = time.monotonic()
+            return self._catalogo
+
+    def _versao_banco(self) -> int:
+        """Versão do catálogo gravada no banco (0 se nunca foi alterado)"""
+        with self.bind.connect() as conn:
+            versao = conn.execute(
+                select(Contador.valor).where(Contador.nome == CONTADOR_CATALOGO)
+            ).scalar()
+        return versao or 0
+
+    def _carregar(self) -> Catalogo:
+        """Lê as quatro tabelas de referência (uma consulta cada)"""
+        db = SessionLocal(bind=self.bind)
+        try:
+            versao = db.execute(
+                select(Contador.valor).where(Contador.nome == CONTADOR_CATALOGO)
+            ).scalar() or 0
+
+            return Catalogo(
+                versao=versao,
+                cidades=[
+                    CidadeCatalogo(*row)
+                    for row in db.execute(select(Cidade.id, Cidade.nome, Cidade.ordem))
+                ],
+                locais=[
+                    LocalCatalogo(*row)
+                    for row in db.execute(select(
+                        LocalEmbarque.id, LocalEmbarque.cidade_id, LocalEmbarque.nome,
+                        LocalEmbarque.valor, LocalEmbarque.ativo
+                    ))
+                ],
+                proprietarios=[
+                    ProprietarioCatalogo(*row)
+                    for row in db.execute(select(Proprietario.id, Proprietario.nome, Proprietario.ativo))
+                ],
+                motoristas=[
+                    MotoristaCatalogo(*row)
+                    for row in db.execute(select(
+                        Motorista.id, Motorista.nome, Motorista.proprietario_id,
+                        Motorista.vagas, Motorista.ativo
+                    ))
+                ],
+            )
+        finally:
+            db.close()
+
+
+# Instância global do serviço
+catalogo_service = CatalogoService()
+
+
+@event.listens_for(Session, "before_flush")
+def _incrementar_versao_catalogo(session: Session, flush_context, instances):
+    """Incrementa a versão do catálogo na transação que altera dados de referência"""
+    alterados = (*session.new, *session.dirty, *session.deleted)
+    if not any(isinstance(obj, MODELS_CATALOGO) for obj in alterados):
+        return
+
+    resultado = session.execute(
+        update(Contador)
+        .where(Contador.nome == CONTADOR_CATALOGO)
+        .values(valor=Contador.valor + 1)
+    )
+    if resultado.rowcount == 0:
+        session.execute(insert(Contador).values(nome=CONTADOR_CATALOGO, valor=1))
+
+    session.info["catalogo_alterado"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _recarregar_catalogo(session: Session):
+    """Recarrega o catálogo deste processo depois de alterações confirmadas"""
+    if session.info.pop("catalogo_alterado", False):
+        catalogo_service.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_alteracao_catalogo(session: Session):
+    session.info.pop("catalogo_alterado", None)
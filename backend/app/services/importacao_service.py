@@ -0,0 +1,432 @@
+"""
+Serviço de Importação em Lote - Expresso Embuibe
+Carga rápida de clientes e histórico legados (CSV do Access), com
+importações em partes paralelas que podem ser retomadas
+"""
+import csv
+import hashlib
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.engine import Connection
+from ..database import Base, engine
+from ..models.cliente import Cliente
+from ..models.importacao import Importacao, ImportacaoParte
+from ..utils.texto import normalizar_busca, somente_digitos
+
+# Linhas do CSV por lote (uma transação e uma ida ao banco por lote)
+TAMANHO_LOTE = 5000
+
+# Bytes do arquivo por parte de uma importação paralela
+TAMANHO_PARTE = 1024 * 1024
+
+# Situação de importações e partes
+IMPORTACAO_EM_ANDAMENTO = "EM_ANDAMENTO"
+IMPORTACAO_CONCLUIDA = "CONCLUIDA"
+IMPORTACAO_FALHOU = "FALHOU"
+PARTE_PENDENTE = "PENDENTE"
+PARTE_CONCLUIDA = "CONCLUIDA"
+PARTE_ERRO = "ERRO"
+
+# Converte as linhas de uma parte em linhas da tabela:
+# (linhas do CSV, número da primeira linha) -> (linhas a gravar, estatísticas)
+Conversor = Callable[[List[dict], Optional[int]], Tuple[List[dict], dict]]
+
+
+class ResultadoImportacao(NamedTuple):
+    """Situação de uma importação paralela ao fim da execução"""
+    importacao_id: int
+    status: str
+    retomada: bool  # Havia partes concluídas em execuções anteriores
+    partes: int
+    partes_executadas: int  # Partes processadas nesta execução
+    erros: List[str]  # Partes que falharam nesta execução
+    estatisticas: List[dict]  # De todas as partes concluídas, em ordem
+
+# Telefones com menos dígitos são placeholders (SEM_TELEFONE_<id>) ou inválidos
+MINIMO_DIGITOS_TELEFONE = 10
+
+
+class ImportacaoService:
+    """
+    Motor de importação em lote
+
+    O CSV é lido em lotes; as consultas de apoio (telefone -> cliente)
+    são carregadas uma única vez em dicionários; cada lote é gravado com
+    um único executemany, ou COPY no PostgreSQL (psycopg2). Linhas
+    gravadas em lote não passam pelos eventos do ORM (@validates, defaults
+    calculados em Python fora da tabela): quem monta as linhas preenche
+    todas as colunas, inclusive as de busca (ver linha_cliente).
+    Arquivos grandes usam importar_em_partes (paralela e retomável).
+    """
+
+    def __init__(self, tamanho_lote: int = None):
+        self.tamanho_lote = tamanho_lote or TAMANHO_LOTE
+
+    def ler_csv(self, caminho: Path) -> Iterator[List[dict]]:
+        """
+        Lê o CSV em lotes de `tamanho_lote` linhas, sem carregar o arquivo
+
+        Args:
+            caminho: Arquivo CSV com cabeçalho (aceita BOM do Excel/Access)
+
+        Returns:
+            Iterador de listas de linhas (dicionários do csv.DictReader)
+        """
+        with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+            lote = []
+            for linha in csv.DictReader(f):
+                lote.append(linha)
+                if len(lote) >= self.tamanho_lote:
+                    yield lote
+                    lote = []
+            if lote:
+                yield lote
+
+    def mapa_telefones(self, conn: Connection) -> Dict[str, int]:
+        """
+        Telefone (só dígitos) -> ID do cliente ativo, lido em uma consulta
+
+        Com telefones repetidos, fica o cliente mais antigo.
+        """
+        mapa: Dict[str, int] = {}
+        for cliente_id, digitos in conn.execute(
+            select(Cliente.id, Cliente.telefone_digitos)
+            .where(Cliente.ativo == True)
+            .order_by(Cliente.id.desc())
+        ):
+            if digitos and len(digitos) >= MINIMO_DIGITOS_TELEFONE:
+                mapa[digitos] = cliente_id
+        return mapa
+
+    def linha_cliente(self, **valores) -> dict:
+        """Linha de cliente para inserir em lote, com as colunas de busca preenchidas"""
+        valores.setdefault("ativo", True)
+        valores["nome_busca"] = normalizar_busca(valores["nome"])
+        valores["telefone_digitos"] = somente_digitos(valores["telefone"])
+        return valores
+
+    def inserir(self, conn: Connection, modelo: Type[Base], linhas: List[dict]) -> int:
+        """
+        Grava as linhas de um lote na tabela do model
+
+        Usa COPY no PostgreSQL com psycopg2 e INSERT com executemany nos
+        demais bancos. Não faz commit: o lote vai na transação de `conn`.
+
+        Args:
+            conn: Conexão com transação aberta
+            modelo: Model da tabela (Cliente, Passagem...)
+            linhas: Dicionários com as mesmas chaves (nomes de colunas)
+
+        Returns:
+            Quantidade de linhas gravadas
+        """
+        if not linhas:
+            return 0
+        if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+            self._copiar(conn, modelo.__table__.name, linhas)
+        else:
+            conn.execute(insert(modelo), linhas)
+        return len(linhas)
+
+    def _copiar(self, conn: Connection, tabela: str, linhas: List[dict]):
+        """COPY ... FROM STDIN (CSV) com as linhas do lote"""
+        colunas = list(linhas[0])
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for linha in linhas:
+            # \N é o NULL do COPY; string vazia continua string vazia
+            escritor.writerow(["\\N" if linha[c] is None else linha[c] for c in colunas])
+        buffer.seek(0)
+
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+
+    def importar_em_partes(
+        self,
+        tipo: str,
+        caminho: Path,
+        modelo: Type[Base],
+        converter: Conversor,
+        trabalhadores: int = None,
+        tamanho_parte: int = None,
+        numerar: bool = False,
+        ao_concluir_parte: Callable[[int, int, dict], None] = None
+    ) -> ResultadoImportacao:
+        """
+        Importa o CSV em partes paralelas, com checkpoint de cada parte
+
+        O arquivo é dividido em faixas de bytes alinhadas em início de
+        linha, registradas em importacoes_partes junto com a importação.
+        Cada parte roda em um processo do pool: lê a sua faixa, converte as
+        linhas com `converter` e grava o lote e a conclusão da parte na
+        mesma transação. Rodar de novo o mesmo arquivo (mesmo SHA-256)
+        processa só as partes pendentes ou com erro; um arquivo já
+        importado por completo não é gravado de novo.
+
+        Com `numerar`, a faixa de números de passagem de todo o arquivo é
+        reservada uma vez, ao registrar a importação: cada parte recebe o
+        número da sua primeira linha e, ao ser retomada, reusa os mesmos
+        números. O CSV não pode ter quebras de linha dentro de campos.
+
+        Args:
+            tipo: Tipo da importação (ex.: "historico")
+            caminho: Arquivo CSV com cabeçalho
+            modelo: Model da tabela de destino
+            converter: Função de módulo (executada nos processos do pool)
+            trabalhadores: Processos do pool (padrão: número de CPUs)
+            tamanho_parte: Bytes por parte (padrão: TAMANHO_PARTE)
+            numerar: Reserva números de passagem para as linhas
+            ao_concluir_parte: Chamada no processo principal com (concluídas, total, estatísticas)
+
+        Returns:
+            Situação final da importação
+        """
+        caminho = Path(caminho).resolve()
+        importacao, partes = self._registrar(tipo, caminho, tamanho_parte or TAMANHO_PARTE, numerar)
+        pendentes = [p for p in partes if p.status != PARTE_CONCLUIDA]
+        concluidas_antes = concluidas = len(partes) - len(pendentes)
+        erros = []
+
+        if pendentes:
+            cabecalho = self._cabecalho(caminho)
+            trabalhadores = max(1, min(trabalhadores or os.cpu_count() or 1, len(pendentes)))
+            # Processos "spawn": não herdam as conexões do processo principal
+            with ProcessPoolExecutor(trabalhadores, mp_context=multiprocessing.get_context("spawn")) as executor:
+                tarefas = [
+                    executor.submit(_processar_parte, parte.id, str(caminho), cabecalho, modelo, converter)
+                    for parte in pendentes
+                ]
+                for tarefa in as_completed(tarefas):
+                    ordem, estatisticas, erro = tarefa.result()
+                    if erro:
+                        erros.append(f"Parte {ordem}: {erro}")
+                        continue
+                    concluidas += 1
+                    if ao_concluir_parte:
+                        ao_concluir_parte(concluidas, len(partes), estatisticas)
+
+        return self._finalizar(importacao.id, concluidas_antes > 0, len(pendentes), erros)
+
+    def _registrar(self, tipo: str, caminho: Path, tamanho_parte: int, numerar: bool):
+        """Busca a importação do arquivo ou a registra com as suas partes"""
+        assinatura = _sha256(caminho)
+
+        with engine.connect() as conn:
+            importacao = conn.execute(
+                select(Importacao).where(Importacao.tipo == tipo, Importacao.assinatura == assinatura)
+            ).first()
+            if importacao is not None:
+                partes = conn.execute(
+                    select(ImportacaoParte)
+                    .where(ImportacaoParte.importacao_id == importacao.id)
+                    .order_by(ImportacaoParte.ordem)
+                ).all()
+                return importacao, partes
+
+        faixas = _dividir(caminho, tamanho_parte)
+        total_linhas = sum(linhas for _, _, linhas in faixas)
+
+        numero_inicial = None
+        if numerar and total_linhas:
+            from .numeracao_service import numeracao_service
+            numero_inicial = numeracao_service.proximos_numeros(total_linhas)[0]
+
+        with engine.begin() as conn:
+            importacao_id = conn.execute(insert(Importacao).values(
+                tipo=tipo,
+                arquivo=str(caminho),
+                assinatura=assinatura,
+                tamanho=caminho.stat().st_size,
+                total_linhas=total_linhas,
+                numero_inicial=numero_inicial,
+                status=IMPORTACAO_EM_ANDAMENTO
+            )).inserted_primary_key[0]
+
+            linha_inicial = 0
+            valores = []
+            for ordem, (inicio, fim, linhas) in enumerate(faixas, start=1):
+                valores.append({
+                    "importacao_id": importacao_id,
+                    "ordem": ordem,
+                    "inicio_byte": inicio,
+                    "fim_byte": fim,
+                    "linhas": linhas,
+                    "numero_inicial": numero_inicial + linha_inicial if numero_inicial is not None else None,
+                    "status": PARTE_PENDENTE,
+                })
+                linha_inicial += linhas
+            if valores:
+                conn.execute(insert(ImportacaoParte), valores)
+
+        with engine.connect() as conn:
+            importacao = conn.execute(select(Importacao).where(Importacao.id == importacao_id)).one()
+            partes = conn.execute(
+                select(ImportacaoParte)
+                .where(ImportacaoParte.importacao_id == importacao_id)
+                .order_by(ImportacaoParte.ordem)
+            ).all()
+        return importacao, partes
+
+    def _finalizar(self, importacao_id: int, retomada: bool, executadas: int, erros: List[str]) -> ResultadoImportacao:
+        """Marca a importação como concluída (ou com falha) e junta as estatísticas das partes"""
+        with engine.begin() as conn:
+            partes = conn.execute(
+                select(ImportacaoParte.status, ImportacaoParte.estatisticas)
+                .where(ImportacaoParte.importacao_id == importacao_id)
+                .order_by(ImportacaoParte.ordem)
+            ).all()
+            completa = all(p.status == PARTE_CONCLUIDA for p in partes)
+            status = IMPORTACAO_CONCLUIDA if completa else IMPORTACAO_FALHOU
+            conn.execute(
+                update(Importacao)
+                .where(Importacao.id == importacao_id)
+                .values(status=status, concluida_em=func.now() if completa else None)
+            )
+
+        return ResultadoImportacao(
+            importacao_id=importacao_id,
+            status=status,
+            retomada=retomada,
+            partes=len(partes),
+            partes_executadas=executadas,
+            erros=erros,
+            estatisticas=[p.estatisticas for p in partes if p.status == PARTE_CONCLUIDA],
+        )
+
+    def _cabecalho(self, caminho: Path) -> List[str]:
+        with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+            return next(csv.reader(f))
+
+
+def _sha256(caminho: Path) -> str:
+    """SHA-256 do conteúdo do arquivo (identifica a importação)"""
+    resumo = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def _dividir(caminho: Path, tamanho_parte: int) -> List[Tuple[int, int, int]]:
+    """
+    Divide o arquivo (sem o cabeçalho) em faixas de bytes que começam e
+    terminam em início de linha
+
+    Returns:
+        Lista de (início, fim exclusivo, quantidade de linhas)
+    """
+    tamanho = caminho.stat().st_size
+    faixas = []
+    with open(caminho, 'rb') as f:
+        f.readline()  # Cabeçalho
+        inicio = f.tell()
+        while inicio < tamanho:
+            f.seek(min(inicio + tamanho_parte, tamanho))
+            if f.tell() < tamanho:
+                f.readline()  # Avança até o fim da linha em andamento
+            fim = f.tell()
+            f.seek(inicio)
+            conteudo = f.read(fim - inicio)
+            linhas = conteudo.count(b'\n') + (0 if conteudo.endswith(b'\n') else 1)
+            faixas.append((inicio, fim, linhas))
+            inicio = fim
+    return faixas
+
+
+class _ParteJaConcluida(Exception):
+    """Outra execução concluiu a parte primeiro (desfaz a gravação repetida)"""
+
+
+def _processar_parte(parte_id: int, caminho: str, cabecalho: List[str], modelo: Type[Base], converter: Conversor):
+    """
+    Processa uma parte da importação (roda em um processo do pool)
+
+    Returns:
+        (ordem da parte, estatísticas, mensagem de erro ou None)
+    """
+    with engine.connect() as conn:
+        parte = conn.execute(select(ImportacaoParte).where(ImportacaoParte.id == parte_id)).one()
+    if parte.status == PARTE_CONCLUIDA:
+        return parte.ordem, parte.estatisticas, None
+
+    try:
+        with open(caminho, 'rb') as f:
+            f.seek(parte.inicio_byte)
+            texto = f.read(parte.fim_byte - parte.inicio_byte).decode('utf-8')
+        linhas_csv = list(csv.DictReader(io.StringIO(texto, newline=''), fieldnames=cabecalho))
+        linhas, estatisticas = converter(linhas_csv, parte.numero_inicial)
+
+        # Só escritas na transação: o lock de escrita do SQLite é pedido na
+        # primeira instrução e espera pelos outros processos (sem deadlock)
+        with engine.begin() as conn:
+            importacao_service.inserir(conn, modelo, linhas)
+            concluida = conn.execute(
+                update(ImportacaoParte)
+                .where(ImportacaoParte.id == parte_id, ImportacaoParte.status != PARTE_CONCLUIDA)
+                .values(
+                    status=PARTE_CONCLUIDA,
+                    gravadas=len(linhas),
+                    estatisticas=estatisticas,
+                    erro=None,
+                    concluida_em=func.now()
+                )
+            )
+            if concluida.rowcount != 1:
+                raise _ParteJaConcluida()
+        return parte.ordem, estatisticas, None
+
+    except _ParteJaConcluida:
+        with engine.connect() as conn:
+            estatisticas = conn.execute(
+                select(ImportacaoParte.estatisticas).where(ImportacaoParte.id == parte_id)
+            ).scalar()
+        return parte.ordem, estatisticas, None
+
+    except Exception as e:
+        with engine.begin() as conn:
+            conn.execute(
+                update(ImportacaoParte)
+                .where(ImportacaoParte.id == parte_id, ImportacaoParte.status != PARTE_CONCLUIDA)
+                .values(status=PARTE_ERRO, erro=str(e)[:2000])
+            )
+        return parte.ordem, None, str(e)
+
+
+class Progresso:
+    """Contagem de linhas e velocidade (linhas por segundo) de uma importação"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.linhas = 0
+
+    def somar(self, quantidade: int):
+        self.linhas += quantidade
+
+    @property
+    def segundos(self) -> float:
+        return time.perf_counter() - self.inicio
+
+    @property
+    def linhas_por_segundo(self) -> float:
+        segundos = self.segundos
+        return self.linhas / segundos if segundos else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.linhas} linhas em {self.segundos:.1f}s ({self.linhas_por_segundo:,.0f} linhas/s)"
+
+
+# Instância global do serviço
+importacao_service = ImportacaoService()
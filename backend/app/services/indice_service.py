@@ -0,0 +1,112 @@
+"""
+Serviço de Índices - Expresso Embuibe
+Leva para bancos existentes os índices compostos e parciais declarados nos
+models de passagens e viagens e remove os índices que eles substituíram
+"""
+import re
+from typing import List, NamedTuple
+from sqlalchemy import Index, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+from ..database import Base, engine
+
+# Tabelas cujos índices são mantidos por este serviço
+TABELAS = ("passagens", "viagens")
+
+# Índices de uma coluna que os compostos cobrem (mesmo prefixo) ou que só
+# confundiam o planejador (horario sozinho é pouco seletivo)
+INDICES_OBSOLETOS = {
+    "passagens": ("ix_passagens_data_viagem", "ix_passagens_horario", "ix_passagens_motorista_id"),
+    "viagens": ("ix_viagens_data",),
+}
+
+
+class IndicesPendentes(NamedTuple):
+    """Diferença entre os índices dos models e os do banco"""
+    faltando: List[Index]
+    obsoletos: List[str]
+
+    def __bool__(self):
+        return bool(self.faltando or self.obsoletos)
+
+
+class IndiceService:
+    """
+    Migração dos índices de passagens e viagens
+
+    create_all só cria índices junto com tabelas novas; em bancos que já
+    têm as tabelas, os índices declarados nos models são criados aqui.
+    No PostgreSQL criação e remoção usam CONCURRENTLY, sem bloquear as
+    vendas, e índices inválidos deixados por uma criação interrompida
+    são recriados.
+    """
+
+    def __init__(self, bind: Engine = None):
+        self.bind = bind or engine
+
+    def pendentes(self) -> IndicesPendentes:
+        """Índices dos models que faltam no banco e índices obsoletos ainda presentes"""
+        inspetor = inspect(self.bind)
+        invalidos = self._invalidos()
+        faltando, obsoletos = [], []
+
+        for tabela in TABELAS:
+            existentes = {i["name"] for i in inspetor.get_indexes(tabela)} - invalidos
+            faltando += [
+                indice for indice in sorted(Base.metadata.tables[tabela].indexes, key=lambda i: i.name)
+                if indice.name not in existentes
+            ]
+            obsoletos += [nome for nome in INDICES_OBSOLETOS[tabela] if nome in existentes]
+
+        return IndicesPendentes(faltando, obsoletos)
+
+    def aplicar(self, analisar: bool = True) -> IndicesPendentes:
+        """
+        Cria os índices que faltam e remove os obsoletos (idempotente)
+
+        Args:
+            analisar: Atualiza as estatísticas do planejador (ANALYZE) ao final
+
+        Returns:
+            O que estava pendente e foi aplicado
+        """
+        pendentes = self.pendentes()
+        postgres = self.bind.dialect.name == "postgresql"
+        concorrente = " CONCURRENTLY" if postgres else ""
+        invalidos = self._invalidos()
+
+        # CONCURRENTLY não roda dentro de transação
+        with self.bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for indice in pendentes.faltando:
+                if indice.name in invalidos:
+                    conn.execute(text(f"DROP INDEX{concorrente} IF EXISTS {indice.name}"))
+                ddl = str(CreateIndex(indice, if_not_exists=True).compile(dialect=self.bind.dialect))
+                conn.execute(text(re.sub(r"^CREATE (UNIQUE )?INDEX", rf"CREATE \1INDEX{concorrente}", ddl)))
+
+            for nome in pendentes.obsoletos:
+                conn.execute(text(f"DROP INDEX{concorrente} IF EXISTS {nome}"))
+
+            if analisar:
+                if postgres:
+                    for tabela in TABELAS:
+                        conn.execute(text(f"ANALYZE {tabela}"))
+                else:
+                    conn.execute(text("ANALYZE"))
+
+        return pendentes
+
+    def _invalidos(self) -> set:
+        """Índices marcados como inválidos (CREATE INDEX CONCURRENTLY interrompido, PostgreSQL)"""
+        if self.bind.dialect.name != "postgresql":
+            return set()
+
+        with self.bind.connect() as conn:
+            return set(conn.execute(text(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "JOIN pg_class t ON t.oid = i.indrelid "
+                "WHERE NOT i.indisvalid AND t.relname = ANY(:tabelas)"
+            ), {"tabelas": list(TABELAS)}).scalars())
+
+
+# Instância global do serviço
+indice_service = IndiceService()
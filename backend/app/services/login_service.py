@@ -0,0 +1,190 @@
+"""
+Serviço de Login - Expresso Embuibe
+Verificação de senha fora dos workers da API, com limite de tentativas
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Optional
+from sqlalchemy import update
+from ..config import settings
+from ..database import SessionLocal
+from ..models.usuario import Usuario
+from ..utils.security import (
+    UsuarioAutenticado,
+    authenticate_user,
+    get_password_hash,
+    precisa_rehash
+)
+
+
+class LoginBloqueado(Exception):
+    """Login recusado antes de verificar a senha (limite de tentativas ou fila cheia)"""
+
+    def __init__(self, status_code: int, detail: str, segundos: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.segundos = segundos
+
+
+class LimiteTentativas:
+    """
+    Conta falhas por chave (login ou IP) numa janela deslizante
+
+    Em memória, por processo: com N workers o limite efetivo é até N
+    vezes maior, o que ainda corta ataques de força bruta.
+    """
+
+    def __init__(self, maximo: int, janela_segundos: float, max_chaves: int = 10000):
+        self.maximo = maximo
+        self.janela = janela_segundos
+        self.max_chaves = max_chaves
+        self._lock = threading.Lock()
+        self._falhas: Dict[str, Deque[float]] = {}
+
+    def espera(self, chave: str) -> int:
+        """Segundos até a chave poder tentar de novo (0 se liberada)"""
+        agora = time.monotonic()
+        with self._lock:
+            falhas = self._falhas.get(chave)
+            if not falhas:
+                return 0
+            while falhas and falhas[0] <= agora - self.janela:
+                falhas.popleft()
+            if len(falhas) < self.maximo:
+                return 0
+            return int(falhas[0] + self.janela - agora) + 1
+
+    def registrar_falha(self, chave: str):
+        agora = time.monotonic()
+        with self._lock:
+            if chave not in self._falhas and len(self._falhas) >= self.max_chaves:
+                self._descartar_expiradas(agora)
+            self._falhas.setdefault(chave, deque(maxlen=self.maximo)).append(agora)
+
+    def limpar(self, chave: str):
+        with self._lock:
+            self._falhas.pop(chave, None)
+
+    def _descartar_expiradas(self, agora: float):
+        """Remove chaves sem falhas na janela (chamado com o lock)"""
+        for chave in [c for c, f in self._falhas.items() if not f or f[-1] <= agora - self.janela]:
+            del self._falhas[chave]
+        if len(self._falhas) >= self.max_chaves:
+            # Muitas chaves ativas: descarta as mais antigas
+            self._falhas.pop(next(iter(self._falhas)))
+
+
+class LoginService:
+    """
+    Autenticação com bcrypt em um pool de threads dedicado e limitado
+
+    Cada verificação de senha custa centenas de milissegundos de CPU. Ela
+    roda em LOGIN_THREADS threads próprias, e o endpoint espera de forma
+    assíncrona, sem ocupar os workers que atendem o resto da API. Com mais
+    de LOGIN_FILA_MAXIMA logins em espera, novos logins recebem 503. Falhas
+    repetidas por login ou por IP bloqueiam novas tentativas (429) durante
+    LOGIN_JANELA_SEGUNDOS.
+    """
+
+    def __init__(self, threads: int = None, fila_maxima: int = None):
+        self.threads = max(1, threads or settings.LOGIN_THREADS)
+        self.fila_maxima = fila_maxima or settings.LOGIN_FILA_MAXIMA
+        self.por_login = LimiteTentativas(settings.LOGIN_TENTATIVAS_POR_LOGIN, settings.LOGIN_JANELA_SEGUNDOS)
+        self.por_ip = LimiteTentativas(settings.LOGIN_TENTATIVAS_POR_IP, settings.LOGIN_JANELA_SEGUNDOS)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pendentes = 0
+
+    async def autenticar(self, login: str, senha: str, ip: str) -> Optional[UsuarioAutenticado]:
+        """
+        Verifica login e senha
+
+        Args:
+            login: Login informado
+            senha: Senha em texto plano
+            ip: Endereço de origem da requisição
+
+        Returns:
+            Usuário autenticado ou None se login/senha estiverem incorretos
+
+        Raises:
+            LoginBloqueado: Se houver falhas demais ou a fila estiver cheia
+        """
+        chave_login = login.strip().lower()
+
+        espera = max(self.por_login.espera(chave_login), self.por_ip.espera(ip))
+        if espera:
+            raise LoginBloqueado(
+                429, "Muitas tentativas de login. Tente novamente mais tarde", espera
+            )
+
+        with self._lock:
+            if self._pendentes >= self.fila_maxima:
+                raise LoginBloqueado(503, "Muitos logins simultâneos. Tente novamente", 1)
+            self._pendentes += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.threads, thread_name_prefix="login"
+                )
+            executor = self._executor
+
+        try:
+            # Leva o contexto da requisição (contagem de consultas) para a thread
+            contexto = contextvars.copy_context()
+            user = await asyncio.wrap_future(executor.submit(contexto.run, self._verificar, login, senha))
+        finally:
+            with self._lock:
+                self._pendentes -= 1
+
+        if user is None:
+            self.por_login.registrar_falha(chave_login)
+            self.por_ip.registrar_falha(ip)
+        else:
+            self.por_login.limpar(chave_login)
+
+        return user
+
+    def encerrar(self):
+        """Finaliza o pool de threads"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _verificar(self, login: str, senha: str) -> Optional[UsuarioAutenticado]:
+        """Busca o usuário, confere a senha e refaz o hash se o custo mudou (roda no pool)"""
+        db = SessionLocal()
+        try:
+            user = authenticate_user(db, login, senha)
+            if user is None:
+                return None
+
+            autenticado = UsuarioAutenticado(
+                id=user.id, nome=user.nome, tipo=user.tipo, ativo=user.ativo, versao=user.versao
+            )
+
+            if precisa_rehash(user.senha_hash):
+                # Mantém updated_at e versao: trocar o custo do hash não revoga os tokens
+                db.execute(
+                    update(Usuario)
+                    .where(Usuario.id == user.id, Usuario.senha_hash == user.senha_hash)
+                    .values(
+                        senha_hash=get_password_hash(senha),
+                        updated_at=Usuario.updated_at,
+                        versao=Usuario.versao
+                    )
+                )
+                db.commit()
+
+            return autenticado
+        finally:
+            db.close()
+
+
+# Instância global do serviço
+login_service = LoginService()
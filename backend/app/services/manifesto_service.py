@@ -0,0 +1,115 @@
+"""
+Serviço de Manifesto - Expresso Embuibe
+Monta a lista de passageiros de uma viagem em uma única consulta
+"""
+from sqlalchemy.orm import Session, joinedload
+from datetime import date, time
+from decimal import Decimal
+from typing import List, NamedTuple, Optional
+from ..models.passagem import Passagem
+from ..models.cliente import Cliente
+from ..models.local_embarque import LocalEmbarque
+from ..models.cidade import Cidade
+from ..models.motorista import Motorista
+
+
+class LinhaManifesto(NamedTuple):
+    """Passageiro do manifesto com os dados de referência já resolvidos"""
+    passagem_id: int
+    numero_passagem: int
+    cliente_nome: str
+    cliente_telefone: str
+    local_embarque: str
+    cidade: str
+    valor: Decimal
+    forma_pagamento: str
+
+
+class ManifestoService:
+    """Serviço de consulta de manifestos de viagem"""
+
+    def buscar_motorista(self, db: Session, motorista_id: int) -> Optional[Motorista]:
+        """
+        Busca o motorista já com o proprietário carregado
+
+        Args:
+            db: Sessão do banco de dados
+            motorista_id: ID do motorista
+
+        Returns:
+            Motorista ou None se não existir
+        """
+        return db.query(Motorista).options(
+            joinedload(Motorista.proprietario)
+        ).filter(Motorista.id == motorista_id).first()
+
+    def buscar_passageiros(
+        self,
+        db: Session,
+        data: date,
+        horario: time,
+        motorista_id: int,
+        status: Optional[List[str]] = None
+    ) -> List[LinhaManifesto]:
+        """
+        Lista os passageiros de uma viagem ordenados por nome
+
+        Junta Passagem, Cliente, LocalEmbarque e Cidade em um único
+        SELECT, independente da quantidade de passageiros.
+
+        Args:
+            db: Sessão do banco de dados
+            data: Data da viagem
+            horario: Horário da viagem
+            motorista_id: ID do motorista
+            status: Status de passagem aceitos (None = todos)
+
+        Returns:
+            Lista de passageiros do manifesto
+        """
+        query = db.query(
+            Passagem.id,
+            Passagem.numero,
+            Cliente.nome,
+            Cliente.telefone,
+            LocalEmbarque.nome,
+            Cidade.nome,
+            Passagem.valor,
+            Passagem.forma_pagamento
+        ).outerjoin(
+            Cliente, Cliente.id == Passagem.cliente_id
+        ).outerjoin(
+            LocalEmbarque, LocalEmbarque.id == Passagem.local_embarque_id
+        ).outerjoin(
+            Cidade, Cidade.id == LocalEmbarque.cidade_id
+        ).filter(
+            Passagem.data_viagem == data,
+            Passagem.horario == horario,
+            Passagem.motorista_id == motorista_id
+        )
+
+        if status:
+            # Um único status vai como "=", que o banco casa com o índice parcial de EMITIDA
+            query = query.filter(
+                Passagem.status == status[0] if len(status) == 1 else Passagem.status.in_(status)
+            )
+
+        rows = query.order_by(Cliente.nome, Passagem.numero).all()
+
+        return [
+            LinhaManifesto(
+                passagem_id=row[0],
+                numero_passagem=row[1],
+                cliente_nome=row[2] or "Desconhecido",
+                cliente_telefone=row[3] or "N/A",
+                local_embarque=row[4] or "N/A",
+                cidade=row[5] or "N/A",
+                valor=row[6] or Decimal('0'),
+                forma_pagamento=row[7] or "N/A"
+            )
+            for row in rows
+        ]
+
+
+# Instância global do serviço
+manifesto_service = ManifestoService()
@@ -0,0 +1,214 @@
+"""
+Serviço de Numeração de Passagens - Expresso Embuibe
+Aloca números de passagem sem disputa entre atendentes simultâneos
+"""
+import math
+import threading
+from typing import Optional
+from sqlalchemy import func, select, text, update, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import engine
+from ..models.contador import Contador
+from ..models.passagem import Passagem
+
+# Nome da sequence (PostgreSQL) e do contador (demais bancos)
+SEQUENCIA_PASSAGEM = "passagens_numero_seq"
+CONTADOR_PASSAGEM = "passagem_numero"
+
+
+class NumeracaoService:
+    """
+    Alocador de números de passagem em blocos
+
+    Cada processo reserva um bloco de números no banco e distribui os
+    números do bloco em memória. No PostgreSQL o bloco vem de uma
+    sequence com INCREMENT BY igual ao tamanho do bloco; nos demais
+    bancos (SQLite) vem de uma linha da tabela contadores, atualizada
+    com UPDATE (que trava a linha até o commit).
+
+    A reserva roda em conexão própria, fora da transação da emissão,
+    assim o lock do contador dura apenas o tempo do UPDATE. Números de
+    um bloco não utilizado (reinício do processo, rollback, lote que não
+    coube no bloco atual) ficam sem uso, como acontece com qualquer
+    sequence.
+
+    Lotes numerados depois de a transação já ter escrito (vagas ocupadas)
+    passam a sessão: no SQLite, que só tem um escritor, uma conexão
+    própria ficaria esperando a transação da emissão.
+    """
+
+    def __init__(self, bind: Engine = None, tamanho_bloco: int = None):
+        self.bind = bind or engine
+        self.tamanho_bloco = max(1, tamanho_bloco or settings.NUMERO_PASSAGEM_BLOCO)
+        self._lock = threading.Lock()
+        self._preparado = False
+        self._proximo = 0
+        self._limite = 0  # Primeiro número fora do bloco atual
+
+    @property
+    def _usa_sequence(self) -> bool:
+        return self.bind.dialect.name == "postgresql"
+
+    def proximo_numero(self) -> int:
+        """
+        Retorna o próximo número de passagem
+
+        Só acessa o banco quando o bloco em memória se esgota.
+
+        Returns:
+            Número de passagem ainda não utilizado
+        """
+        return self.proximos_numeros(1)[0]
+
+    def numero_em_memoria(self) -> Optional[int]:
+        """
+        Próximo número do bloco em memória, sem nunca acessar o banco
+
+        Para endpoints async: quando retorna None, a reserva de um novo
+        bloco (proximo_numero) deve rodar em uma thread, fora do event loop.
+        Também não espera pelo lock: outra thread pode estar com ele,
+        aguardando o banco.
+
+        Returns:
+            Número de passagem ou None se o bloco atual se esgotou (ou está
+            sendo reservado)
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if self._proximo >= self._limite:
+                return None
+            numero = self._proximo
+            self._proximo += 1
+            return numero
+        finally:
+            self._lock.release()
+
+    def proximos_numeros(self, quantidade: int, db: Session = None) -> list[int]:
+        """
+        Retorna `quantidade` números de passagem consecutivos
+
+        Usa o que resta do bloco em memória quando couber; senão reserva
+        no banco blocos suficientes para o lote inteiro, em uma única ida.
+        Com db, em bancos sem sequence, a reserva que não cabe no bloco
+        usa o contador na transação da sessão (ver _reservar_na_transacao)
+        e o bloco em memória fica para as próximas passagens.
+
+        Args:
+            quantidade: Quantidade de números (emissão em lote)
+            db: Sessão da emissão, se a transação já escreveu no banco
+
+        Returns:
+            Lista de números consecutivos ainda não utilizados
+        """
+        with self._lock:
+            if self._limite - self._proximo < quantidade:
+                if db is not None and not self._usa_sequence:
+                    return self._reservar_na_transacao(db, quantidade)
+                blocos = math.ceil(quantidade / self.tamanho_bloco)
+                self._proximo, self._limite = self._reservar_bloco(blocos)
+
+            inicio = self._proximo
+            self._proximo += quantidade
+            return list(range(inicio, inicio + quantidade))
+
+    def _reservar_na_transacao(self, db: Session, quantidade: int) -> list[int]:
+        """
+        Reserva exatamente `quantidade` números no contador, na transação da sessão
+
+        Nada fica em memória: se a emissão for desfeita, o contador volta
+        junto e nenhum número é perdido. Cria o contador se for a primeira
+        numeração do banco (como _preparar, mas sem conexão própria).
+        """
+        atualizado = db.execute(
+            update(Contador)
+            .where(Contador.nome == CONTADOR_PASSAGEM)
+            .values(valor=Contador.valor + quantidade)
+        ).rowcount
+
+        if not atualizado:
+            maior_numero = db.execute(select(func.max(Passagem.numero))).scalar()
+            inicial = settings.NUMERO_PASSAGEM_INICIAL
+            if maior_numero is not None:
+                inicial = max(inicial, maior_numero + 1)
+            db.execute(insert(Contador).values(nome=CONTADOR_PASSAGEM, valor=inicial + quantidade))
+
+        limite = db.execute(
+            select(Contador.valor).where(Contador.nome == CONTADOR_PASSAGEM)
+        ).scalar_one()
+        return list(range(limite - quantidade, limite))
+
+    def _reservar_bloco(self, blocos: int = 1) -> tuple[int, int]:
+        """Reserva `blocos` blocos consecutivos no banco e retorna (início, limite)"""
+        if not self._preparado:
+            self._preparar()
+
+        with self.bind.begin() as conn:
+            if self._usa_sequence:
+                # Vários nextval só são consecutivos se ninguém intercalar:
+                # toda reserva passa pelo mesmo advisory lock da transação
+                conn.execute(
+                    text("SELECT pg_advisory_xact_lock(hashtext(:nome))"),
+                    {"nome": SEQUENCIA_PASSAGEM}
+                )
+                inicio = min(conn.execute(
+                    text(f"SELECT nextval('{SEQUENCIA_PASSAGEM}') FROM generate_series(1, :blocos)"),
+                    {"blocos": blocos}
+                ).scalars().all())
+            else:
+                conn.execute(
+                    update(Contador)
+                    .where(Contador.nome == CONTADOR_PASSAGEM)
+                    .values(valor=Contador.valor + self.tamanho_bloco * blocos)
+                )
+                limite = conn.execute(
+                    select(Contador.valor).where(Contador.nome == CONTADOR_PASSAGEM)
+                ).scalar_one()
+                inicio = limite - self.tamanho_bloco * blocos
+
+        return inicio, inicio + self.tamanho_bloco * blocos
+
+    def _preparar(self):
+        """
+        Cria a sequence/contador na primeira utilização
+
+        O valor inicial respeita NUMERO_PASSAGEM_INICIAL e continua
+        depois da maior passagem já gravada no banco.
+        """
+        try:
+            with self.bind.begin() as conn:
+                maior_numero = conn.execute(select(func.max(Passagem.numero))).scalar()
+                inicial = settings.NUMERO_PASSAGEM_INICIAL
+                if maior_numero is not None:
+                    inicial = max(inicial, maior_numero + 1)
+
+                if self._usa_sequence:
+                    conn.execute(text(
+                        f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCIA_PASSAGEM} "
+                        f"START WITH {inicial} INCREMENT BY {self.tamanho_bloco}"
+                    ))
+                else:
+                    existe = conn.execute(
+                        select(Contador.valor).where(Contador.nome == CONTADOR_PASSAGEM)
+                    ).scalar()
+                    if existe is None:
+                        conn.execute(insert(Contador).values(nome=CONTADOR_PASSAGEM, valor=inicial))
+        except IntegrityError:
+            pass  # Outro processo criou a sequence/contador ao mesmo tempo
+
+        if self._usa_sequence:
+            # A sequence pode ter sido criada com outro tamanho de bloco
+            with self.bind.connect() as conn:
+                self.tamanho_bloco = conn.execute(
+                    text("SELECT increment_by FROM pg_sequences WHERE sequencename = :nome"),
+                    {"nome": SEQUENCIA_PASSAGEM}
+                ).scalar_one()
+
+        self._preparado = True
+
+
+# Instância global do serviço
+numeracao_service = NumeracaoService()
@@ -0,0 +1,104 @@
+"""
+Serviço de Cache de PDFs - Expresso Embuibe
+Guarda em disco os PDFs já gerados, endereçados pelo conteúdo impresso
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+from ..config import settings
+
+# Mudou o layout da passagem? Incremente para invalidar os PDFs em cache.
+VERSAO_LAYOUT = 1
+
+
+class PDFCacheService:
+    """
+    Cache de PDFs de passagens em disco
+
+    Cada PDF fica em <diretório>/<passagem_id>/<hash>.pdf, onde o hash é
+    calculado sobre os campos impressos. Se algum campo mudar, a chave
+    muda junto e o arquivo antigo nunca é servido. Gravações são atômicas
+    (arquivo temporário + rename), então leitores nunca veem PDF parcial.
+    """
+
+    def __init__(self, diretorio: Path = None):
+        self.diretorio = Path(diretorio or settings.PDF_CACHE_DIR)
+
+    def chave(self, dados: dict) -> str:
+        """
+        Calcula a chave do PDF a partir dos campos impressos
+
+        Args:
+            dados: Argumentos de pdf_service.gerar_passagem_pdf
+
+        Returns:
+            Hash SHA-256 em hexadecimal
+        """
+        conteudo = json.dumps(
+            {"versao": VERSAO_LAYOUT, **dados},
+            sort_keys=True,
+            default=str,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def caminho(self, passagem_id: int, chave: str) -> Path:
+        """Caminho do PDF em cache (pode não existir)"""
+        return self.diretorio / str(passagem_id) / f"{chave}.pdf"
+
+    def buscar(self, passagem_id: int, chave: str) -> Optional[Path]:
+        """
+        Retorna o caminho do PDF se ele já estiver em cache
+
+        Args:
+            passagem_id: ID da passagem
+            chave: Chave calculada por chave()
+
+        Returns:
+            Caminho do arquivo ou None
+        """
+        caminho = self.caminho(passagem_id, chave)
+        return caminho if caminho.is_file() else None
+
+    def gravar(self, passagem_id: int, chave: str, pdf_bytes: bytes) -> Path:
+        """
+        Grava o PDF no cache, removendo versões antigas da mesma passagem
+
+        Args:
+            passagem_id: ID da passagem
+            chave: Chave calculada por chave()
+            pdf_bytes: Conteúdo do PDF
+
+        Returns:
+            Caminho do arquivo gravado
+        """
+        caminho = self.caminho(passagem_id, chave)
+        pasta = caminho.parent
+        pasta.mkdir(parents=True, exist_ok=True)
+
+        fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as arquivo:
+                arquivo.write(pdf_bytes)
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+        for antigo in pasta.glob("*.pdf"):
+            if antigo != caminho:
+                antigo.unlink(missing_ok=True)
+
+        return caminho
+
+    def invalidar(self, passagem_id: int):
+        """Remove todos os PDFs em cache da passagem (cancelamento/transferência)"""
+        shutil.rmtree(self.diretorio / str(passagem_id), ignore_errors=True)
+
+
+# Instância global do serviço
+pdf_cache_service = PDFCacheService()
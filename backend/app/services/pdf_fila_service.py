@@ -0,0 +1,134 @@
+"""
+Serviço de Fila de PDFs - Expresso Embuibe
+Gera PDFs de passagens em processos separados, fora do caminho da requisição
+"""
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from ..config import settings
+from .pdf_service import renderizar_passagem
+
+# Situação do PDF de uma passagem
+PDF_PENDENTE = "PENDENTE"
+PDF_PRONTO = "PRONTO"
+PDF_ERRO = "ERRO"
+
+
+class PDFFilaService:
+    """
+    Fila de geração de PDFs em um pool de processos
+
+    A emissão enfileira o PDF e responde sem esperar o ReportLab; o
+    cliente busca o arquivo depois em GET /passagens/{id}/pdf. O pool é
+    criado na primeira utilização, com processos "spawn" (não herdam
+    threads nem conexões do servidor). Os resultados ficam em memória,
+    limitados aos `max_resultados` mais recentes.
+    """
+
+    def __init__(self, processos: int = None, max_resultados: int = 500):
+        self.processos = max(1, processos or settings.PDF_PROCESSOS)
+        self.max_resultados = max_resultados
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._tarefas: "OrderedDict[int, Future]" = OrderedDict()
+
+    def enfileirar(self, passagem_id: int, dados: dict):
+        """
+        Agenda a geração do PDF de uma passagem
+
+        Args:
+            passagem_id: ID da passagem
+            dados: Argumentos de pdf_service.gerar_passagem_pdf
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._criar_executor()
+
+            try:
+                tarefa = self._executor.submit(renderizar_passagem, dados)
+            except BrokenProcessPool:
+                # Um processo morreu: o pool não aceita mais tarefas
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._criar_executor()
+                tarefa = self._executor.submit(renderizar_passagem, dados)
+
+            self._tarefas[passagem_id] = tarefa
+            self._tarefas.move_to_end(passagem_id)
+            self._descartar_antigas()
+
+    def status(self, passagem_id: int) -> Optional[str]:
+        """
+        Situação do PDF enfileirado
+
+        Returns:
+            PENDENTE, PRONTO, ERRO ou None se a passagem não está na fila
+        """
+        with self._lock:
+            tarefa = self._tarefas.get(passagem_id)
+
+        if tarefa is None:
+            return None
+        if not tarefa.done():
+            return PDF_PENDENTE
+        return PDF_ERRO if tarefa.exception() else PDF_PRONTO
+
+    def obter(self, passagem_id: int, timeout: float = 30) -> Optional[bytes]:
+        """
+        Retorna o PDF gerado pela fila, esperando se ainda estiver pendente
+
+        Args:
+            passagem_id: ID da passagem
+            timeout: Tempo máximo de espera em segundos
+
+        Returns:
+            Bytes do PDF ou None se não estiver na fila, falhou ou demorou
+            demais (nesses casos o chamador gera o PDF diretamente)
+        """
+        with self._lock:
+            tarefa = self._tarefas.get(passagem_id)
+
+        if tarefa is None:
+            return None
+
+        try:
+            return tarefa.result(timeout=timeout)
+        except TimeoutError:
+            return None
+        except Exception as e:
+            print(f"Erro ao gerar PDF da passagem {passagem_id} na fila: {e}")
+            return None
+
+    def descartar(self, passagem_id: int):
+        """Remove o PDF da fila (ex.: dados da passagem alterados)"""
+        with self._lock:
+            self._tarefas.pop(passagem_id, None)
+
+    def encerrar(self):
+        """Finaliza o pool de processos"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            self._tarefas.clear()
+
+    def _criar_executor(self) -> ProcessPoolExecutor:
+        """Cria o pool de processos da fila"""
+        return ProcessPoolExecutor(
+            max_workers=self.processos,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _descartar_antigas(self):
+        """Mantém só os resultados mais recentes (chamado com o lock)"""
+        while len(self._tarefas) > self.max_resultados:
+            passagem_id, tarefa = next(iter(self._tarefas.items()))
+            if not tarefa.done():
+                break
+            del self._tarefas[passagem_id]
+
+
+# Instância global do serviço
+pdf_fila_service = PDFFilaService()
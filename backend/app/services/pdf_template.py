@@ -0,0 +1,198 @@
+"""
+Template da Passagem A6 - Expresso Embuibe
+Calcula o layout fixo do PDF da passagem e o código dos textos fixos uma
+vez por processo; em lotes a parte fixa vira um Form XObject reaproveitado
+por todas as páginas
+"""
+from reportlab.lib.pagesizes import A6
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from io import BytesIO
+from typing import Dict, List, NamedTuple, Tuple
+
+FONTE_NORMAL = "Helvetica"
+FONTE_NEGRITO = "Helvetica-Bold"
+
+TITULO = "EXPRESSO EMBUIBE"
+RODAPE = "Apresente este documento ao motorista no momento do embarque."
+
+# Campos na ordem em que aparecem na passagem
+CAMPOS = (
+    ("cliente_nome", "Passageiro:"),
+    ("origem", "Origem:"),
+    ("endereco_embarque", "Buscar em:"),
+    ("destino", "Destino:"),
+    ("data_viagem", "Data da Viagem:"),
+    ("horario", "Horário:"),
+    ("valor", "Valor:"),
+    ("forma_pagamento", "Pagamento:"),
+    ("data_emissao", "Emissão:"),
+    ("atendente_nome", "Atendente:"),
+)
+
+
+class CamadaFixa(NamedTuple):
+    """Layout de uma variante da passagem (com ou sem endereço de embarque)"""
+    nome_form: str
+    codigo_textos: str  # Objeto de texto com título, rótulos e rodapé (PDFTextObject.getCode)
+    linhas: List[float]  # y de cada linha separadora
+    posicoes: List[Tuple[str, float, float]]  # (campo, x, y) de cada valor variável
+    y_numero: float
+
+
+class TemplatePassagem:
+    """
+    Template da passagem A6
+
+    O layout só varia com a presença do endereço de embarque. As duas
+    variantes (posições, larguras dos rótulos, títulos centralizados e o
+    código PDF do objeto de texto fixo) são montadas uma vez, na criação
+    do template, em um canvas de rascunho descartado em seguida, e não
+    mudam depois: o template pode ser usado por várias threads.
+
+    Cada documento tem seu próprio canvas. Com uma página, o código dos
+    textos fixos entra pronto na página (addLiteral), sem refazer a
+    formatação de cada rótulo; em lotes entra uma vez por documento, em
+    um Form XObject que cada página só referencia. Os nomes das fontes
+    no código (/F1, /F2...) dependem da ordem de registro no documento:
+    _registrar_fontes roda primeiro no rascunho e em cada canvas.
+    """
+
+    def __init__(self, pagesize=A6, margin: float = 10 * mm, compressao: bool = False):
+        self.pagesize = pagesize
+        self.page_width, self.page_height = pagesize
+        self.margin = margin
+        self.compressao = compressao
+        self._larguras_rotulo = {
+            rotulo: stringWidth(rotulo, FONTE_NEGRITO, 9) for _, rotulo in CAMPOS
+        }
+
+        rascunho = canvas.Canvas(BytesIO(), pagesize=pagesize)
+        self._registrar_fontes(rascunho)
+        self._camadas: Dict[bool, CamadaFixa] = {
+            com_endereco: self._montar_camada(rascunho, com_endereco) for com_endereco in (True, False)
+        }
+
+    def renderizar(self, numero: int, valores: Dict[str, str]) -> bytes:
+        """
+        Gera o PDF de uma passagem a partir dos valores já formatados
+
+        Args:
+            numero: Número da passagem
+            valores: Texto de cada campo (chaves de CAMPOS; endereco_embarque
+                pode ser vazio)
+
+        Returns:
+            Bytes do PDF
+        """
+        return self.renderizar_paginas([(numero, valores)])
+
+    def renderizar_paginas(self, passagens: List[Tuple[int, Dict[str, str]]]) -> bytes:
+        """
+        Gera um único PDF com uma página por passagem (emissão em lote)
+
+        Args:
+            passagens: Lista de (número, valores) no formato de renderizar()
+
+        Returns:
+            Bytes do PDF
+        """
+        buffer = BytesIO()
+        c = canvas.Canvas(buffer, pagesize=self.pagesize, pageCompression=int(self.compressao))
+        c.setAuthor("Expresso Embuibe")
+        c.setCreator("Expresso Embuibe")
+        c.setTitle("Passagem")
+        self._registrar_fontes(c)
+
+        # Forms das variantes usadas no lote, antes da primeira página
+        lote = len(passagens) > 1
+        if lote:
+            variantes = {bool(valores.get("endereco_embarque")) for _, valores in passagens}
+            for com_endereco in sorted(variantes):
+                c.beginForm(self._camadas[com_endereco].nome_form)
+                self._desenhar_fixo(c, self._camadas[com_endereco])
+                c.endForm()
+
+        for numero, valores in passagens:
+            camada = self._camadas[bool(valores.get("endereco_embarque"))]
+            if lote:
+                c.doForm(camada.nome_form)
+            else:
+                self._desenhar_fixo(c, camada)
+            self._desenhar_valores(c, camada, numero, valores)
+            c.showPage()
+
+        c.save()
+        return buffer.getvalue()
+
+    @staticmethod
+    def _registrar_fontes(c: canvas.Canvas):
+        """Registra as fontes no documento sempre na mesma ordem (ver docstring da classe)"""
+        c.setFont(FONTE_NORMAL, 9)
+        c.setFont(FONTE_NEGRITO, 9)
+
+    def _desenhar_fixo(self, c: canvas.Canvas, camada: CamadaFixa):
+        """Cabeçalho, rótulos, rodapé e linhas separadoras de uma variante"""
+        c.addLiteral(camada.codigo_textos)
+
+        # Linhas separadoras (preto, 1pt)
+        c.setStrokeColorRGB(0, 0, 0)
+        c.setLineWidth(1)
+        for y_linha in camada.linhas:
+            c.line(self.margin, y_linha, self.page_width - self.margin, y_linha)
+
+    def _desenhar_valores(self, c: canvas.Canvas, camada: CamadaFixa, numero: int, valores: Dict[str, str]):
+        """Número da passagem e valores variáveis, em um único objeto de texto"""
+        texto_numero = f"Passagem Nº {numero}"
+        t = c.beginText()
+        t.setFont(FONTE_NEGRITO, 14)
+        t.setTextOrigin((self.page_width - stringWidth(texto_numero, FONTE_NEGRITO, 14)) / 2, camada.y_numero)
+        t.textOut(texto_numero)
+
+        # Valores variáveis, ao lado dos rótulos
+        t.setFont(FONTE_NORMAL, 9)
+        for campo, x, y in camada.posicoes:
+            t.setTextOrigin(x, y)
+            t.textOut(valores[campo])
+        c.drawText(t)
+
+    def _montar_camada(self, rascunho: canvas.Canvas, com_endereco: bool) -> CamadaFixa:
+        """Calcula o layout e o código dos textos fixos de uma variante"""
+        textos = []
+        linhas = []
+
+        # CABEÇALHO
+        y = self.page_height - self.margin
+        textos.append((FONTE_NEGRITO, 16, (self.page_width - stringWidth(TITULO, FONTE_NEGRITO, 16)) / 2, y, TITULO))
+        y -= 20
+        linhas.append(y)
+        y -= 15
+
+        # NÚMERO DA PASSAGEM (variável)
+        y_numero = y
+        y -= 20
+
+        # RÓTULOS DOS CAMPOS
+        posicoes = []
+        for campo, rotulo in CAMPOS:
+            if campo == "endereco_embarque" and not com_endereco:
+                continue
+            textos.append((FONTE_NEGRITO, 9, self.margin, y, rotulo))
+            posicoes.append((campo, self.margin + self._larguras_rotulo[rotulo] + 5, y))
+            y -= 12
+
+        # RODAPÉ
+        y -= 10
+        linhas.append(y)
+        y -= 15
+        textos.append((FONTE_NORMAL, 8, (self.page_width - stringWidth(RODAPE, FONTE_NORMAL, 8)) / 2, y, RODAPE))
+
+        t = rascunho.beginText()
+        for fonte, tamanho, x, y_texto, texto in textos:
+            t.setFont(fonte, tamanho)
+            t.setTextOrigin(x, y_texto)
+            t.textOut(texto)
+
+        nome_form = "PassagemComEndereco" if com_endereco else "PassagemSemEndereco"
+        return CamadaFixa(nome_form, t.getCode(), linhas, posicoes, y_numero)
@@ -3,10 +3,15 @@ Serviço de Relatórios - Expresso Embuibe
 Lógica de negócio para geração de relatórios
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from datetime import date
 from collections import defaultdict
 from decimal import Decimal
+from typing import Iterator, List, Tuple
+import csv
+import io
+import json
+from ..database import SessionLocal
 from ..models.passagem import Passagem
 from ..models.viagem import Viagem
 from ..models.cliente import Cliente
@@ -14,6 +19,8 @@ from ..models.local_embarque import LocalEmbarque
 from ..models.cidade import Cidade
 from ..models.motorista import Motorista
 from ..models.proprietario import Proprietario
+from ..models.resumo_diario import ResumoDiario
+from .catalogo_service import catalogo_service
 from ..schemas.relatorio import (
     RelatorioDiario,
     HorarioRelatorio,
@@ -27,6 +34,13 @@ from ..schemas.relatorio import (
     ViagemMotorista
 )
 
+# Linhas buscadas do banco por vez na exportação em streaming
+TAMANHO_LOTE_EXPORTACAO = 1000
+
+CAMPOS_PASSAGEM_PERIODO = list(PassagemPeriodo.model_fields)
+CAMPOS_RESUMO_MOTORISTA = list(ResumoMotorista.model_fields)
+CAMPOS_RESUMO_PAGAMENTO = list(ResumoFormaPagamento.model_fields)
+
 
 class RelatorioService:
     """Serviço para geração de relatórios"""
@@ -56,10 +70,8 @@ class RelatorioService:
 
         for viagem in viagens:
             # Busca motorista e proprietário
-            motorista = db.query(Motorista).filter(Motorista.id == viagem.motorista_id).first()
-            proprietario = db.query(Proprietario).filter(
-                Proprietario.id == motorista.proprietario_id
-            ).first()
+            motorista = catalogo_service.motorista(viagem.motorista_id)
+            proprietario = catalogo_service.proprietario(motorista.proprietario_id)
 
             # Busca passageiros desta viagem (passagens associadas)
             passagens = db.query(Passagem).filter(
@@ -71,8 +83,8 @@ class RelatorioService:
             passageiros_list = []
             for passagem in passagens:
                 cliente = db.query(Cliente).filter(Cliente.id == passagem.cliente_id).first()
-                local = db.query(LocalEmbarque).filter(LocalEmbarque.id == passagem.local_embarque_id).first()
-                cidade = db.query(Cidade).filter(Cidade.id == local.cidade_id).first() if local else None
+                local = catalogo_service.local(passagem.local_embarque_id)
+                cidade = catalogo_service.cidade(local.cidade_id) if local else None
 
                 passageiros_list.append({
                     "cliente_nome": cliente.nome if cliente else "Desconhecido",
@@ -113,6 +125,9 @@ class RelatorioService:
         """
         Gera relatório por período
 
+        A lista de passagens vem das passagens; os resumos por motorista
+        e por forma de pagamento vêm agregados de resumos_diarios.
+
         Args:
             db: Sessão do banco de dados
             data_inicio: Data inicial
@@ -121,65 +136,14 @@ class RelatorioService:
         Returns:
             Relatório do período
         """
-        # Busca passagens do período (inclui EMITIDA e UTILIZADA para histórico)
-        passagens = db.query(Passagem).filter(
-            Passagem.data_viagem >= data_inicio,
-            Passagem.data_viagem <= data_fim,
-            Passagem.status.in_(["EMITIDA", "UTILIZADA"])
-        ).order_by(Passagem.data_viagem, Passagem.horario).all()
+        # Busca passagens do período já com os dados de referência
+        linhas = db.execute(self._consulta_periodo(data_inicio, data_fim)).all()
 
         # Monta lista de passagens
-        passagens_list = []
-        resumo_motorista_dict = defaultdict(lambda: {'total': 0, 'valor': Decimal('0'), 'proprietario': ''})
-        resumo_pagamento_dict = defaultdict(lambda: {'total': 0, 'valor': Decimal('0')})
+        passagens_list = [PassagemPeriodo(**linha._mapping) for linha in linhas]
 
-        for passagem in passagens:
-            motorista = db.query(Motorista).filter(Motorista.id == passagem.motorista_id).first()
-            proprietario = db.query(Proprietario).filter(Proprietario.id == motorista.proprietario_id).first()
-            cliente = db.query(Cliente).filter(Cliente.id == passagem.cliente_id).first()
-            local = db.query(LocalEmbarque).filter(LocalEmbarque.id == passagem.local_embarque_id).first()
-            cidade = db.query(Cidade).filter(Cidade.id == local.cidade_id).first()
-
-            passagens_list.append(PassagemPeriodo(
-                numero=passagem.numero,
-                data_viagem=passagem.data_viagem,
-                horario=passagem.horario,
-                cliente_nome=cliente.nome,
-                motorista_nome=motorista.nome,
-                proprietario_nome=proprietario.nome,
-                local_embarque=local.nome,
-                cidade=cidade.nome,
-                valor=passagem.valor,
-                forma_pagamento=passagem.forma_pagamento
-            ))
-
-            # Atualiza resumos
-            resumo_motorista_dict[motorista.nome]['total'] += 1
-            resumo_motorista_dict[motorista.nome]['valor'] += passagem.valor
-            resumo_motorista_dict[motorista.nome]['proprietario'] = proprietario.nome
-
-            resumo_pagamento_dict[passagem.forma_pagamento]['total'] += 1
-            resumo_pagamento_dict[passagem.forma_pagamento]['valor'] += passagem.valor
-
-        # Monta resumos
-        resumo_motorista = [
-            ResumoMotorista(
-                motorista_nome=nome,
-                proprietario_nome=data['proprietario'],
-                total_passagens=data['total'],
-                valor_total=data['valor']
-            )
-            for nome, data in resumo_motorista_dict.items()
-        ]
-
-        resumo_pagamento = [
-            ResumoFormaPagamento(
-                forma_pagamento=forma,
-                total_passagens=data['total'],
-                valor_total=data['valor']
-            )
-            for forma, data in resumo_pagamento_dict.items()
-        ]
+        # Resumos agregados no banco
+        resumo_motorista, resumo_pagamento = self._resumos_periodo(db, data_inicio, data_fim)
 
         total_valor = sum(p.valor for p in passagens_list)
 
@@ -194,6 +158,211 @@ class RelatorioService:
             resumo_por_forma_pagamento=resumo_pagamento
         )
 
+    def _consulta_periodo(self, data_inicio: date, data_fim: date):
+        """
+        Monta o SELECT das passagens do período com os nomes já resolvidos
+
+        Inclui EMITIDA e UTILIZADA (histórico). As colunas têm os mesmos
+        nomes dos campos de PassagemPeriodo.
+        """
+        return select(
+            Passagem.numero.label("numero"),
+            Passagem.data_viagem.label("data_viagem"),
+            Passagem.horario.label("horario"),
+            Cliente.nome.label("cliente_nome"),
+            Motorista.nome.label("motorista_nome"),
+            Proprietario.nome.label("proprietario_nome"),
+            LocalEmbarque.nome.label("local_embarque"),
+            Cidade.nome.label("cidade"),
+            Passagem.valor.label("valor"),
+            Passagem.forma_pagamento.label("forma_pagamento")
+        ).join(
+            Cliente, Cliente.id == Passagem.cliente_id
+        ).join(
+            Motorista, Motorista.id == Passagem.motorista_id
+        ).join(
+            Proprietario, Proprietario.id == Motorista.proprietario_id
+        ).join(
+            LocalEmbarque, LocalEmbarque.id == Passagem.local_embarque_id
+        ).join(
+            Cidade, Cidade.id == LocalEmbarque.cidade_id
+        ).where(
+            Passagem.data_viagem >= data_inicio,
+            Passagem.data_viagem <= data_fim,
+            Passagem.status.in_(["EMITIDA", "UTILIZADA"])
+        ).order_by(Passagem.data_viagem, Passagem.horario, Passagem.numero)
+
+    def _resumos_periodo(
+        self,
+        db: Session,
+        data_inicio: date,
+        data_fim: date
+    ) -> Tuple[List[ResumoMotorista], List[ResumoFormaPagamento]]:
+        """
+        Resumos por motorista e por forma de pagamento do período
+
+        Somados por GROUP BY em resumos_diarios, que conta as passagens não
+        canceladas (EMITIDA e UTILIZADA, as mesmas da lista) pela data da
+        viagem. Linhas zeradas por cancelamentos ficam de fora.
+
+        Args:
+            db: Sessão do banco de dados
+            data_inicio: Data inicial
+            data_fim: Data final
+
+        Returns:
+            Tupla (resumo por motorista, resumo por forma de pagamento)
+        """
+        no_periodo = (ResumoDiario.data >= data_inicio, ResumoDiario.data <= data_fim)
+        total = func.sum(ResumoDiario.total_passagens)
+        valor = func.sum(ResumoDiario.valor_total)
+
+        por_motorista = db.execute(
+            select(
+                Motorista.nome.label("motorista_nome"),
+                Proprietario.nome.label("proprietario_nome"),
+                total.label("total_passagens"),
+                valor.label("valor_total")
+            ).join(
+                Motorista, Motorista.id == ResumoDiario.motorista_id
+            ).join(
+                Proprietario, Proprietario.id == Motorista.proprietario_id
+            ).where(*no_periodo).group_by(
+                Motorista.id, Motorista.nome, Proprietario.nome
+            ).having(total > 0).order_by(Motorista.nome)
+        ).all()
+
+        por_forma = db.execute(
+            select(
+                ResumoDiario.forma_pagamento.label("forma_pagamento"),
+                total.label("total_passagens"),
+                valor.label("valor_total")
+            ).where(*no_periodo).group_by(
+                ResumoDiario.forma_pagamento
+            ).having(total > 0).order_by(ResumoDiario.forma_pagamento)
+        ).all()
+
+        return (
+            [ResumoMotorista(**linha._mapping) for linha in por_motorista],
+            [ResumoFormaPagamento(**linha._mapping) for linha in por_forma]
+        )
+
+    def exportar_relatorio_periodo(
+        self,
+        data_inicio: date,
+        data_fim: date,
+        formato: str = "ndjson"
+    ) -> Iterator[str]:
+        """
+        Gera o relatório por período em partes, para StreamingResponse
+
+        Percorre as passagens com cursor no servidor (yield_per), em lotes
+        de TAMANHO_LOTE_EXPORTACAO, sem mantê-las em memória. Os resumos
+        por motorista e por forma de pagamento, enviados ao final, vêm de
+        resumos_diarios (ver _resumos_periodo).
+
+        Abre a própria sessão, porque o corpo da resposta é consumido
+        depois que as dependências da rota já foram finalizadas.
+
+        Formatos:
+            ndjson: uma linha JSON por registro, com campo "tipo"
+                (passagem, resumo_motorista, resumo_forma_pagamento, totais)
+            csv: passagens e, após uma linha em branco, as seções de resumo
+
+        Args:
+            data_inicio: Data inicial
+            data_fim: Data final
+            formato: "ndjson" ou "csv"
+
+        Yields:
+            Trechos de texto do relatório
+        """
+        total_passagens = 0
+        valor_total = Decimal('0')
+
+        escrever, finalizar = self._escritor_exportacao(formato)
+
+        db = SessionLocal()
+        try:
+            consulta = self._consulta_periodo(data_inicio, data_fim).execution_options(
+                yield_per=TAMANHO_LOTE_EXPORTACAO
+            )
+            resultado = db.execute(consulta)
+
+            cabecalho = escrever("cabecalho_passagem", CAMPOS_PASSAGEM_PERIODO)
+            if cabecalho:
+                yield cabecalho
+
+            for lote in resultado.partitions():
+                trechos = []
+                for linha in lote:
+                    trechos.append(escrever("passagem", linha._mapping))
+                    total_passagens += 1
+                    valor_total += linha.valor
+                yield "".join(trechos)
+
+            resumo_motorista, resumo_pagamento = self._resumos_periodo(db, data_inicio, data_fim)
+        finally:
+            db.close()
+
+        yield finalizar(
+            [r.model_dump() for r in resumo_motorista],
+            [r.model_dump() for r in resumo_pagamento],
+            {
+                "data_inicio": data_inicio,
+                "data_fim": data_fim,
+                "total_passagens": total_passagens,
+                "total_passageiros": total_passagens,
+                "valor_total": valor_total
+            }
+        )
+
+    def _escritor_exportacao(self, formato: str):
+        """
+        Retorna as funções (escrever, finalizar) do formato de exportação
+
+        escrever(tipo, registro) devolve o texto de um registro e
+        finalizar(resumo_motorista, resumo_pagamento, totais) devolve o
+        texto das seções de resumo.
+        """
+        if formato == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+
+            def _linhas(*rows) -> str:
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                return buffer.getvalue()
+
+            def escrever(tipo: str, registro) -> str:
+                if tipo == "cabecalho_passagem":
+                    return _linhas(registro)
+                return _linhas([registro[campo] for campo in CAMPOS_PASSAGEM_PERIODO])
+
+            def finalizar(resumo_motorista, resumo_pagamento, totais) -> str:
+                rows = [[], ["resumo_por_motorista"], list(CAMPOS_RESUMO_MOTORISTA)]
+                rows += [[r[c] for c in CAMPOS_RESUMO_MOTORISTA] for r in resumo_motorista]
+                rows += [[], ["resumo_por_forma_pagamento"], list(CAMPOS_RESUMO_PAGAMENTO)]
+                rows += [[r[c] for c in CAMPOS_RESUMO_PAGAMENTO] for r in resumo_pagamento]
+                rows += [[], ["totais"], list(totais.keys()), list(totais.values())]
+                return _linhas(*rows)
+
+            return escrever, finalizar
+
+        def escrever(tipo: str, registro) -> str:
+            if tipo == "cabecalho_passagem":
+                return ""
+            return json.dumps({"tipo": tipo, **registro}, default=str, ensure_ascii=False) + "\n"
+
+        def finalizar(resumo_motorista, resumo_pagamento, totais) -> str:
+            trechos = [escrever("resumo_motorista", r) for r in resumo_motorista]
+            trechos += [escrever("resumo_forma_pagamento", r) for r in resumo_pagamento]
+            trechos.append(escrever("totais", totais))
+            return "".join(trechos)
+
+        return escrever, finalizar
+
     def gerar_relatorio_motorista(
         self,
         db: Session,
@@ -214,11 +383,11 @@ class RelatorioService:
             Relatório do motorista
         """
         # Busca motorista
-        motorista = db.query(Motorista).filter(Motorista.id == motorista_id).first()
+        motorista = catalogo_service.motorista(motorista_id)
         if not motorista:
             raise ValueError("Motorista não encontrado")
 
-        proprietario = db.query(Proprietario).filter(Proprietario.id == motorista.proprietario_id).first()
+        proprietario = catalogo_service.proprietario(motorista.proprietario_id)
 
         # Busca passagens do motorista no período (inclui EMITIDA e UTILIZADA para histórico)
         passagens = db.query(Passagem).filter(
@@ -233,7 +402,7 @@ class RelatorioService:
 
         for passagem in passagens:
             cliente = db.query(Cliente).filter(Cliente.id == passagem.cliente_id).first()
-            local = db.query(LocalEmbarque).filter(LocalEmbarque.id == passagem.local_embarque_id).first()
+            local = catalogo_service.local(passagem.local_embarque_id)
 
             viagens_dict[passagem.data_viagem][passagem.horario].append({
                 'cliente': cliente.nome,
@@ -0,0 +1,148 @@
+"""
+Serviço de Resumo Diário - Expresso Embuibe
+Mantém a tabela resumos_diarios consolidada a partir das passagens
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+from ..models.passagem import Passagem
+from ..models.local_embarque import LocalEmbarque
+from ..models.resumo_diario import ResumoDiario
+
+
+class ResumoService:
+    """Serviço de manutenção do resumo diário"""
+
+    def registrar(
+        self,
+        db: Session,
+        data: date,
+        motorista_id: int,
+        forma_pagamento: str,
+        cidade_id: int,
+        delta_passagens: int,
+        delta_valor: Decimal
+    ):
+        """
+        Soma um delta na linha do resumo, criando-a se necessário
+
+        Usa INSERT ... ON CONFLICT DO UPDATE, então emissões simultâneas
+        não perdem incrementos. Roda na transação da sessão recebida.
+
+        Args:
+            db: Sessão do banco de dados
+            data: Data da viagem
+            motorista_id: ID do motorista
+            forma_pagamento: Forma de pagamento
+            cidade_id: ID da cidade do local de embarque
+            delta_passagens: Quantidade a adicionar/remover (pode ser negativo)
+            delta_valor: Valor a adicionar/remover (pode ser negativo)
+        """
+        dialeto = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+
+        stmt = dialeto.insert(ResumoDiario).values(
+            data=data,
+            motorista_id=motorista_id,
+            forma_pagamento=forma_pagamento,
+            cidade_id=cidade_id,
+            total_passagens=delta_passagens,
+            valor_total=delta_valor
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["data", "motorista_id", "forma_pagamento", "cidade_id"],
+            set_={
+                "total_passagens": ResumoDiario.total_passagens + stmt.excluded.total_passagens,
+                "valor_total": ResumoDiario.valor_total + stmt.excluded.valor_total,
+            }
+        )
+        db.execute(stmt)
+
+    def registrar_passagem(self, db: Session, passagem: Passagem, cidade_id: int, sinal: int = 1):
+        """
+        Soma (sinal=1) ou subtrai (sinal=-1) uma passagem do resumo
+
+        Args:
+            db: Sessão do banco de dados
+            passagem: Passagem com data, motorista e forma de pagamento atuais
+            cidade_id: ID da cidade do local de embarque da passagem
+            sinal: 1 para incluir, -1 para remover
+        """
+        self.registrar(
+            db=db,
+            data=passagem.data_viagem,
+            motorista_id=passagem.motorista_id,
+            forma_pagamento=passagem.forma_pagamento,
+            cidade_id=cidade_id,
+            delta_passagens=sinal,
+            delta_valor=sinal * passagem.valor
+        )
+
+    def reconstruir(
+        self,
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> int:
+        """
+        Recalcula o resumo a partir das passagens com um INSERT ... SELECT
+
+        Usado após importações que não passam pela emissão
+        (migrate_historico.py). Não faz commit.
+
+        Args:
+            db: Sessão do banco de dados
+            data_inicio: Data inicial (opcional, padrão: todo o histórico)
+            data_fim: Data final (opcional)
+
+        Returns:
+            Quantidade de linhas gravadas no resumo
+        """
+        apagar = db.query(ResumoDiario)
+        if data_inicio:
+            apagar = apagar.filter(ResumoDiario.data >= data_inicio)
+        if data_fim:
+            apagar = apagar.filter(ResumoDiario.data <= data_fim)
+        apagar.delete(synchronize_session=False)
+
+        consulta = select(
+            Passagem.data_viagem,
+            Passagem.motorista_id,
+            Passagem.forma_pagamento,
+            LocalEmbarque.cidade_id,
+            func.count(Passagem.id),
+            func.sum(Passagem.valor)
+        ).join(
+            LocalEmbarque, LocalEmbarque.id == Passagem.local_embarque_id
+        ).where(Passagem.status != "CANCELADA")
+
+        if data_inicio:
+            consulta = consulta.where(Passagem.data_viagem >= data_inicio)
+        if data_fim:
+            consulta = consulta.where(Passagem.data_viagem <= data_fim)
+
+        consulta = consulta.group_by(
+            Passagem.data_viagem,
+            Passagem.motorista_id,
+            Passagem.forma_pagamento,
+            LocalEmbarque.cidade_id
+        )
+
+        resultado = db.execute(insert(ResumoDiario).from_select(
+            ["data", "motorista_id", "forma_pagamento", "cidade_id", "total_passagens", "valor_total"],
+            consulta
+        ))
+
+        return resultado.rowcount
+
+    def precisa_reconstruir(self, db: Session) -> bool:
+        """Indica se há passagens mas o resumo ainda está vazio"""
+        tem_resumo = db.query(ResumoDiario.id).first() is not None
+        tem_passagens = db.query(Passagem.id).first() is not None
+        return tem_passagens and not tem_resumo
+
+
+# Instância global do serviço
+resumo_service = ResumoService()
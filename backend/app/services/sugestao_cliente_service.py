@@ -0,0 +1,275 @@
+"""
+Serviço de Sugestões de Clientes - Expresso Embuibe
+Autocomplete por prefixo de nome ou telefone, servido da memória
+"""
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from ..config import settings
+from ..database import engine
+from ..models.cliente import Cliente
+from ..utils.texto import normalizar_busca, somente_digitos
+
+# Releitura de alterações: volta um pouco antes da última vista, para não
+# perder transações que começaram antes e terminaram depois da última leitura
+MARGEM_SINCRONIZACAO = timedelta(minutes=2)
+
+
+class SugestaoCliente(NamedTuple):
+    id: int
+    nome: str
+    telefone: str
+    cidade: str
+    bairro: Optional[str]
+
+
+class IndicePrefixo:
+    """
+    Chaves ordenadas (com o ID ao lado) e busca por prefixo via bisect
+
+    Todas as chaves que começam com um prefixo ficam contíguas: a busca
+    acha a primeira com bisect e lê as seguintes até o prefixo deixar de
+    casar. Chaves e IDs ficam em listas paralelas, ordenadas por
+    (chave, id), que ocupam bem menos memória que uma lista de tuplas.
+    """
+
+    def __init__(self, pares: List[Tuple[str, int]] = ()):
+        pares = sorted(pares)
+        self._chaves = [chave for chave, _ in pares]
+        self._ids = array("q", (item_id for _, item_id in pares))
+
+    def __len__(self) -> int:
+        return len(self._chaves)
+
+    def _posicao(self, chave: str, item_id: int) -> int:
+        """Posição de (chave, id) na ordem, existindo ou não"""
+        posicao = bisect_left(self._chaves, chave)
+        while (posicao < len(self._chaves) and self._chaves[posicao] == chave
+               and self._ids[posicao] < item_id):
+            posicao += 1
+        return posicao
+
+    def inserir(self, chave: str, item_id: int):
+        posicao = self._posicao(chave, item_id)
+        self._chaves.insert(posicao, chave)
+        self._ids.insert(posicao, item_id)
+
+    def remover(self, chave: str, item_id: int):
+        posicao = self._posicao(chave, item_id)
+        if (posicao < len(self._chaves) and self._chaves[posicao] == chave
+                and self._ids[posicao] == item_id):
+            del self._chaves[posicao]
+            del self._ids[posicao]
+
+    def buscar(self, prefixo: str, limite: int) -> List[int]:
+        """IDs das primeiras `limite` chaves (em ordem) que começam com o prefixo"""
+        ids = []
+        posicao = bisect_left(self._chaves, prefixo)
+        while posicao < len(self._chaves) and len(ids) < limite:
+            if not self._chaves[posicao].startswith(prefixo):
+                break
+            ids.append(self._ids[posicao])
+            posicao += 1
+        return ids
+
+
+class SugestaoClienteService:
+    """
+    Índice em memória dos clientes ativos para o autocomplete
+
+    Mantém dois índices ordenados: nome normalizado (sem acentos,
+    minúsculo) e telefone só com dígitos. A busca é um bisect na lista,
+    sem ir ao banco. O próprio processo atualiza o índice ao criar,
+    alterar ou desativar clientes; alterações feitas por outros processos
+    são lidas pela coluna updated_at a cada SUGESTOES_VERIFICACAO_SEGUNDOS,
+    em uma thread de fundo disparada pela busca: a requisição nunca
+    espera o banco. O lock protege só os índices em memória; as leituras
+    do banco acontecem fora dele.
+    """
+
+    def __init__(self, bind: Engine = None, intervalo_verificacao: float = None):
+        self.bind = bind or engine
+        self.intervalo_verificacao = (
+            settings.SUGESTOES_VERIFICACAO_SEGUNDOS
+            if intervalo_verificacao is None else intervalo_verificacao
+        )
+        self._lock = threading.Lock()
+        self._registros: Optional[Dict[int, SugestaoCliente]] = None
+        self._nomes = IndicePrefixo()
+        self._telefones = IndicePrefixo()
+        self._ultima_alteracao = None
+        self._verificado_em = 0.0
+        self._atualizando = False
+
+    def sugerir(self, prefixo: str, limite: int = 10) -> List[SugestaoCliente]:
+        """
+        Clientes cujo nome ou telefone começa com o prefixo
+
+        Se o prefixo tiver letras, busca pelo nome (ignorando acentos e
+        maiúsculas); se tiver só números e pontuação, pelo telefone.
+
+        Args:
+            prefixo: Texto digitado
+            limite: Quantidade máxima de sugestões
+
+        Returns:
+            Sugestões em ordem alfabética (ou de telefone); vazio enquanto
+            o índice não foi carregado
+        """
+        nome = normalizar_busca(prefixo)
+        digitos = somente_digitos(prefixo)
+        if not nome:
+            return []
+
+        self._agendar_atualizacao()
+
+        with self._lock:
+            if self._registros is None:
+                return []
+            if any(c.isalpha() for c in nome):
+                ids = self._nomes.buscar(nome, limite)
+            elif digitos:
+                ids = self._telefones.buscar(digitos, limite)
+            else:
+                ids = []
+            return [self._registros[i] for i in ids]
+
+    def carregar(self):
+        """Monta o índice com todos os clientes ativos"""
+        registros, nomes, telefones, ultima = self._ler_todos()
+        with self._lock:
+            self._registros = registros
+            self._nomes = IndicePrefixo(nomes)
+            self._telefones = IndicePrefixo(telefones)
+            self._ultima_alteracao = ultima
+            self._verificado_em = time.monotonic()
+
+    def atualizar(self, cliente: Cliente):
+        """
+        Aplica no índice um cliente criado/alterado/desativado
+
+        Chamado após o commit. Clientes inativos saem do índice.
+        """
+        with self._lock:
+            if self._registros is not None:
+                self._aplicar(
+                    cliente.id, cliente.nome, cliente.telefone, cliente.cidade,
+                    cliente.bairro, cliente.ativo
+                )
+
+    def _agendar_atualizacao(self):
+        """Dispara em segundo plano a carga inicial ou a leitura de alterações vencida"""
+        if self._registros is not None and time.monotonic() - self._verificado_em < self.intervalo_verificacao:
+            return
+
+        with self._lock:
+            if self._atualizando:
+                return
+            self._atualizando = True
+        threading.Thread(target=self._atualizar_em_segundo_plano, name="sugestoes-clientes", daemon=True).start()
+
+    def _atualizar_em_segundo_plano(self):
+        try:
+            if self._registros is None:
+                self.carregar()
+            else:
+                self._sincronizar()
+        except Exception as e:
+            print(f"Aviso: falha ao atualizar as sugestões de clientes: {e}")
+        finally:
+            with self._lock:
+                # Também após falha: tenta de novo só no próximo intervalo
+                self._verificado_em = time.monotonic()
+                self._atualizando = False
+
+    def _colunas(self):
+        return select(
+            Cliente.id, Cliente.nome, Cliente.telefone, Cliente.cidade,
+            Cliente.bairro, Cliente.ativo, Cliente.updated_at,
+            Cliente.nome_busca, Cliente.telefone_digitos
+        )
+
+    def _ler_todos(self) -> tuple:
+        """Leitura completa: (registros, chaves de nome, chaves de telefone, última alteração)"""
+        registros = {}
+        nomes = []
+        telefones = []
+        ultima = None
+
+        with self.bind.connect() as conn:
+            linhas = conn.execution_options(yield_per=5000).execute(
+                self._colunas().where(Cliente.ativo == True)
+            )
+            for id_, nome, telefone, cidade, bairro, _, atualizado, chave_nome, chave_telefone in linhas:
+                # Chaves já normalizadas no banco (busca_cliente_service)
+                if chave_nome is None or chave_telefone is None:
+                    chave_nome, chave_telefone = self._chaves(nome, telefone)
+                if chave_telefone == telefone:
+                    chave_telefone = telefone  # Telefone já limpo: evita uma cópia
+                registros[id_] = self._registro(id_, nome, telefone, cidade, bairro)
+                nomes.append((chave_nome, id_))
+                telefones.append((chave_telefone, id_))
+                if atualizado is not None and (ultima is None or atualizado > ultima):
+                    ultima = atualizado
+
+        return registros, nomes, telefones, ultima
+
+    def _sincronizar(self):
+        """
+        Aplica clientes alterados desde a última leitura
+
+        Uma alteração aplicada por atualizar() enquanto a consulta roda
+        pode ser sobrescrita pela linha lida antes dela; a margem de
+        MARGEM_SINCRONIZACAO faz a próxima sincronização relê-la.
+        """
+        consulta = self._colunas()
+        ultima = self._ultima_alteracao
+        if ultima is not None:
+            consulta = consulta.where(Cliente.updated_at >= ultima - MARGEM_SINCRONIZACAO)
+
+        with self.bind.connect() as conn:
+            linhas = conn.execute(consulta).all()
+
+        with self._lock:
+            for id_, nome, telefone, cidade, bairro, ativo, atualizado, _, _ in linhas:
+                self._aplicar(id_, nome, telefone, cidade, bairro, ativo)
+                if atualizado is not None and (self._ultima_alteracao is None or atualizado > self._ultima_alteracao):
+                    self._ultima_alteracao = atualizado
+
+    def _aplicar(self, id_, nome, telefone, cidade, bairro, ativo):
+        """Substitui/remove um cliente nos índices (chamado com o lock)"""
+        anterior = self._registros.pop(id_, None)
+        if anterior is not None:
+            chave_nome, chave_telefone = self._chaves(anterior.nome, anterior.telefone)
+            self._nomes.remover(chave_nome, id_)
+            self._telefones.remover(chave_telefone, id_)
+
+        if ativo:
+            chave_nome, chave_telefone = self._chaves(nome, telefone)
+            self._registros[id_] = self._registro(id_, nome, telefone, cidade, bairro)
+            self._nomes.inserir(chave_nome, id_)
+            self._telefones.inserir(chave_telefone, id_)
+
+    @staticmethod
+    def _chaves(nome: str, telefone: str) -> Tuple[str, str]:
+        """Chaves de busca (mesma normalização das colunas nome_busca/telefone_digitos)"""
+        return normalizar_busca(nome), somente_digitos(telefone)
+
+    @staticmethod
+    def _registro(id_, nome, telefone, cidade, bairro) -> SugestaoCliente:
+        # Cidades e bairros se repetem muito: uma cópia de cada texto
+        return SugestaoCliente(
+            id_, nome, telefone,
+            sys.intern(cidade) if cidade else cidade,
+            sys.intern(bairro) if bairro else bairro
+        )
+
+
+# Instância global do serviço
+sugestao_cliente_service = SugestaoClienteService()
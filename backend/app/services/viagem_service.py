@@ -0,0 +1,405 @@
+"""
+Serviço de Viagens - Expresso Embuibe
+Controla a ocupação das viagens (vagas do motorista) sem perder incrementos
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import Select, and_, case, delete, exists, func, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import date, time
+from decimal import Decimal
+from typing import List, NamedTuple, Optional
+from ..models.motorista import Motorista
+from ..models.passagem import Passagem
+from ..models.viagem import Viagem
+
+# Diferença de valor abaixo de meio centavo é arredondamento (SQLite soma em REAL)
+TOLERANCIA_VALOR = Decimal("0.005")
+
+
+class DivergenciaViagem(NamedTuple):
+    """Viagem cujos contadores não batem com as passagens"""
+    data: date
+    horario: time
+    motorista_id: int
+    situacao: str  # DIVERGENTE (totais diferentes) ou SEM_VIAGEM (passagens sem linha em viagens)
+    registrado_passageiros: int
+    calculado_passageiros: int
+    registrado_valor: Decimal
+    calculado_valor: Decimal
+
+
+class Conciliacao(NamedTuple):
+    """Resultado da conciliação das viagens com as passagens"""
+    viagens_no_periodo: int
+    divergentes: int
+    sem_viagem: int
+    diferenca_passageiros: int  # Calculado - registrado, somado
+    diferenca_valor: Decimal
+    corrigidas: int  # Viagens gravadas pela correção (0 se só conferiu)
+    exemplos: List[DivergenciaViagem]
+
+
+class ViagemService:
+    """
+    Serviço de ocupação de viagens
+
+    Os contadores da viagem nunca são lidos e regravados pela aplicação:
+    reserva e liberação são um único UPDATE relativo, e a reserva só
+    acontece se couber nas vagas do motorista (WHERE total + n <= vagas).
+    O UPDATE trava a linha da viagem até o commit, então vendas
+    simultâneas para a mesma viagem são serializadas pelo banco.
+    """
+
+    def reservar_vagas(
+        self,
+        db: Session,
+        data: date,
+        horario: time,
+        motorista_id: int,
+        quantidade: int,
+        valor: Decimal,
+        atendente_id: int
+    ) -> bool:
+        """
+        Ocupa vagas na viagem, criando a viagem se necessário
+
+        Roda na transação da sessão recebida (não faz commit).
+
+        Args:
+            db: Sessão do banco de dados
+            data: Data da viagem
+            horario: Horário da viagem
+            motorista_id: ID do motorista
+            quantidade: Quantidade de passageiros
+            valor: Valor total das passagens
+            atendente_id: ID do atendente (usado se a viagem for criada)
+
+        Returns:
+            True se as vagas foram reservadas, False se a viagem está lotada
+        """
+        dialeto = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+
+        # Garante a linha da viagem (a constraint única evita duplicadas)
+        db.execute(
+            dialeto.insert(Viagem).values(
+                data=data,
+                horario=horario,
+                motorista_id=motorista_id,
+                total_passageiros=0,
+                valor_total=0,
+                atendente_id=atendente_id,
+                status="PENDENTE"
+            ).on_conflict_do_nothing(
+                index_elements=["data", "horario", "motorista_id"]
+            )
+        )
+
+        vagas = select(Motorista.vagas).where(
+            Motorista.id == motorista_id
+        ).scalar_subquery()
+
+        resultado = db.execute(
+            update(Viagem)
+            .where(
+                Viagem.data == data,
+                Viagem.horario == horario,
+                Viagem.motorista_id == motorista_id,
+                Viagem.total_passageiros + quantidade <= vagas
+            )
+            .values(
+                total_passageiros=Viagem.total_passageiros + quantidade,
+                valor_total=Viagem.valor_total + valor
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        return resultado.rowcount == 1
+
+    def liberar_vagas(
+        self,
+        db: Session,
+        data: date,
+        horario: time,
+        motorista_id: int,
+        quantidade: int,
+        valor: Decimal
+    ):
+        """
+        Devolve vagas da viagem (cancelamento/transferência)
+
+        Remove a viagem se ela ficar sem passageiros. Roda na transação
+        da sessão recebida (não faz commit).
+
+        Args:
+            db: Sessão do banco de dados
+            data: Data da viagem
+            horario: Horário da viagem
+            motorista_id: ID do motorista
+            quantidade: Quantidade de passageiros
+            valor: Valor total das passagens
+        """
+        filtro = (
+            Viagem.data == data,
+            Viagem.horario == horario,
+            Viagem.motorista_id == motorista_id
+        )
+
+        db.execute(
+            update(Viagem)
+            .where(*filtro)
+            .values(
+                total_passageiros=Viagem.total_passageiros - quantidade,
+                valor_total=Viagem.valor_total - valor
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            delete(Viagem)
+            .where(*filtro, Viagem.total_passageiros <= 0)
+            .execution_options(synchronize_session=False)
+        )
+
+    def ocupacao(self, db: Session, data: date, horario: time, motorista_id: int) -> tuple[int, int]:
+        """
+        Retorna (passageiros na viagem, vagas do motorista)
+
+        Usado para montar mensagens de viagem lotada.
+        """
+        ocupadas = db.query(Viagem.total_passageiros).filter(
+            Viagem.data == data,
+            Viagem.horario == horario,
+            Viagem.motorista_id == motorista_id
+        ).scalar() or 0
+        vagas = db.query(Motorista.vagas).filter(Motorista.id == motorista_id).scalar() or 0
+        return ocupadas, vagas
+
+    def _periodo_viagens(self, data_inicio: Optional[date], data_fim: Optional[date]) -> list:
+        """Filtros de período sobre Viagem.data"""
+        filtros = []
+        if data_inicio:
+            filtros.append(Viagem.data >= data_inicio)
+        if data_fim:
+            filtros.append(Viagem.data <= data_fim)
+        return filtros
+
+    def _totais_passagens(self, data_inicio: Optional[date], data_fim: Optional[date]) -> Select:
+        """
+        Totais das passagens não canceladas por viagem (data, horario, motorista_id)
+
+        Colunas: data, horario, motorista_id, total_passageiros,
+        valor_total e atendente_id (menor atendente, usado em viagens novas).
+        """
+        filtros = [Passagem.status != "CANCELADA"]
+        if data_inicio:
+            filtros.append(Passagem.data_viagem >= data_inicio)
+        if data_fim:
+            filtros.append(Passagem.data_viagem <= data_fim)
+
+        return select(
+            Passagem.data_viagem.label("data"),
+            Passagem.horario.label("horario"),
+            Passagem.motorista_id.label("motorista_id"),
+            func.count(Passagem.id).label("total_passageiros"),
+            func.sum(Passagem.valor).label("valor_total"),
+            func.min(Passagem.atendente_id).label("atendente_id")
+        ).where(*filtros).group_by(
+            Passagem.data_viagem,
+            Passagem.horario,
+            Passagem.motorista_id
+        )
+
+    def reconstruir(
+        self,
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> int:
+        """
+        Recalcula passageiros e valor das viagens a partir das passagens
+
+        Um INSERT ... SELECT ... GROUP BY (data, horario, motorista_id) com
+        upsert grava os totais das passagens não canceladas; viagens do
+        período sem nenhuma passagem válida são removidas, como em
+        liberar_vagas. Usado após
+        importações que não passam pela emissão. Viagens criadas aqui
+        ficam com status SAIU quando já passaram; viagens que já batem
+        não são regravadas. Não faz commit.
+
+        Args:
+            db: Sessão do banco de dados
+            data_inicio: Data inicial (opcional, padrão: todo o histórico)
+            data_fim: Data final (opcional)
+
+        Returns:
+            Quantidade de viagens gravadas (criadas, corrigidas ou removidas)
+        """
+        dialeto = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+
+        # Status das viagens novas: SAIU quando a data já passou
+        consulta = self._totais_passagens(data_inicio, data_fim).add_columns(
+            case((Passagem.data_viagem < date.today(), literal("SAIU")), else_=literal("PENDENTE"))
+        )
+
+        stmt = dialeto.insert(Viagem).from_select(
+            ["data", "horario", "motorista_id", "total_passageiros", "valor_total", "atendente_id", "status"],
+            consulta
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["data", "horario", "motorista_id"],
+            set_={
+                "total_passageiros": stmt.excluded.total_passageiros,
+                "valor_total": stmt.excluded.valor_total,
+            },
+            # Viagens que já batem não são regravadas
+            where=or_(
+                Viagem.total_passageiros != stmt.excluded.total_passageiros,
+                func.abs(Viagem.valor_total - stmt.excluded.valor_total) >= TOLERANCIA_VALOR
+            )
+        )
+        gravadas = db.execute(stmt).rowcount
+
+        # Viagens que ficaram sem passagens válidas (todas canceladas ou transferidas)
+        gravadas += db.execute(
+            delete(Viagem)
+            .where(
+                *self._periodo_viagens(data_inicio, data_fim),
+                ~exists().where(and_(
+                    Passagem.data_viagem == Viagem.data,
+                    Passagem.horario == Viagem.horario,
+                    Passagem.motorista_id == Viagem.motorista_id,
+                    Passagem.status != "CANCELADA"
+                ))
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        return gravadas
+
+    def conciliar(
+        self,
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        corrigir: bool = True,
+        limite_exemplos: int = 50
+    ) -> Conciliacao:
+        """
+        Confere os contadores das viagens com as passagens e corrige
+
+        total_passageiros e valor_total são mantidos incrementalmente pela
+        emissão, cancelamento e transferência; importações e falhas que
+        não passam por esses caminhos os deixam errados. A conferência é
+        feita no banco, em duas consultas sobre os totais agrupados das
+        passagens (viagens com totais diferentes e passagens sem viagem);
+        a correção é o upsert de reconstruir. Conferência e correção rodam
+        na mesma transação. Não faz commit.
+
+        Args:
+            db: Sessão do banco de dados
+            data_inicio: Data inicial (opcional, padrão: todo o histórico)
+            data_fim: Data final (opcional)
+            corrigir: False para só conferir, sem gravar
+            limite_exemplos: Quantidade máxima de divergências listadas
+
+        Returns:
+            Contagem e soma das divergências, viagens corrigidas e as
+            primeiras divergências por data e horário
+        """
+        totais = self._totais_passagens(data_inicio, data_fim).cte("totais")
+        mesma_viagem = and_(
+            totais.c.data == Viagem.data,
+            totais.c.horario == Viagem.horario,
+            totais.c.motorista_id == Viagem.motorista_id
+        )
+        calculado_passageiros = func.coalesce(totais.c.total_passageiros, 0)
+        calculado_valor = func.coalesce(totais.c.valor_total, 0)
+
+        # Viagens registradas cujos contadores diferem das passagens, ou
+        # que não têm nenhuma passagem válida (já zeradas, mas que não
+        # deveriam existir: reconstruir as remove)
+        divergentes = select(
+            Viagem.data.label("data"),
+            Viagem.horario.label("horario"),
+            Viagem.motorista_id.label("motorista_id"),
+            literal("DIVERGENTE").label("situacao"),
+            Viagem.total_passageiros.label("registrado_passageiros"),
+            calculado_passageiros.label("calculado_passageiros"),
+            Viagem.valor_total.label("registrado_valor"),
+            calculado_valor.label("calculado_valor")
+        ).select_from(Viagem).outerjoin(totais, mesma_viagem).where(
+            *self._periodo_viagens(data_inicio, data_fim),
+            or_(
+                totais.c.total_passageiros.is_(None),
+                Viagem.total_passageiros != calculado_passageiros,
+                func.abs(Viagem.valor_total - calculado_valor) >= TOLERANCIA_VALOR
+            )
+        )
+
+        # Passagens válidas de viagens que não existem em viagens
+        sem_viagem = select(
+            totais.c.data,
+            totais.c.horario,
+            totais.c.motorista_id,
+            literal("SEM_VIAGEM"),
+            literal(0),
+            totais.c.total_passageiros,
+            literal(0),
+            totais.c.valor_total
+        ).where(~exists().where(mesma_viagem))
+
+        divergencias = divergentes.union_all(sem_viagem).subquery("divergencias")
+
+        contagens = {situacao: (quantidade, passageiros, valor) for situacao, quantidade, passageiros, valor in db.execute(
+            select(
+                divergencias.c.situacao,
+                func.count(),
+                func.sum(divergencias.c.calculado_passageiros - divergencias.c.registrado_passageiros),
+                func.sum(divergencias.c.calculado_valor - divergencias.c.registrado_valor)
+            ).group_by(divergencias.c.situacao)
+        )}
+
+        exemplos = [
+            DivergenciaViagem(
+                data=linha.data,
+                horario=linha.horario,
+                motorista_id=linha.motorista_id,
+                situacao=linha.situacao,
+                registrado_passageiros=linha.registrado_passageiros,
+                calculado_passageiros=linha.calculado_passageiros,
+                registrado_valor=_centavos(linha.registrado_valor),
+                calculado_valor=_centavos(linha.calculado_valor)
+            )
+            for linha in db.execute(
+                select(divergencias).order_by(
+                    divergencias.c.data, divergencias.c.horario, divergencias.c.motorista_id
+                ).limit(limite_exemplos)
+            )
+        ] if contagens else []
+
+        viagens_no_periodo = db.execute(
+            select(func.count(Viagem.id)).where(*self._periodo_viagens(data_inicio, data_fim))
+        ).scalar()
+
+        corrigidas = 0
+        if corrigir and contagens:
+            corrigidas = self.reconstruir(db, data_inicio, data_fim)
+
+        nenhuma = (0, 0, 0)
+        return Conciliacao(
+            viagens_no_periodo=viagens_no_periodo,
+            divergentes=contagens.get("DIVERGENTE", nenhuma)[0],
+            sem_viagem=contagens.get("SEM_VIAGEM", nenhuma)[0],
+            diferenca_passageiros=sum(int(c[1] or 0) for c in contagens.values()),
+            diferenca_valor=_centavos(sum(Decimal(str(c[2] or 0)) for c in contagens.values())),
+            corrigidas=corrigidas,
+            exemplos=exemplos
+        )
+
+
+def _centavos(valor) -> Decimal:
+    """Valor em reais com duas casas (somas do SQLite chegam como float)"""
+    return Decimal(str(valor or 0)).quantize(Decimal("0.01"))
+
+
+# Instância global do serviço
+viagem_service = ViagemService()
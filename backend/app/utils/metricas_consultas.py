@@ -0,0 +1,168 @@
+"""
+Métricas de Consultas por Requisição - Expresso Embuibe
+Conta as consultas e o tempo de banco de cada requisição, devolve os
+números no cabeçalho Server-Timing e avisa sobre consultas repetidas (N+1)
+"""
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from ..config import settings
+
+# Listas de parâmetros (IN (?, ?, ?)) e literais numéricos viram um único "?"
+_LISTA_PARAMETROS = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+))*\s*\)")
+_NUMERO = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_ESPACOS = re.compile(r"\s+")
+
+
+def forma_consulta(statement: str) -> str:
+    """
+    Forma da consulta: o SQL sem os valores
+
+    Duas execuções com a mesma forma diferem só nos parâmetros, como
+    o mesmo db.query(...).first() dentro de um laço.
+
+    Args:
+        statement: SQL enviado ao driver
+
+    Returns:
+        SQL normalizado (espaços, listas IN e números literais)
+    """
+    forma = _ESPACOS.sub(" ", statement).strip()
+    forma = _LISTA_PARAMETROS.sub("(?)", forma)
+    return _NUMERO.sub("?", forma)
+
+
+class ConsultasRequisicao:
+    """
+    Consultas executadas durante uma requisição
+
+    Um único objeto por requisição, compartilhado pelas cópias do
+    contexto (threads do run_in_threadpool e greenlets do run_sync).
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.quantidade = 0
+        self.tempo = 0.0  # Segundos no banco
+        self.formas: Counter = Counter()
+
+    def registrar(self, statement: str, duracao: float):
+        self.quantidade += 1
+        self.tempo += duracao
+        self.formas[forma_consulta(statement)] += 1
+
+    def server_timing(self) -> str:
+        """Valor do cabeçalho Server-Timing (durações em milissegundos)"""
+        total = (time.perf_counter() - self.inicio) * 1000
+        return (
+            f'db;dur={self.tempo * 1000:.1f};desc="{self.quantidade} consultas", '
+            f"total;dur={total:.1f}"
+        )
+
+    def repetidas(self, limite: int) -> List[Tuple[str, int]]:
+        """Formas executadas mais de `limite` vezes, da mais repetida para a menos"""
+        return [(forma, vezes) for forma, vezes in self.formas.most_common() if vezes > limite]
+
+
+# Consultas da requisição em andamento (None fora de requisições HTTP)
+_consultas_atuais: ContextVar[Optional[ConsultasRequisicao]] = ContextVar("consultas_atuais", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_consulta(conn, cursor, statement, parameters, context, executemany):
+    if _consultas_atuais.get() is not None:
+        conn.info.setdefault("inicio_consultas", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_consulta(conn, cursor, statement, parameters, context, executemany):
+    consultas = _consultas_atuais.get()
+    inicios = conn.info.get("inicio_consultas")
+    if consultas is not None and inicios:
+        consultas.registrar(statement, time.perf_counter() - inicios.pop())
+
+
+class ConsultasRepetidas:
+    """
+    Formas de consulta repetidas acima do limite, por endpoint
+
+    O aviso é impresso na primeira ocorrência de cada (endpoint, forma);
+    as seguintes só incrementam o contador, consultado em
+    /api/v1/metrics/consultas-repetidas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ocorrencias: Dict[Tuple[str, str], dict] = {}
+
+    def registrar(self, endpoint: str, forma: str, vezes: int):
+        with self._lock:
+            ocorrencia = self._ocorrencias.get((endpoint, forma))
+            nova = ocorrencia is None
+            if nova:
+                ocorrencia = self._ocorrencias[(endpoint, forma)] = {
+                    "endpoint": endpoint, "consulta": forma, "requisicoes": 0, "maximo_por_requisicao": 0
+                }
+            ocorrencia["requisicoes"] += 1
+            ocorrencia["maximo_por_requisicao"] = max(ocorrencia["maximo_por_requisicao"], vezes)
+
+        if nova:
+            print(f"Aviso: possível N+1 em {endpoint}: a mesma consulta rodou {vezes} vezes na requisição: {forma[:300]}")
+
+    def dados(self) -> List[dict]:
+        with self._lock:
+            return sorted(
+                (dict(ocorrencia) for ocorrencia in self._ocorrencias.values()),
+                key=lambda o: o["maximo_por_requisicao"], reverse=True
+            )
+
+
+# Instância global do registro de consultas repetidas
+consultas_repetidas = ConsultasRepetidas()
+
+
+class ConsultasPorRequisicaoMiddleware:
+    """
+    Middleware ASGI que mede as consultas de cada requisição
+
+    Acrescenta Server-Timing (db: tempo e quantidade de consultas; total:
+    tempo até o início da resposta) e, ao fim da requisição, registra em
+    consultas_repetidas as formas executadas mais de
+    CONSULTAS_REPETIDAS_LIMITE vezes. Consultas feitas depois do início da
+    resposta (tarefas em segundo plano) entram só na verificação de N+1.
+    """
+
+    def __init__(self, app, limite: int = None):
+        self.app = app
+        self.limite = limite or settings.CONSULTAS_REPETIDAS_LIMITE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        consultas = ConsultasRequisicao()
+        token = _consultas_atuais.set(consultas)
+
+        async def enviar(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", consultas.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _consultas_atuais.reset(token)
+            repetidas = consultas.repetidas(self.limite)
+            if repetidas:
+                # Rota do FastAPI (/clientes/{cliente_id}), não o caminho com os valores
+                rota = scope.get("route")
+                endpoint = f'{scope["method"]} {getattr(rota, "path", scope["path"])}'
+                for forma, vezes in repetidas:
+                    consultas_repetidas.registrar(endpoint, forma, vezes)
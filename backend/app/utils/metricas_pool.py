@@ -0,0 +1,233 @@
+"""
+Métricas do Pool de Conexões - Expresso Embuibe
+Conexões em uso, overflow, esperas e latência do checkout de cada engine
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple, Type
+from sqlalchemy import event, exc
+from sqlalchemy.pool import Pool
+
+# Limites (segundos) dos buckets dos histogramas de latência
+LIMITES_LATENCIA = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+class Histograma:
+    """Histograma cumulativo no formato do Prometheus (buckets "le")"""
+
+    def __init__(self, limites: Tuple[float, ...] = LIMITES_LATENCIA):
+        self.limites = limites
+        self._lock = threading.Lock()
+        self._contagens = [0] * (len(limites) + 1)  # Último = acima do maior limite
+        self._soma = 0.0
+        self._total = 0
+
+    def registrar(self, valor: float):
+        with self._lock:
+            self._contagens[bisect_left(self.limites, valor)] += 1
+            self._soma += valor
+            self._total += 1
+
+    def dados(self) -> dict:
+        """Buckets cumulativos ("le" -> quantidade), soma e total"""
+        with self._lock:
+            contagens = list(self._contagens)
+            soma, total = self._soma, self._total
+
+        buckets = {}
+        acumulado = 0
+        for limite, quantidade in zip(self.limites, contagens):
+            acumulado += quantidade
+            buckets[f"{limite:g}"] = acumulado
+        buckets["+Inf"] = total
+        return {"buckets": buckets, "soma": round(soma, 6), "total": total}
+
+
+class MetricasPool:
+    """
+    Contadores de um pool de conexões
+
+    O tempo de checkout vai do pedido da conexão até ela ser entregue
+    (espera por conexão livre, abertura de conexão nova e pre-ping). Os
+    checkouts pedidos com o pool esgotado (todas as conexões, inclusive
+    as de overflow, em uso) entram também no histograma de espera.
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.pool: Pool = None
+        self.configuracao: Dict[str, object] = {}
+        self.latencia_checkout = Histograma()
+        self.espera = Histograma()
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.esperas = 0
+        self.timeouts = 0
+        self.conexoes_abertas = 0
+        self.conexoes_invalidadas = 0
+        self.em_uso = 0
+        self.maximo_em_uso = 0
+
+    def _contar(self, campo: str, delta: int = 1):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + delta)
+            if campo == "em_uso" and self.em_uso > self.maximo_em_uso:
+                self.maximo_em_uso = self.em_uso
+
+    def dados(self) -> dict:
+        """Foto atual das métricas do pool"""
+        pool = self.pool
+        with self._lock:
+            dados = {
+                "pool": self.nome,
+                "classe": type(pool).__name__.removesuffix("Medido") if pool is not None else None,
+                "configuracao": dict(self.configuracao),
+                "em_uso": self.em_uso,
+                "maximo_em_uso": self.maximo_em_uso,
+                "checkouts": self.checkouts,
+                "esperas": self.esperas,
+                "timeouts": self.timeouts,
+                "conexoes_abertas": self.conexoes_abertas,
+                "conexoes_invalidadas": self.conexoes_invalidadas,
+            }
+
+        # Só os pools com fila (QueuePool) têm tamanho e overflow
+        if pool is not None and hasattr(pool, "checkedin"):
+            dados["tamanho"] = pool.size()
+            dados["livres"] = pool.checkedin()
+            dados["overflow"] = max(0, pool.overflow())
+            dados["max_overflow"] = pool._max_overflow
+        dados["latencia_checkout"] = self.latencia_checkout.dados()
+        dados["espera"] = self.espera.dados()
+        return dados
+
+
+class _PoolMedido:
+    """Mede o checkout do pool (misturado à classe de pool do engine)"""
+
+    metricas: MetricasPool
+
+    def _esgotado(self) -> bool:
+        """Todas as conexões, inclusive as de overflow, estão em uso"""
+        max_overflow = getattr(self, "_max_overflow", None)
+        if max_overflow is None or max_overflow < 0:
+            return False
+        return self.checkedin() == 0 and self._overflow >= max_overflow
+
+    def connect(self):
+        esgotado = self._esgotado()
+        inicio = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metricas._contar("timeouts")
+            raise
+        finally:
+            decorrido = time.perf_counter() - inicio
+            self.metricas.latencia_checkout.registrar(decorrido)
+            if esgotado:
+                self.metricas._contar("esperas")
+                self.metricas.espera.registrar(decorrido)
+
+
+# Métricas de cada pool instrumentado, por nome ("sync", "async")
+metricas_pools: Dict[str, MetricasPool] = {}
+
+
+def classe_pool_medida(nome: str, base: Type[Pool]) -> Type[Pool]:
+    """
+    Classe de pool que registra as métricas em metricas_pools[nome]
+
+    Usar como poolclass do create_engine/create_async_engine; depois
+    chamar instrumentar_engine com o engine criado.
+    """
+    metricas = metricas_pools.setdefault(nome, MetricasPool(nome))
+    return type(f"{base.__name__}Medido", (_PoolMedido, base), {"metricas": metricas})
+
+
+def instrumentar_engine(nome: str, engine, configuracao: Dict[str, object]):
+    """
+    Liga os eventos do pool do engine às métricas
+
+    Args:
+        nome: Nome usado em classe_pool_medida
+        engine: Engine síncrono (para o assíncrono, async_engine.sync_engine)
+        configuracao: Parâmetros do pool, repetidos no relatório
+    """
+    metricas = metricas_pools[nome]
+    metricas.pool = engine.pool
+    metricas.configuracao = configuracao
+
+    @event.listens_for(engine, "connect")
+    def _conexao_aberta(dbapi_connection, connection_record):
+        metricas._contar("conexoes_abertas")
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        metricas._contar("checkouts")
+        metricas._contar("em_uso")
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        metricas._contar("em_uso", -1)
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidada(dbapi_connection, connection_record, exception):
+        metricas._contar("conexoes_invalidadas")
+
+    @event.listens_for(engine, "engine_disposed")
+    def _descartado(engine_descartado):
+        # dispose() troca o pool por um novo, da mesma classe
+        metricas.pool = engine_descartado.pool
+
+
+def formatar_prometheus(lista: List[dict]) -> str:
+    """
+    Métricas dos pools no formato texto do Prometheus
+
+    Args:
+        lista: Resultados de MetricasPool.dados()
+
+    Returns:
+        Texto para o endpoint de coleta (text/plain; version=0.0.4)
+    """
+    linhas = []
+
+    def serie(nome: str, tipo: str, ajuda: str, chave: str):
+        valores = [(d["pool"], d[chave]) for d in lista if chave in d]
+        if not valores:
+            return
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} {tipo}")
+        for pool, valor in valores:
+            linhas.append(f'{nome}{{pool="{pool}"}} {valor}')
+
+    def histograma(nome: str, ajuda: str, chave: str):
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} histogram")
+        for d in lista:
+            h = d[chave]
+            for limite, quantidade in h["buckets"].items():
+                linhas.append(f'{nome}_bucket{{pool="{d["pool"]}",le="{limite}"}} {quantidade}')
+            linhas.append(f'{nome}_sum{{pool="{d["pool"]}"}} {h["soma"]}')
+            linhas.append(f'{nome}_count{{pool="{d["pool"]}"}} {h["total"]}')
+
+    serie("db_pool_size", "gauge", "Conexões mantidas pelo pool", "tamanho")
+    serie("db_pool_checked_in", "gauge", "Conexões livres no pool", "livres")
+    serie("db_pool_checked_out", "gauge", "Conexões em uso", "em_uso")
+    serie("db_pool_checked_out_max", "gauge", "Maior número de conexões em uso ao mesmo tempo", "maximo_em_uso")
+    serie("db_pool_overflow", "gauge", "Conexões de overflow abertas", "overflow")
+    serie("db_pool_max_overflow", "gauge", "Limite de conexões de overflow", "max_overflow")
+    serie("db_pool_checkouts_total", "counter", "Conexões entregues pelo pool", "checkouts")
+    serie("db_pool_waits_total", "counter", "Checkouts pedidos com o pool esgotado", "esperas")
+    serie("db_pool_timeouts_total", "counter", "Checkouts que desistiram por timeout", "timeouts")
+    serie("db_pool_connections_opened_total", "counter", "Conexões abertas no banco", "conexoes_abertas")
+    serie("db_pool_connections_invalidated_total", "counter", "Conexões descartadas por erro", "conexoes_invalidadas")
+    histograma("db_pool_checkout_seconds", "Tempo do pedido até a entrega da conexão", "latencia_checkout")
+    histograma("db_pool_wait_seconds", "Tempo de checkout com o pool esgotado", "espera")
+
+    return "\n".join(linhas) + "\n"
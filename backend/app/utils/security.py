@@ -2,15 +2,19 @@
 Funções de Segurança - Expresso Embuibe
 Gerencia hash de senhas e JWT tokens
 """
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, NamedTuple, Optional, Tuple
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from ..config import settings
-from ..database import get_db
+from ..database import SessionLocal, engine
 from ..models.usuario import Usuario
 
 # Configuração do bearer token
@@ -44,11 +48,27 @@ def get_password_hash(password: str) -> str:
         Hash da senha
     """
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
 
+def precisa_rehash(hashed_password: str) -> bool:
+    """
+    Indica se o hash foi gerado com custo diferente de BCRYPT_ROUNDS
+
+    Args:
+        hashed_password: Hash bcrypt ($2b$<custo>$...)
+
+    Returns:
+        True se o hash deve ser refeito com o custo atual
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Cria um JWT token de acesso
@@ -62,17 +82,39 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     """
     to_encode = data.copy()
 
+    agora = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = agora + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = agora + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": agora})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
     return encoded_jwt
 
 
+def claims_usuario(user) -> dict:
+    """
+    Dados do usuário gravados no token de acesso
+
+    Com eles, get_current_user autentica sem consultar o banco.
+
+    Args:
+        user: Usuário autenticado no login (Usuario ou UsuarioAutenticado)
+
+    Returns:
+        Claims para create_access_token
+    """
+    return {
+        "sub": str(user.id),
+        "nome": user.nome,
+        "tipo": user.tipo,
+        "ativo": user.ativo,
+        "ver": user.versao,
+    }
+
+
 def verify_token(token: str) -> dict:
     """
     Verifica e decodifica um JWT token
@@ -93,64 +135,171 @@ def verify_token(token: str) -> dict:
     )
 
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        print(f"[DEBUG] Token decodificado com sucesso: {payload}")
-        return payload
-    except JWTError as e:
-        print(f"[DEBUG] Erro ao decodificar token: {e}")
-        print(f"[DEBUG] SECRET_KEY: {settings.SECRET_KEY}")
-        print(f"[DEBUG] ALGORITHM: {settings.ALGORITHM}")
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
         raise credentials_exception
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> Usuario:
+class UsuarioAutenticado(NamedTuple):
+    """Usuário montado a partir das claims do token (sem consulta ao banco)"""
+    id: int
+    nome: str
+    tipo: str
+    ativo: bool
+    versao: int
+
+
+class SituacaoUsuarios:
+    """
+    Cache com a situação (ativo, versão) de todos os usuários
+
+    A tabela de usuários é pequena: ela é lida inteira no máximo a cada
+    AUTH_VERIFICACAO_SEGUNDOS, numa thread do pool (nunca no event loop).
+    get_current_user recusa o token quando o usuário foi desativado ou
+    alterado depois da emissão do token (versão diferente da gravada no
+    token), por exemplo troca de senha, nome ou tipo: as claims podem
+    estar desatualizadas e o usuário precisa entrar de novo. A versão é
+    um contador do próprio registro, imune a diferenças de relógio entre
+    a aplicação e o banco.
+    """
+
+    def __init__(self, intervalo_verificacao: float = None):
+        self.intervalo_verificacao = (
+            settings.AUTH_VERIFICACAO_SEGUNDOS
+            if intervalo_verificacao is None else intervalo_verificacao
+        )
+        self._lock = threading.Lock()
+        self._usuarios: Optional[Dict[int, Tuple[bool, int]]] = None
+        self._verificado_em = 0.0
+
+    def preparar(self):
+        """Adiciona a coluna usuarios.versao em bancos antigos (idempotente)"""
+        with engine.begin() as conn:
+            colunas = {c["name"] for c in inspect(conn).get_columns("usuarios")}
+            if "versao" not in colunas:
+                conn.execute(text("ALTER TABLE usuarios ADD COLUMN versao INTEGER NOT NULL DEFAULT 1"))
+
+    async def situacao(self, user_id: int) -> Optional[Tuple[bool, int]]:
+        """
+        Situação atual do usuário
+
+        Com o cache em dia, só consulta o dicionário em memória; a releitura
+        da tabela roda em uma thread do pool.
+
+        Args:
+            user_id: ID do usuário (claim sub)
+
+        Returns:
+            (ativo, versão) ou None se não existe
+        """
+        usuarios, verificado_em = self._usuarios, self._verificado_em
+        if usuarios is None or time.monotonic() - verificado_em >= self.intervalo_verificacao:
+            usuarios, verificado_em = await run_in_threadpool(self._recarregar, verificado_em)
+
+        situacao = usuarios.get(user_id)
+        if situacao is None:
+            # Pode ter sido cadastrado há pouco: relê antes de recusar
+            usuarios, _ = await run_in_threadpool(self._recarregar, verificado_em)
+            situacao = usuarios.get(user_id)
+        return situacao
+
+    def _recarregar(self, visto_em: float) -> Tuple[Dict[int, Tuple[bool, int]], float]:
+        """
+        Relê a tabela de usuários (roda no pool de threads)
+
+        Requisições que esperavam o lock enquanto outra thread relia a
+        tabela aproveitam essa leitura em vez de repeti-la.
+
+        Args:
+            visto_em: Momento da leitura que o chamador considerou vencida
+        """
+        with self._lock:
+            if self._usuarios is not None and self._verificado_em > visto_em:
+                return self._usuarios, self._verificado_em
+
+            db = SessionLocal()
+            try:
+                self._usuarios = {
+                    user_id: (ativo, versao)
+                    for user_id, ativo, versao in db.query(Usuario.id, Usuario.ativo, Usuario.versao)
+                }
+            finally:
+                db.close()
+            self._verificado_em = time.monotonic()
+            return self._usuarios, self._verificado_em
+
+
+# Instância global do cache de situação dos usuários
+situacao_usuarios = SituacaoUsuarios()
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> UsuarioAutenticado:
     """
     Dependência que retorna o usuário atual autenticado
 
+    Os dados do usuário vêm das claims assinadas do token; o banco só é
+    lido pelo cache de situação dos usuários (revogação/desativação),
+    em uma thread do pool. Com o cache em dia, roda inteira no event
+    loop, sem ocupar uma thread por requisição.
+
     Args:
         credentials: Credenciais HTTP Bearer
-        db: Sessão do banco de dados
 
     Returns:
         Usuário autenticado
 
     Raises:
-        HTTPException: Se o token for inválido ou o usuário não existir
+        HTTPException: Se o token for inválido ou revogado, ou o usuário
+            não existir ou estiver inativo
     """
     token = credentials.credentials
     payload = verify_token(token)
 
-    user_id_str = payload.get("sub")
-    if user_id_str is None:
+    try:
+        user = UsuarioAutenticado(
+            id=int(payload["sub"]),
+            nome=payload["nome"],
+            tipo=payload["tipo"],
+            ativo=payload["ativo"],
+            versao=int(payload["ver"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        # Inclui tokens emitidos antes das claims de usuário (ou da versão)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido",
         )
 
-    user_id = int(user_id_str)
-
-    user = db.query(Usuario).filter(Usuario.id == user_id).first()
-    if user is None:
+    situacao = await situacao_usuarios.situacao(user.id)
+    if situacao is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário não encontrado",
         )
 
-    if not user.ativo:
+    ativo, versao = situacao
+    if not (ativo and user.ativo):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuário inativo",
         )
 
+    # Usuário alterado depois da emissão: claims possivelmente desatualizadas
+    if user.versao != versao:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sessão expirada: dados do usuário alterados, entre novamente",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     return user
 
 
-def get_current_admin_user(
-    current_user: Usuario = Depends(get_current_user)
-) -> Usuario:
+async def get_current_admin_user(
+    current_user: UsuarioAutenticado = Depends(get_current_user)
+) -> UsuarioAutenticado:
     """
     Dependência que verifica se o usuário atual é admin
 
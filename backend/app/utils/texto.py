@@ -0,0 +1,30 @@
+"""
+Utilitários de Texto - Expresso Embuibe
+Normalização usada nas buscas (sem acentos, minúsculas, só dígitos)
+"""
+import re
+import unicodedata
+from typing import Optional
+
+_ESPACOS = re.compile(r"\s+")
+_NAO_DIGITOS = re.compile(r"\D")
+
+
+def normalizar_busca(texto: Optional[str]) -> str:
+    """
+    Normaliza texto para busca: sem acentos, minúsculo e espaços simples
+
+    Ex.: "  JOÃO  da Conceição" -> "joao da conceicao"
+    """
+    if not texto:
+        return ""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return _ESPACOS.sub(" ", sem_acentos).strip().casefold()
+
+
+def somente_digitos(texto: Optional[str]) -> str:
+    """Mantém apenas os dígitos (ex.: "(13) 99999-0000" -> "13999990000")"""
+    if not texto:
+        return ""
+    return _NAO_DIGITOS.sub("", texto)
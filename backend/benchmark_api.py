@@ -0,0 +1,558 @@
+"""
+Benchmark da API - Expresso Embuibe
+Popula um banco sintético (clientes, um ano de passagens, viagens) e mede
+os endpoints mais usados no balcão, dentro do processo, com requisições
+simultâneas: emissão, manifesto, dashboard, busca de clientes e
+relatório por período
+
+Para cada cenário informa latência p50/p95/p99, consultas por requisição
+(cabeçalho Server-Timing) e requisições por segundo, e grava o resultado
+em JSON para comparar versões. Depois das medições, confere com EXPLAIN o
+plano das consultas em passagens e viagens de cada cenário e falha se
+alguma varrer a tabela inteira (seq scan).
+
+Uso:
+    python benchmark_api.py                                  # banco em cache/benchmark, 200 requisições por cenário
+    python benchmark_api.py --clientes 20000 --passagens-dia 300 --recriar
+    python benchmark_api.py --requisicoes 500 --concorrencia 16
+    python benchmark_api.py --cenarios manifesto,dashboard
+    python benchmark_api.py --saida v1.1.json --comparar v1.0.json   # sai com erro se piorar
+    python benchmark_api.py --sem-planos                     # não confere os planos (EXPLAIN)
+    DATABASE_ASYNC=true python benchmark_api.py              # engine assíncrono
+"""
+import sys
+import os
+import re
+import math
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+from pathlib import Path
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from decimal import Decimal
+
+# Adiciona o diretório raiz ao path
+sys.path.append(str(Path(__file__).parent))
+
+PASTA_BENCHMARK = Path(__file__).parent / "cache" / "benchmark"
+
+CENARIOS = ("emissao", "manifesto", "dashboard", "busca_clientes", "relatorio_periodo")
+HORARIOS = [dtime(5, 30), dtime(8, 0), dtime(11, 0), dtime(14, 0), dtime(17, 0), dtime(20, 0)]
+FORMAS_PAGAMENTO = ["DINHEIRO", "CARTAO", "PIX"]
+PRIMEIROS_NOMES = [
+    "Maria", "José", "Ana", "João", "Antônio", "Francisca", "Carlos", "Paulo", "Adriana", "Lucas",
+    "Juliana", "Marcos", "Patrícia", "Luiz", "Aline", "Gabriel", "Sandra", "Rafael", "Márcia", "Pedro",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Conceição", "Ribeiro", "Carvalho", "Araújo", "Melo", "Barbosa", "Cardoso", "Nascimento", "Rocha", "Dias",
+]
+LOTE_INSERT = 5000
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Benchmark dos endpoints principais da API")
+    parser.add_argument("--banco", default=f"sqlite:///{PASTA_BENCHMARK / 'benchmark_api.db'}",
+                        help="URL do banco do benchmark (nunca use o banco de produção)")
+    parser.add_argument("--recriar", action="store_true", help="Apaga as tabelas e popula de novo")
+    parser.add_argument("--clientes", type=int, default=5000, help="Clientes sintéticos")
+    parser.add_argument("--dias", type=int, default=365, help="Dias de histórico de passagens")
+    parser.add_argument("--passagens-dia", type=int, default=150, help="Passagens por dia no histórico")
+    parser.add_argument("--requisicoes", type=int, default=200, help="Requisições medidas por cenário")
+    parser.add_argument("--concorrencia", type=int, default=8, help="Requisições simultâneas")
+    parser.add_argument("--aquecimento", type=int, default=10, help="Requisições por cenário antes de medir")
+    parser.add_argument("--cenarios", default=",".join(CENARIOS), help=f"Lista separada por vírgulas: {', '.join(CENARIOS)}")
+    parser.add_argument("--semente", type=int, default=42, help="Semente dos dados e das requisições")
+    parser.add_argument("--saida", help="Arquivo JSON do resultado (padrão: cache/benchmark/resultado_<data>.json)")
+    parser.add_argument("--comparar", help="Resultado anterior (JSON) para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Piora aceita no p95 ao comparar (0.2 = 20%%)")
+    parser.add_argument("--sem-planos", action="store_true",
+                        help="Não confere os planos de execução (EXPLAIN) das consultas dos cenários")
+    args = parser.parse_args()
+
+    args.cenarios = [c.strip() for c in args.cenarios.split(",") if c.strip()]
+    desconhecidos = set(args.cenarios) - set(CENARIOS)
+    if desconhecidos:
+        parser.error(f"cenários desconhecidos: {', '.join(sorted(desconhecidos))}")
+    return args
+
+
+args = ler_argumentos()
+
+# O banco e o cache de PDFs do benchmark são definidos antes de importar a aplicação
+PASTA_BENCHMARK.mkdir(parents=True, exist_ok=True)
+os.environ["DATABASE_URL"] = args.banco
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("PDF_CACHE_DIR", str(PASTA_BENCHMARK / "pdf"))
+os.environ["CONSULTAS_MONITORAR"] = "true"
+
+import httpx
+from sqlalchemy import event, func, insert
+from sqlalchemy.engine import Engine
+from app.config import settings
+from app.database import SessionLocal, engine, Base
+from app.models import Usuario, Cliente, Motorista, LocalEmbarque, Passagem, Viagem
+from app.services.indice_service import indice_service
+from app.utils.metricas_consultas import forma_consulta
+from app.utils.texto import normalizar_busca, somente_digitos
+from app.main import app
+# seed_data também configura o stdout para UTF-8
+from seed_data import seed_usuarios, seed_cidades, seed_proprietarios_motoristas, seed_locais_embarque
+
+
+# ==================== DADOS SINTÉTICOS ====================
+
+def popular(rng: random.Random):
+    """Cria os dados de referência, os clientes e o histórico de passagens e viagens"""
+    db = SessionLocal()
+    try:
+        seed_usuarios(db)
+        seed_cidades(db)
+        seed_proprietarios_motoristas(db)
+        seed_locais_embarque(db)
+
+        atendentes = [u.id for u in db.query(Usuario.id)]
+        motoristas = {m.id: m.vagas for m in db.query(Motorista.id, Motorista.vagas)}
+        locais = [(l.id, l.valor) for l in db.query(LocalEmbarque.id, LocalEmbarque.valor)]
+    finally:
+        db.close()
+
+    inicio = time.perf_counter()
+    print(f"\nPopulando {args.clientes} clientes...")
+    clientes = []
+    for i in range(args.clientes):
+        nome = f"{rng.choice(PRIMEIROS_NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+        telefone = f"(13) 9{i:08d}"
+        clientes.append({
+            "nome": nome, "telefone": telefone, "cidade": "Peruíbe", "ativo": True,
+            # Inserção em lote não passa pelos @validates do model
+            "nome_busca": normalizar_busca(nome), "telefone_digitos": somente_digitos(telefone),
+        })
+    with engine.begin() as conn:
+        for i in range(0, len(clientes), LOTE_INSERT):
+            conn.execute(insert(Cliente), clientes[i:i + LOTE_INSERT])
+        cliente_ids = [row[0] for row in conn.execute(Cliente.__table__.select().with_only_columns(Cliente.id))]
+
+    print(f"Populando {args.dias} dias x {args.passagens_dia} passagens...")
+    hoje = date.today()
+    numero = settings.NUMERO_PASSAGEM_INICIAL
+    passagens = []
+    viagens = {}  # (data, horario, motorista_id) -> [passageiros, valor]
+    for dia in range(args.dias, 0, -1):
+        data_viagem = hoje - timedelta(days=dia)
+        for _ in range(args.passagens_dia):
+            horario = rng.choice(HORARIOS)
+            motorista_id = rng.choice(list(motoristas))
+            viagem = viagens.setdefault((data_viagem, horario, motorista_id), [0, Decimal("0")])
+            if viagem[0] >= motoristas[motorista_id]:
+                continue  # Viagem lotada: passagens do dia ficam um pouco abaixo do pedido
+
+            local_id, valor = rng.choice(locais)
+            status = "CANCELADA" if rng.random() < 0.03 else "EMITIDA"
+            if status == "EMITIDA":
+                viagem[0] += 1
+                viagem[1] += valor
+            emissao = datetime.combine(data_viagem - timedelta(days=rng.randint(0, 10)), dtime(9), tzinfo=timezone.utc)
+            passagens.append({
+                "numero": numero,
+                "cliente_id": rng.choice(cliente_ids),
+                "local_embarque_id": local_id,
+                "motorista_id": motorista_id,
+                "horario": horario,
+                "data_viagem": data_viagem,
+                "data_emissao": emissao,
+                "created_at": emissao,
+                "valor": valor,
+                "forma_pagamento": rng.choice(FORMAS_PAGAMENTO),
+                "atendente_id": rng.choice(atendentes),
+                "status": status,
+            })
+            numero += 1
+
+    with engine.begin() as conn:
+        for i in range(0, len(passagens), LOTE_INSERT):
+            conn.execute(insert(Passagem), passagens[i:i + LOTE_INSERT])
+        conn.execute(insert(Viagem), [
+            {
+                "data": data_viagem, "horario": horario, "motorista_id": motorista_id,
+                "total_passageiros": total, "valor_total": valor,
+                "atendente_id": atendentes[0], "status": "SAIU",
+            }
+            for (data_viagem, horario, motorista_id), (total, valor) in viagens.items() if total
+        ])
+
+    decorrido = time.perf_counter() - inicio
+    print(f"[OK] {len(clientes)} clientes e {len(passagens)} passagens em {decorrido:.1f}s")
+    # O resumo diário é montado no startup da aplicação (banco com passagens e sem resumo)
+
+
+def preparar_banco(rng: random.Random) -> dict:
+    """Cria/reaproveita o banco do benchmark e retorna o tamanho dos dados"""
+    if args.recriar:
+        print("Apagando tabelas do banco do benchmark...")
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        vazio = db.query(Cliente.id).first() is None
+    finally:
+        db.close()
+
+    if vazio:
+        popular(rng)
+    else:
+        print("Reaproveitando dados existentes (use --recriar para popular de novo)")
+
+    # Bancos reaproveitados recebem os índices novos; ANALYZE como após migrate_indices.py
+    aplicados = indice_service.aplicar()
+    if aplicados:
+        print(f"Índices: {len(aplicados.faltando)} criados, {len(aplicados.obsoletos)} removidos")
+
+    db = SessionLocal()
+    try:
+        return {
+            "clientes": db.query(func.count(Cliente.id)).scalar(),
+            "passagens": db.query(func.count(Passagem.id)).scalar(),
+            "viagens": db.query(func.count(Viagem.id)).scalar(),
+            "primeira_viagem": str(db.query(func.min(Passagem.data_viagem)).scalar()),
+            "ultima_viagem": str(db.query(func.max(Passagem.data_viagem)).scalar()),
+        }
+    finally:
+        db.close()
+
+
+# ==================== CENÁRIOS ====================
+
+class Contexto:
+    """Dados de apoio sorteados pelos cenários"""
+
+    def __init__(self, rng: random.Random):
+        db = SessionLocal()
+        try:
+            self.clientes = [c.id for c in db.query(Cliente.id).limit(1000)]
+            self.nomes = sorted({n.split()[0] for (n,) in db.query(Cliente.nome).limit(1000)})
+            self.locais = [l.id for l in db.query(LocalEmbarque.id)]
+            self.motoristas = [m.id for m in db.query(Motorista.id)]
+            self.viagens = [
+                (v.data, v.horario, v.motorista_id)
+                for v in db.query(Viagem.data, Viagem.horario, Viagem.motorista_id).limit(5000)
+            ]
+            inicio, fim = db.query(func.min(Passagem.data_viagem), func.max(Passagem.data_viagem)).one()
+        finally:
+            db.close()
+        self.rng = rng
+        hoje = date.today()
+        self.primeiro_dia = inicio or hoje
+        self.ultimo_dia = fim or hoje
+
+    def dia_historico(self) -> date:
+        dias = (self.ultimo_dia - self.primeiro_dia).days
+        return self.primeiro_dia + timedelta(days=self.rng.randint(0, max(0, dias)))
+
+
+def requisicao(cenario: str, ctx: Contexto) -> tuple:
+    """(método, url, corpo) de uma requisição do cenário"""
+    rng = ctx.rng
+    if cenario == "emissao":
+        # Viagens futuras, espalhadas para não lotar
+        return "POST", "/api/v1/passagens", {
+            "cliente_id": rng.choice(ctx.clientes),
+            "local_embarque_id": rng.choice(ctx.locais),
+            "motorista_id": rng.choice(ctx.motoristas),
+            "horario": rng.choice(HORARIOS).strftime("%H:%M"),
+            "data_viagem": (date.today() + timedelta(days=rng.randint(1, 365))).isoformat(),
+            "forma_pagamento": rng.choice(FORMAS_PAGAMENTO),
+        }
+    if cenario == "manifesto":
+        data_viagem, horario, motorista_id = rng.choice(ctx.viagens) if ctx.viagens else (date.today(), HORARIOS[0], ctx.motoristas[0])
+        return "POST", "/api/v1/viagens/buscar-manifesto", {
+            "data": data_viagem.isoformat(), "horario": horario.strftime("%H:%M"), "motorista_id": motorista_id,
+        }
+    if cenario == "dashboard":
+        return "GET", f"/api/v1/dashboard/resumo?data={ctx.dia_historico().isoformat()}", None
+    if cenario == "busca_clientes":
+        nome = rng.choice(ctx.nomes) if ctx.nomes else "a"
+        return "GET", f"/api/v1/clientes?q={nome[:rng.randint(3, len(nome))]}", None
+    if cenario == "relatorio_periodo":
+        inicio = ctx.dia_historico()
+        return "GET", f"/api/v1/relatorios/periodo?data_inicio={inicio}&data_fim={inicio + timedelta(days=30)}", None
+    raise ValueError(cenario)
+
+
+_CONSULTAS = re.compile(r'db;dur=([\d.]+);desc="(\d+) consultas"')
+
+
+def percentil(valores: list, p: float) -> float:
+    """Percentil pelo método nearest-rank (valores ordenados)"""
+    if not valores:
+        return 0.0
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+async def executar_cenario(cliente: httpx.AsyncClient, cenario: str, ctx: Contexto, headers: dict) -> dict:
+    """Dispara as requisições do cenário com `concorrencia` simultâneas"""
+    pendentes = [requisicao(cenario, ctx) for _ in range(args.aquecimento + args.requisicoes)]
+    aquecimento, medidas = pendentes[:args.aquecimento], pendentes[args.aquecimento:]
+    amostras = []
+    erros = {}
+
+    async def trabalhador(fila: list, medir: bool):
+        while fila:
+            metodo, url, corpo = fila.pop()
+            inicio = time.perf_counter()
+            resposta = await cliente.request(metodo, url, json=corpo, headers=headers)
+            decorrido = time.perf_counter() - inicio
+            if not medir:
+                continue
+            if resposta.status_code >= 400:
+                erros[resposta.status_code] = erros.get(resposta.status_code, 0) + 1
+            timing = _CONSULTAS.search(resposta.headers.get("server-timing", ""))
+            amostras.append((
+                decorrido,
+                int(timing.group(2)) if timing else None,
+                float(timing.group(1)) / 1000 if timing else None,
+            ))
+
+    for fila, medir in ((aquecimento, False), (medidas, True)):
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabalhador(fila, medir) for _ in range(args.concorrencia)))
+        duracao = time.perf_counter() - inicio
+
+    latencias = sorted(a[0] for a in amostras)
+    consultas = [a[1] for a in amostras if a[1] is not None]
+    tempo_banco = [a[2] for a in amostras if a[2] is not None]
+    return {
+        "requisicoes": len(amostras),
+        "erros": erros,
+        "duracao_s": round(duracao, 3),
+        "requisicoes_por_segundo": round(len(amostras) / duracao, 1) if duracao else 0,
+        "latencia_ms": {
+            "p50": round(percentil(latencias, 50) * 1000, 2),
+            "p95": round(percentil(latencias, 95) * 1000, 2),
+            "p99": round(percentil(latencias, 99) * 1000, 2),
+            "media": round(sum(latencias) / len(latencias) * 1000, 2) if latencias else 0,
+            "maxima": round(latencias[-1] * 1000, 2) if latencias else 0,
+        },
+        "consultas_por_requisicao": round(sum(consultas) / len(consultas), 2) if consultas else None,
+        "consultas_maximo": max(consultas) if consultas else None,
+        "banco_ms_por_requisicao": round(sum(tempo_banco) / len(tempo_banco) * 1000, 2) if tempo_banco else None,
+    }
+
+
+# ==================== PLANOS DE EXECUÇÃO ====================
+
+# Consultas verificadas: as que leem passagens ou viagens
+_TABELA_VERIFICADA = re.compile(r"\b(?:FROM|JOIN)\s+(passagens|viagens)\b", re.IGNORECASE)
+# Varredura da tabela inteira no plano (SQLite: "SCAN tabela" sem índice; PostgreSQL: "Seq Scan on tabela")
+_VARREDURA_SEQUENCIAL = {
+    "sqlite": re.compile(r"^SCAN (passagens|viagens)\b(?! USING)"),
+    "postgresql": re.compile(r"Seq Scan on (passagens|viagens)\b"),
+}
+_PREFIXO_EXPLAIN = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+
+class PlanosConsultas:
+    """
+    Plano (EXPLAIN) de cada forma de consulta em passagens/viagens
+
+    O EXPLAIN roda no evento before_cursor_execute, na mesma conexão e
+    com os mesmos parâmetros da consulta real, por um cursor separado;
+    não passa pelo SQLAlchemy e não entra na contagem de consultas. Com
+    poucos dados o PostgreSQL prefere seq scan mesmo havendo índice: use
+    pelo menos o volume padrão do benchmark.
+    """
+
+    def __init__(self):
+        self.cenario = None
+        self.planos = {}  # cenário -> {forma: plano}
+
+    def __enter__(self):
+        event.listen(Engine, "before_cursor_execute", self._explicar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, "before_cursor_execute", self._explicar)
+
+    def _explicar(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        if not _TABELA_VERIFICADA.search(statement):
+            return
+        planos = self.planos.setdefault(self.cenario, {})
+        forma = forma_consulta(statement)
+        if forma in planos:
+            return
+
+        dialeto = conn.dialect.name
+        cursor_plano = conn.connection.cursor()
+        try:
+            cursor_plano.execute(_PREFIXO_EXPLAIN[dialeto] + statement, parameters)
+            linhas = [str(linha[-1]) for linha in cursor_plano.fetchall()]
+        except Exception as e:
+            print(f"   Aviso: EXPLAIN falhou: {e}")
+            return
+        finally:
+            cursor_plano.close()
+
+        varreduras = sorted({
+            m.group(1) for linha in linhas for m in [_VARREDURA_SEQUENCIAL[dialeto].search(linha.strip())] if m
+        })
+        planos[forma] = {"consulta": forma, "plano": linhas, "varredura_sequencial": varreduras}
+
+    def resultado(self) -> dict:
+        return {cenario: list(planos.values()) for cenario, planos in self.planos.items()}
+
+
+async def verificar_planos(cliente: httpx.AsyncClient, ctx: Contexto, headers: dict) -> dict:
+    """
+    Repete algumas requisições de cada cenário, uma por vez, guardando o
+    plano das consultas em passagens e viagens
+
+    Returns:
+        Planos por cenário (consulta, linhas do EXPLAIN e tabelas varridas por inteiro)
+    """
+    print("\n🔎 Planos de execução (EXPLAIN)...")
+    with PlanosConsultas() as planos:
+        for cenario in args.cenarios:
+            planos.cenario = cenario
+            for _ in range(3):
+                metodo, url, corpo = requisicao(cenario, ctx)
+                await cliente.request(metodo, url, json=corpo, headers=headers)
+
+    resultado = planos.resultado()
+    for cenario in args.cenarios:
+        consultas = resultado.get(cenario, [])
+        varreduras = [c for c in consultas if c["varredura_sequencial"]]
+        if not varreduras:
+            print(f"   ✓ {cenario:<18} {len(consultas)} consultas em passagens/viagens, todas por índice")
+        for consulta in varreduras:
+            print(f"   ✗ {cenario:<18} varre {', '.join(consulta['varredura_sequencial'])} inteira: {consulta['consulta'][:200]}")
+            for linha in consulta["plano"]:
+                print(f"        {linha}")
+    return resultado
+
+
+async def medir(ctx: Contexto) -> tuple:
+    """Sobe a aplicação (startup/shutdown), roda os cenários e confere os planos"""
+    resultados = {}
+    planos = None
+    async with app.router.lifespan_context(app):
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark", timeout=None) as cliente:
+            resposta = await cliente.post("/api/v1/auth/login", json={"login": "admin", "senha": "embuibe@2025"})
+            if resposta.status_code != 200:
+                print(f"ERRO no login: {resposta.text}")
+                sys.exit(1)
+            headers = {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+
+            for cenario in args.cenarios:
+                print(f"\n⏱  {cenario}...")
+                resultado = await executar_cenario(cliente, cenario, ctx, headers)
+                resultados[cenario] = resultado
+                lat = resultado["latencia_ms"]
+                print(
+                    f"   p50 {lat['p50']:>8.1f} ms | p95 {lat['p95']:>8.1f} ms | p99 {lat['p99']:>8.1f} ms | "
+                    f"{resultado['requisicoes_por_segundo']:>7.1f} req/s | "
+                    f"{resultado['consultas_por_requisicao']} consultas/req"
+                )
+                if resultado["erros"]:
+                    print(f"   ✗ Erros: {resultado['erros']}")
+
+            if not args.sem_planos:
+                planos = await verificar_planos(cliente, ctx, headers)
+    return resultados, planos
+
+
+# ==================== RESULTADO ====================
+
+def commit_git() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).parent, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def comparar(atual: dict, caminho: str) -> bool:
+    """Compara com um resultado anterior; retorna False se algum cenário piorou além da tolerância"""
+    anterior = json.loads(Path(caminho).read_text(encoding="utf-8"))
+    print(f"\nComparando com {caminho} ({anterior.get('versao')} / {anterior.get('commit')}):")
+    for chave in ("banco", "assincrono", "parametros", "dados"):
+        if anterior.get(chave) != atual[chave]:
+            print(f"   Aviso: '{chave}' diferente do resultado anterior, a comparação pode não ser justa")
+    ok = True
+    for cenario, resultado in atual["cenarios"].items():
+        antes = anterior.get("cenarios", {}).get(cenario)
+        if not antes:
+            continue
+        p95_antes, p95_agora = antes["latencia_ms"]["p95"], resultado["latencia_ms"]["p95"]
+        variacao = (p95_agora - p95_antes) / p95_antes if p95_antes else 0
+        consultas_antes, consultas_agora = antes.get("consultas_por_requisicao"), resultado.get("consultas_por_requisicao")
+        mais_consultas = consultas_antes is not None and consultas_agora is not None and consultas_agora > consultas_antes
+        piorou = variacao > args.tolerancia or mais_consultas or (resultado["erros"] and not antes["erros"])
+        ok = ok and not piorou
+        print(
+            f"   {'✗' if piorou else '✓'} {cenario:<18} p95 {p95_antes:>8.1f} -> {p95_agora:>8.1f} ms ({variacao:+.0%}) | "
+            f"consultas {consultas_antes} -> {consultas_agora}"
+        )
+    return ok
+
+
+def main():
+    print("=" * 60)
+    print("BENCHMARK DA API - EXPRESSO EMBUIBE")
+    print("=" * 60)
+    print(f"Banco: {engine.url.render_as_string(hide_password=True)} | assíncrono: {settings.DATABASE_ASYNC}")
+
+    rng = random.Random(args.semente)
+    dados = preparar_banco(rng)
+    print(f"Dados: {dados['clientes']} clientes, {dados['passagens']} passagens, {dados['viagens']} viagens")
+
+    ctx = Contexto(random.Random(args.semente))
+    cenarios, planos = asyncio.run(medir(ctx))
+
+    resultado = {
+        "data_hora": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "versao": settings.APP_VERSION,
+        "commit": commit_git(),
+        "python": platform.python_version(),
+        "banco": engine.dialect.name,
+        "assincrono": settings.DATABASE_ASYNC,
+        "parametros": {
+            "requisicoes": args.requisicoes, "concorrencia": args.concorrencia,
+            "aquecimento": args.aquecimento, "semente": args.semente,
+        },
+        "dados": dados,
+        "cenarios": cenarios,
+        "planos": planos,
+    }
+
+    saida = Path(args.saida) if args.saida else PASTA_BENCHMARK / f"resultado_{datetime.now():%Y%m%d_%H%M%S}.json"
+    saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n[OK] Resultado gravado em {saida}")
+
+    ok = True
+    if args.comparar:
+        ok = comparar(resultado, args.comparar)
+
+    houve_erros = any(c["erros"] for c in cenarios.values())
+    varreduras = planos and any(c["varredura_sequencial"] for consultas in planos.values() for c in consultas)
+    print("\n" + "=" * 60)
+    if not ok or houve_erros or varreduras:
+        print("✗ BENCHMARK COM ERROS, REGRESSÕES OU VARREDURAS SEQUENCIAIS")
+        print("=" * 60)
+        sys.exit(1)
+    print("✓ BENCHMARK CONCLUÍDO")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark de PDF de Passagens - Expresso Embuibe
+Mede passagens por segundo do template de passagem (layout em cache) contra o desenho
+completo no canvas a cada passagem (implementação anterior)
+
+Uso:
+    python benchmark_pdf.py              # 3 segundos por cenário
+    python benchmark_pdf.py 10           # 10 segundos por cenário
+"""
+import sys
+import io
+import time
+from pathlib import Path
+from datetime import datetime
+from decimal import Decimal
+
+# Configura encoding para UTF-8
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# Adiciona o diretório raiz ao path
+sys.path.append(str(Path(__file__).parent))
+
+from reportlab.lib.pagesizes import A6
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+from reportlab.lib import colors
+from app.config import settings
+from app.services.pdf_template import CAMPOS, FONTE_NEGRITO, FONTE_NORMAL, TITULO, RODAPE
+from app.services.pdf_service import pdf_service
+
+DADOS = {
+    "numero": 30001,
+    "cliente_nome": "Maria da Conceição Silva",
+    "cidade": "Peruíbe",
+    "local_embarque": "Centro",
+    "endereco_embarque": "Rua das Flores, 123",
+    "data_viagem": "18/10/2026",
+    "horario": "14:00",
+    "valor": Decimal("65.00"),
+    "forma_pagamento": "PIX",
+    "data_emissao": datetime(2026, 10, 18, 9, 30),
+    "atendente_nome": "Mariana",
+}
+
+
+def desenhar_canvas_completo(numero: int, valores: dict) -> bytes:
+    """Desenha a passagem inteira no canvas, como era feito antes do template"""
+    largura, altura = A6
+    margem = 10 * mm
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A6)
+
+    y = altura - margem
+    c.setFont(FONTE_NEGRITO, 16)
+    c.drawString((largura - c.stringWidth(TITULO, FONTE_NEGRITO, 16)) / 2, y, TITULO)
+    y -= 20
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1)
+    c.line(margem, y, largura - margem, y)
+    y -= 15
+
+    c.setFont(FONTE_NEGRITO, 14)
+    texto = f"Passagem Nº {numero}"
+    c.drawString((largura - c.stringWidth(texto, FONTE_NEGRITO, 14)) / 2, y, texto)
+    y -= 20
+
+    for campo, rotulo in CAMPOS:
+        if not valores.get(campo):
+            continue
+        c.setFont(FONTE_NEGRITO, 9)
+        c.drawString(margem, y, rotulo)
+        c.setFont(FONTE_NORMAL, 9)
+        c.drawString(margem + c.stringWidth(rotulo, FONTE_NEGRITO, 9) + 5, y, valores[campo])
+        y -= 12
+
+    y -= 10
+    c.line(margem, y, largura - margem, y)
+    y -= 15
+    c.setFont(FONTE_NORMAL, 8)
+    c.drawString((largura - c.stringWidth(RODAPE, FONTE_NORMAL, 8)) / 2, y, RODAPE)
+
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def valores_formatados(dados: dict) -> dict:
+    """Formata os campos do mesmo jeito que o PDFService"""
+    return {
+        "cliente_nome": dados["cliente_nome"],
+        "origem": f"{dados['cidade']} - {dados['local_embarque']}",
+        "endereco_embarque": dados["endereco_embarque"],
+        "destino": settings.DESTINO_PADRAO,
+        "data_viagem": dados["data_viagem"],
+        "horario": dados["horario"],
+        "valor": f"R$ {dados['valor']:.2f}",
+        "forma_pagamento": dados["forma_pagamento"],
+        "data_emissao": dados["data_emissao"].strftime("%d/%m/%Y %H:%M"),
+        "atendente_nome": dados["atendente_nome"],
+    }
+
+
+def medir(nome: str, gerar, segundos: float) -> float:
+    """Executa `gerar` repetidamente e retorna passagens por segundo"""
+    gerar()  # Aquecimento (monta caches do template)
+
+    quantidade = 0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < segundos:
+        gerar()
+        quantidade += 1
+    taxa = quantidade / (time.perf_counter() - inicio)
+
+    print(f"   {nome:<40} {taxa:>8.0f} passagens/s")
+    return taxa
+
+
+def executar(segundos: float = 3.0):
+    """Roda os cenários com e sem endereço de embarque"""
+    print("=" * 60)
+    print("BENCHMARK DE PDF DE PASSAGENS - EXPRESSO EMBUIBE")
+    print("=" * 60)
+
+    for com_endereco in (True, False):
+        dados = dict(DADOS, endereco_embarque=DADOS["endereco_embarque"] if com_endereco else "")
+        valores = valores_formatados(dados)
+
+        print(f"\n📄 Passagem {'com' if com_endereco else 'sem'} endereço de embarque:")
+        antes = medir(
+            "Canvas completo (antes)",
+            lambda: desenhar_canvas_completo(dados["numero"], valores),
+            segundos
+        )
+        depois = medir(
+            "Template com layout em cache (PDFService)",
+            lambda: pdf_service.gerar_passagem_pdf(**dados),
+            segundos
+        )
+        print(f"   ⚡ {depois / antes:.1f}x mais rápido")
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    executar(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
@@ -0,0 +1,94 @@
+"""
+Conciliação de Viagens - Expresso Embuibe
+Confere total_passageiros e valor_total das viagens com as passagens e
+corrige as divergências em um único upsert (INSERT ... SELECT ... GROUP BY)
+Execute após importações, restaurações de backup ou falhas durante vendas
+
+Uso:
+    python conciliar_viagens.py                                  # todo o histórico
+    python conciliar_viagens.py 2024-01-01 2024-12-31            # apenas o período
+    python conciliar_viagens.py 2024-01-01 2024-12-31 --simular  # só confere, sem gravar
+"""
+import sys
+import io
+import time
+import argparse
+from pathlib import Path
+from datetime import date
+
+# Configura encoding para UTF-8
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# Adiciona o diretório raiz ao path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import SessionLocal, init_db
+from app.services.viagem_service import viagem_service
+
+
+def conciliar(data_inicio: date = None, data_fim: date = None, simular: bool = False, exemplos: int = 20):
+    """Confere e (sem --simular) corrige as viagens no período informado (ou inteiro)"""
+    print("=" * 60)
+    print("CONCILIAÇÃO DE VIAGENS - EXPRESSO EMBUIBE")
+    print("=" * 60)
+
+    if data_inicio or data_fim:
+        print(f"\nPeríodo: {data_inicio or 'início'} até {data_fim or 'hoje'}")
+    else:
+        print("\nPeríodo: todo o histórico")
+    if simular:
+        print("Modo simulação: nenhuma viagem será alterada")
+
+    # Garante as tabelas em bancos antigos
+    init_db()
+
+    db = SessionLocal()
+    try:
+        inicio = time.perf_counter()
+        resultado = viagem_service.conciliar(
+            db, data_inicio, data_fim, corrigir=not simular, limite_exemplos=exemplos
+        )
+        db.commit()
+        duracao = time.perf_counter() - inicio
+
+        print(f"\nViagens no período: {resultado.viagens_no_periodo}")
+        print(f"  Com totais divergentes: {resultado.divergentes}")
+        print(f"  Passagens sem viagem registrada: {resultado.sem_viagem}")
+
+        if resultado.exemplos:
+            print(f"\nDivergências (primeiras {len(resultado.exemplos)}):")
+            print(f"  {'Data':<10} {'Hora':<5} {'Mot.':>5}  {'Situação':<10} {'Passageiros':>13} {'Valor':>23}")
+            for d in resultado.exemplos:
+                print(
+                    f"  {d.data.isoformat():<10} {d.horario.strftime('%H:%M'):<5} {d.motorista_id:>5}  "
+                    f"{d.situacao:<10} {d.registrado_passageiros:>5} -> {d.calculado_passageiros:<5} "
+                    f"{d.registrado_valor:>10} -> {d.calculado_valor:<10}"
+                )
+            print(
+                f"\nDiferença total: {resultado.diferenca_passageiros:+d} passageiros, "
+                f"R$ {resultado.diferenca_valor:+.2f}"
+            )
+
+        if not resultado.divergentes and not resultado.sem_viagem:
+            print(f"\n✅ Viagens conferem com as passagens ({duracao:.2f}s)")
+        elif simular:
+            print(f"\n⚠ Simulação concluída em {duracao:.2f}s; rode sem --simular para corrigir")
+        else:
+            print(f"\n✅ {resultado.corrigidas} viagens corrigidas em {duracao:.2f}s")
+    except Exception as e:
+        print(f"\n❌ ERRO durante a conciliação: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concilia as viagens com as passagens")
+    parser.add_argument("data_inicio", nargs="?", type=date.fromisoformat, help="Data inicial (AAAA-MM-DD)")
+    parser.add_argument("data_fim", nargs="?", type=date.fromisoformat, help="Data final (AAAA-MM-DD)")
+    parser.add_argument("--simular", action="store_true", help="Só confere e lista as divergências, sem gravar")
+    parser.add_argument("--exemplos", type=int, default=20, help="Divergências listadas (padrão: 20)")
+    args = parser.parse_args()
+
+    conciliar(args.data_inicio, args.data_fim, args.simular, args.exemplos)
@@ -0,0 +1,48 @@
+"""
+Script de Migração - Índices de busca de clientes
+Adiciona e preenche clientes.nome_busca / clientes.telefone_digitos e cria
+os índices trigrama (pg_trgm no PostgreSQL, FTS5 no SQLite)
+
+O servidor faz o mesmo ao iniciar; rode antes do deploy em bancos grandes
+(ex.: logo após migrate_clientes.py) para não atrasar a subida.
+
+Uso:
+    python migrate_busca_clientes.py
+"""
+import sys
+import io
+import time
+from pathlib import Path
+
+# Configura encoding para UTF-8
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# Adiciona o diretório raiz ao path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import init_db
+from app.services.busca_cliente_service import busca_cliente_service
+
+
+def migrate():
+    """Prepara as colunas e índices de busca de clientes"""
+    print("=" * 60)
+    print("MIGRAÇÃO - ÍNDICES DE BUSCA DE CLIENTES - EXPRESSO EMBUIBE")
+    print("=" * 60)
+
+    init_db()
+
+    inicio = time.perf_counter()
+    busca_cliente_service.preparar()
+    duracao = time.perf_counter() - inicio
+
+    dialeto = busca_cliente_service.bind.dialect.name
+    if busca_cliente_service.indice_trigrama:
+        tipo = "pg_trgm (GIN)" if dialeto == "postgresql" else "FTS5 (trigram)"
+        print(f"\n✅ Índice trigrama {tipo} pronto em {duracao:.2f}s")
+    else:
+        print(f"\n⚠️ Banco {dialeto} sem índice trigrama: a busca usa LIKE nas colunas normalizadas")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -1,10 +1,12 @@
 """
 Migração de Clientes do Access para SQLite
 Importa dados de clientes_migrar.csv para o banco de dados atual
+
+Importação em lote: telefones já cadastrados carregados uma única vez e
+um INSERT (COPY no PostgreSQL) por lote de linhas do CSV.
 """
 import sys
 import io
-import csv
 from pathlib import Path
 from datetime import datetime
 
@@ -14,10 +16,11 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 # Adiciona o diretório raiz ao path
 sys.path.append(str(Path(__file__).parent))
 
-from sqlalchemy.orm import Session
 from sqlalchemy import func
-from app.database import SessionLocal
+from app.database import SessionLocal, engine
 from app.models import Cliente
+from app.services.importacao_service import importacao_service, Progresso
+from app.utils.texto import somente_digitos
 
 
 def clean_phone(phone):
@@ -59,17 +62,24 @@ def migrate_clientes():
 
     erros_detalhados = []
 
+    # Telefones já cadastrados, carregados uma única vez (duplicados no
+    # próprio arquivo também são ignorados: cada telefone novo entra no conjunto)
+    with engine.connect() as conn:
+        telefones = set(importacao_service.mapa_telefones(conn))
+    print(f"📇 {len(telefones)} telefones já cadastrados\n")
+
+    progresso = Progresso()
+
     # Abre sessão do banco
     db = SessionLocal()
 
     try:
-        print("🔄 Lendo arquivo CSV...\n")
+        print(f"🔄 Lendo arquivo CSV em lotes de {importacao_service.tamanho_lote} linhas...\n")
 
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            # Usar csv.DictReader para ler o CSV
-            reader = csv.DictReader(f)
+        for lote in importacao_service.ler_csv(csv_path):
+            linhas = []
 
-            for row in reader:
+            for row in lote:
                 stats['total'] += 1
 
                 try:
@@ -99,16 +109,13 @@ def migrate_clientes():
 
                     # Verifica se já existe cliente com mesmo telefone
                     if not telefone_limpo.startswith('SEM_TELEFONE_'):
-                        existing = db.query(Cliente).filter(
-                            Cliente.telefone == telefone_limpo,
-                            Cliente.ativo == True
-                        ).first()
-
-                        if existing:
+                        digitos = somente_digitos(telefone_limpo)
+                        if digitos in telefones:
                             stats['duplicados'] += 1
                             if stats['duplicados'] <= 10:  # Mostra apenas os primeiros 10
                                 print(f"  ⚠️  Duplicado: {nome} - {telefone1} (já existe no banco)")
                             continue
+                        telefones.add(digitos)
 
                     # Monta endereço (obrigatório) - usa ponto_embarque ou placeholder
                     endereco_final = ponto_embarque if ponto_embarque else "A DEFINIR"
@@ -129,8 +136,8 @@ def migrate_clientes():
                     # CEP (obrigatório) - usa placeholder
                     cep_final = "00000-000"
 
-                    # Cria o cliente
-                    cliente = Cliente(
+                    # Monta o cliente (colunas de busca preenchidas pelo serviço)
+                    linhas.append(importacao_service.linha_cliente(
                         nome=nome,
                         telefone=telefone_limpo,
                         endereco=endereco_final,
@@ -138,15 +145,7 @@ def migrate_clientes():
                         cidade=cidade_final,
                         cep=cep_final,
                         ativo=True
-                    )
-
-                    db.add(cliente)
-                    stats['importados'] += 1
-
-                    # Commit a cada 100 registros para evitar travamento
-                    if stats['importados'] % 100 == 0:
-                        db.commit()
-                        print(f"  ✓ {stats['importados']} clientes importados...")
+                    ))
 
                 except Exception as e:
                     stats['erros'] += 1
@@ -156,8 +155,11 @@ def migrate_clientes():
                         print(f"  ❌ {erro_msg}")
                     continue
 
-        # Commit final
-        db.commit()
+            # Um INSERT em lote (COPY no PostgreSQL) e um commit por lote
+            with engine.begin() as conn:
+                stats['importados'] += importacao_service.inserir(conn, Cliente, linhas)
+            progresso.somar(len(lote))
+            print(f"  ✓ {stats['importados']} clientes importados... ({progresso.linhas_por_segundo:,.0f} linhas/s)")
 
         # Verifica total no banco
         total_banco = db.query(func.count(Cliente.id)).filter(Cliente.ativo == True).scalar()
@@ -171,6 +173,7 @@ def migrate_clientes():
         print(f"  • Duplicados ignorados: {stats['duplicados']}")
         print(f"  • Sem telefone: {stats['sem_telefone']}")
         print(f"  • Erros: {stats['erros']}")
+        print(f"  • Velocidade: {progresso}")
         print(f"\n💾 Total de clientes ativos no banco: {total_banco}")
 
         if erros_detalhados and len(erros_detalhados) > 10:
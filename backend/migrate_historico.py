@@ -1,10 +1,23 @@
 """
 Migração de Histórico de Viagens do Access para SQLite
 Importa dados de historico_viagens.csv para o banco de dados atual
+
+Importação em partes paralelas: o arquivo é dividido em faixas de bytes,
+processadas por um pool de processos (um INSERT, ou COPY no PostgreSQL,
+por parte). Cada parte concluída fica registrada em importacoes_partes:
+se a importação cair, rodar o script de novo com o mesmo arquivo
+continua das partes que faltam, com os mesmos números de passagem; um
+arquivo já importado não é gravado duas vezes. No final, resumo diário
+e viagens são recalculados com uma instrução cada.
+
+Uso:
+    python migrate_historico.py                          # MIGRACAO/historico_viagens.csv
+    python migrate_historico.py outro_arquivo.csv
+    python migrate_historico.py outro_arquivo.csv --processos 8
 """
 import sys
 import io
-import csv
+import argparse
 from pathlib import Path
 from datetime import datetime, time, date
 
@@ -14,10 +27,13 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 # Adiciona o diretório raiz ao path
 sys.path.append(str(Path(__file__).parent))
 
-from sqlalchemy.orm import Session
 from sqlalchemy import func
-from app.database import SessionLocal
-from app.models import Passagem, Cliente, Motorista, LocalEmbarque, Usuario
+from app.database import SessionLocal, engine, init_db
+from app.models import Passagem, Motorista, LocalEmbarque, Usuario
+from app.services.importacao_service import importacao_service, Progresso, IMPORTACAO_CONCLUIDA
+from app.services.resumo_service import resumo_service
+from app.services.viagem_service import viagem_service
+from app.utils.texto import somente_digitos
 
 
 def limpar_telefone(telefone):
@@ -49,29 +65,155 @@ def mapear_motorista_legado(motorista_id_antigo, db, cache_motoristas):
     return None
 
 
-def buscar_cliente_por_telefone(telefone, db, cache_clientes):
-    """Busca cliente pelo telefone"""
-    if not telefone:
-        return None
+class Referencias:
+    """Dados de referência da conversão, carregados uma vez por processo"""
 
-    telefone_limpo = limpar_telefone(telefone)
+    def __init__(self):
+        db = SessionLocal()
+        try:
+            # Pega primeiro local de embarque (fallback)
+            self.local_embarque = db.query(LocalEmbarque).filter(LocalEmbarque.ativo == True).first()
+            # Pega usuário admin (fallback para atendente)
+            self.usuario_admin = db.query(Usuario).filter(Usuario.tipo == 'admin').first()
+        finally:
+            db.close()
 
-    if telefone_limpo in cache_clientes:
-        return cache_clientes[telefone_limpo]
+        # Telefone -> cliente
+        with engine.connect() as conn:
+            self.clientes_por_telefone = importacao_service.mapa_telefones(conn)
 
-    cliente = db.query(Cliente).filter(
-        Cliente.telefone == telefone_limpo,
-        Cliente.ativo == True
-    ).first()
+        self.cache_motoristas = {}
 
-    if cliente:
-        cache_clientes[telefone_limpo] = cliente.id
-        return cliente.id
+    def motorista(self, motorista_id_antigo):
+        """ID do motorista no sistema novo (consulta o banco só para IDs ainda não vistos)"""
+        if motorista_id_antigo not in self.cache_motoristas:
+            db = SessionLocal()
+            try:
+                mapear_motorista_legado(motorista_id_antigo, db, self.cache_motoristas)
+            finally:
+                db.close()
+        return self.cache_motoristas.get(motorista_id_antigo)
 
-    return None
 
+_referencias = None
+
+
+def referencias() -> Referencias:
+    global _referencias
+    if _referencias is None:
+        _referencias = Referencias()
+    return _referencias
+
+
+def converter_linhas(linhas, numero_inicial):
+    """
+    Converte as linhas de uma parte do CSV em passagens (roda nos processos do pool)
 
-def migrate_historico():
+    A passagem da linha i da parte recebe o número numero_inicial + i,
+    reservado para a importação inteira.
+
+    Returns:
+        (passagens a gravar, estatísticas da parte)
+    """
+    ref = referencias()
+    stats = {
+        'total': 0,
+        'importados': 0,
+        'sem_cliente': 0,
+        'sem_motorista': 0,
+        'erros': 0,
+        'valor_total': 0.0,
+        'data_inicial': None,
+        'data_final': None,
+        'avisos': []
+    }
+    passagens = []
+
+    def avisar(mensagem):
+        if len(stats['avisos']) < 5:
+            stats['avisos'].append(mensagem)
+
+    for indice, row in enumerate(linhas):
+        stats['total'] += 1
+
+        try:
+            # Extrai dados do CSV
+            cliente_nome = row.get('cliente_nome', '').strip()
+            cliente_telefone = row.get('cliente_telefone', '').strip()
+            data_venda_str = row.get('data_venda', '')
+            data_pedido_str = row.get('data_pedido', '')
+            valor_total = float(row.get('valor_total', 0))
+            motorista_id_antigo = row.get('motorista_id', '')
+
+            # Busca cliente pelo telefone
+            cliente_id = ref.clientes_por_telefone.get(somente_digitos(limpar_telefone(cliente_telefone)))
+
+            if not cliente_id:
+                stats['sem_cliente'] += 1
+                avisar(f"⚠️  Cliente não encontrado: {cliente_nome} - {cliente_telefone}")
+                continue
+
+            # Mapeia motorista
+            motorista_id = ref.motorista(float(motorista_id_antigo)) if motorista_id_antigo else None
+
+            if not motorista_id:
+                stats['sem_motorista'] += 1
+                avisar(f"⚠️  Motorista não encontrado: ID antigo {motorista_id_antigo}")
+                continue
+
+            # Converte datas
+            try:
+                data_viagem = datetime.strptime(data_pedido_str, '%Y-%m-%d').date() if data_pedido_str else date.today()
+                data_emissao = datetime.strptime(data_venda_str, '%Y-%m-%d') if data_venda_str else datetime.now()
+            except ValueError:
+                stats['erros'] += 1
+                avisar(f"❌ Erro na data: {data_pedido_str} / {data_venda_str}")
+                continue
+
+            passagens.append({
+                "numero": numero_inicial + indice,
+                "cliente_id": cliente_id,
+                "local_embarque_id": ref.local_embarque.id,
+                "motorista_id": motorista_id,
+                "horario": time(0, 0),  # Padrão 00:00
+                "data_viagem": data_viagem,
+                "data_emissao": data_emissao,
+                "valor": valor_total,
+                "forma_pagamento": 'DINHEIRO',  # Padrão
+                "atendente_id": ref.usuario_admin.id,
+                "status": 'UTILIZADA'  # Histórico
+            })
+            stats['importados'] += 1
+            stats['valor_total'] += valor_total
+
+            data_iso = data_viagem.isoformat()
+            stats['data_inicial'] = min(stats['data_inicial'] or data_iso, data_iso)
+            stats['data_final'] = max(stats['data_final'] or data_iso, data_iso)
+
+        except Exception as e:
+            stats['erros'] += 1
+            avisar(f"❌ Linha {indice + 1} da parte: {str(e)}")
+
+    return passagens, stats
+
+
+def somar_estatisticas(partes):
+    """Junta as estatísticas das partes concluídas"""
+    stats = {'total': 0, 'importados': 0, 'sem_cliente': 0, 'sem_motorista': 0, 'erros': 0, 'valor_total': 0.0}
+    datas = []
+    avisos = []
+    for parte in partes:
+        for chave in stats:
+            stats[chave] += parte[chave]
+        datas += [d for d in (parte['data_inicial'], parte['data_final']) if d]
+        avisos += parte['avisos']
+    stats['data_inicial'] = date.fromisoformat(min(datas)) if datas else None
+    stats['data_final'] = date.fromisoformat(max(datas)) if datas else None
+    stats['avisos'] = avisos
+    return stats
+
+
+def migrate_historico(csv_path: Path = None, processos: int = None):
     """Executa a migração do histórico"""
     print("=" * 80)
     print("MIGRAÇÃO DE HISTÓRICO DE VIAGENS - EXPRESSO EMBUIBE")
@@ -79,7 +221,7 @@ def migrate_historico():
     print(f"\nInício: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
     # Caminho do arquivo CSV
-    csv_path = Path(__file__).parent.parent / "MIGRACAO" / "historico_viagens.csv"
+    csv_path = csv_path or Path(__file__).parent.parent / "MIGRACAO" / "historico_viagens.csv"
 
     if not csv_path.exists():
         print(f"❌ ERRO: Arquivo não encontrado: {csv_path}")
@@ -88,137 +230,64 @@ def migrate_historico():
     print(f"📂 Arquivo: {csv_path}")
     print(f"📊 Tamanho: {csv_path.stat().st_size / 1024 / 1024:.2f} MB\n")
 
-    # Estatísticas
-    stats = {
-        'total': 0,
-        'importados': 0,
-        'sem_cliente': 0,
-        'sem_motorista': 0,
-        'erros': 0,
-        'valor_total': 0.0
-    }
+    # Tabelas de controle das importações
+    init_db()
+
+    # Busca dados necessários
+    print("🔍 Buscando dados de referência...")
+    ref = referencias()
+
+    if not ref.local_embarque:
+        print("❌ ERRO: Nenhum local de embarque encontrado no banco!")
+        return
+    if not ref.usuario_admin:
+        print("❌ ERRO: Usuário admin não encontrado no banco!")
+        return
+
+    print(f"  ✓ Local embarque padrão: {ref.local_embarque.nome}")
+    print(f"  ✓ Atendente padrão: {ref.usuario_admin.nome}")
+    print(f"  ✓ Clientes por telefone: {len(ref.clientes_por_telefone)}\n")
+
+    progresso = Progresso()
+
+    def parte_concluida(concluidas, total, parte):
+        progresso.somar(parte['total'])
+        print(f"  ✓ Parte {concluidas}/{total}: {parte['importados']} viagens importadas "
+              f"({progresso.linhas_por_segundo:,.0f} linhas/s)")
+
+    print("🔄 Importando arquivo em partes paralelas...\n")
+    resultado = importacao_service.importar_em_partes(
+        "historico", csv_path, Passagem, converter_linhas,
+        trabalhadores=processos, numerar=True, ao_concluir_parte=parte_concluida
+    )
+
+    if resultado.partes_executadas == 0:
+        print("  ℹ️  Este arquivo já foi importado por completo; nada foi gravado de novo")
+    elif resultado.retomada:
+        print(f"\n  ℹ️  Importação {resultado.importacao_id} retomada: "
+              f"{resultado.partes - resultado.partes_executadas} partes já estavam concluídas")
 
-    erros_detalhados = []
+    for erro in resultado.erros:
+        print(f"  ❌ {erro}")
 
-    # Caches
-    cache_clientes = {}
-    cache_motoristas = {}
+    stats = somar_estatisticas(resultado.estatisticas)
 
-    # Abre sessão do banco
     db = SessionLocal()
 
     try:
-        # Busca dados necessários
-        print("🔍 Buscando dados de referência...")
-
-        # Pega primeiro local de embarque (fallback)
-        local_embarque_padrao = db.query(LocalEmbarque).filter(LocalEmbarque.ativo == True).first()
-        if not local_embarque_padrao:
-            print("❌ ERRO: Nenhum local de embarque encontrado no banco!")
-            return
-
-        # Pega usuário admin (fallback para atendente)
-        usuario_admin = db.query(Usuario).filter(Usuario.tipo == 'admin').first()
-        if not usuario_admin:
-            print("❌ ERRO: Usuário admin não encontrado no banco!")
-            return
-
-        print(f"  ✓ Local embarque padrão: {local_embarque_padrao.nome}")
-        print(f"  ✓ Atendente padrão: {usuario_admin.nome}\n")
-
-        print("🔄 Lendo arquivo CSV...\n")
-
-        # Busca o maior número de passagem existente
-        max_numero = db.query(func.max(Passagem.numero)).scalar() or 0
-        print(f"  ℹ️  Maior número de passagem existente: {max_numero}")
-        print(f"  ℹ️  Próximo número será: {max_numero + 1}\n")
-
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-
-            for row in reader:
-                stats['total'] += 1
-
-                try:
-                    # Extrai dados do CSV
-                    id_legado = row.get('id_legado', '')
-                    cliente_nome = row.get('cliente_nome', '').strip()
-                    cliente_telefone = row.get('cliente_telefone', '').strip()
-                    data_venda_str = row.get('data_venda', '')
-                    data_pedido_str = row.get('data_pedido', '')
-                    valor_unitario = float(row.get('valor_unitario', 0))
-                    quantidade = int(row.get('quantidade', 1))
-                    valor_total = float(row.get('valor_total', 0))
-                    motorista_id_antigo = row.get('motorista_id', '')
-
-                    # Busca cliente pelo telefone
-                    cliente_id = buscar_cliente_por_telefone(cliente_telefone, db, cache_clientes)
-
-                    if not cliente_id:
-                        stats['sem_cliente'] += 1
-                        if stats['sem_cliente'] <= 5:
-                            print(f"  ⚠️  Cliente não encontrado: {cliente_nome} - {cliente_telefone}")
-                        continue
-
-                    # Mapeia motorista
-                    if motorista_id_antigo:
-                        motorista_id = mapear_motorista_legado(float(motorista_id_antigo), db, cache_motoristas)
-                    else:
-                        motorista_id = None
-
-                    if not motorista_id:
-                        stats['sem_motorista'] += 1
-                        if stats['sem_motorista'] <= 5:
-                            print(f"  ⚠️  Motorista não encontrado: ID antigo {motorista_id_antigo}")
-                        continue
-
-                    # Converte datas
-                    try:
-                        data_viagem = datetime.strptime(data_pedido_str, '%Y-%m-%d').date() if data_pedido_str else date.today()
-                        data_emissao = datetime.strptime(data_venda_str, '%Y-%m-%d') if data_venda_str else datetime.now()
-                    except ValueError as e:
-                        stats['erros'] += 1
-                        if stats['erros'] <= 5:
-                            print(f"  ❌ Erro na data: {data_pedido_str} / {data_venda_str}")
-                        continue
-
-                    # Incrementa número da passagem
-                    max_numero += 1
-
-                    # Cria a passagem
-                    passagem = Passagem(
-                        numero=max_numero,
-                        cliente_id=cliente_id,
-                        local_embarque_id=local_embarque_padrao.id,
-                        motorista_id=motorista_id,
-                        horario=time(0, 0),  # Padrão 00:00
-                        data_viagem=data_viagem,
-                        data_emissao=data_emissao,
-                        valor=valor_total,
-                        forma_pagamento='DINHEIRO',  # Padrão
-                        atendente_id=usuario_admin.id,
-                        status='UTILIZADA'  # Histórico
-                    )
-
-                    db.add(passagem)
-                    stats['importados'] += 1
-                    stats['valor_total'] += float(valor_total)
-
-                    # Commit a cada 500 registros
-                    if stats['importados'] % 500 == 0:
-                        db.commit()
-                        print(f"  ✓ {stats['importados']} viagens importadas... (R$ {stats['valor_total']:,.2f})")
-
-                except Exception as e:
-                    stats['erros'] += 1
-                    erro_msg = f"Linha {stats['total']}: {str(e)}"
-                    erros_detalhados.append(erro_msg)
-                    if stats['erros'] <= 10:
-                        print(f"  ❌ {erro_msg}")
-                    continue
-
-        # Commit final
-        db.commit()
+        if resultado.partes_executadas:
+            # Recalcula o resumo diário e as viagens com o histórico importado
+            # (INSERT ... SELECT ... GROUP BY, sem laço por dia ou viagem)
+            print("\n🔄 Reconstruindo resumo diário...")
+            linhas_resumo = resumo_service.reconstruir(db)
+            db.commit()
+            print(f"  ✓ {linhas_resumo} linhas de resumo gravadas")
+
+            if stats['data_inicial']:
+                print("🔄 Reconstruindo passageiros e valores das viagens...")
+                viagens = viagem_service.reconstruir(db, stats['data_inicial'], stats['data_final'])
+                db.commit()
+                print(f"  ✓ {viagens} viagens de {stats['data_inicial']} a {stats['data_final']} recalculadas")
 
         # Verifica total no banco
         total_banco = db.query(func.count(Passagem.id)).scalar()
@@ -226,20 +295,27 @@ def migrate_historico():
         print("\n" + "=" * 80)
         print("RELATÓRIO DE MIGRAÇÃO")
         print("=" * 80)
-        print(f"\n📊 Estatísticas:")
+        print(f"\n📊 Estatísticas (importação {resultado.importacao_id}, {resultado.partes} partes):")
         print(f"  • Total de linhas processadas: {stats['total']}")
         print(f"  • Viagens importadas: {stats['importados']}")
         print(f"  • Sem cliente encontrado: {stats['sem_cliente']}")
         print(f"  • Sem motorista encontrado: {stats['sem_motorista']}")
         print(f"  • Erros: {stats['erros']}")
         print(f"  • Valor total do histórico: R$ {stats['valor_total']:,.2f}")
+        if resultado.partes_executadas:
+            print(f"  • Velocidade: {progresso}")
         print(f"\n💾 Total de passagens no banco: {total_banco}")
 
-        if erros_detalhados and len(erros_detalhados) > 10:
-            print(f"\n⚠️  Foram encontrados {len(erros_detalhados)} erros no total.")
-            print(f"   Primeiros 10 erros mostrados acima.")
+        if stats['avisos']:
+            print(f"\n⚠️  Avisos (primeiros de cada parte):")
+            for aviso in stats['avisos'][:10]:
+                print(f"  {aviso}")
 
-        print(f"\n✅ Migração concluída com sucesso!")
+        if resultado.status != IMPORTACAO_CONCLUIDA:
+            print(f"\n❌ {len(resultado.erros)} parte(s) com erro. Corrija e rode de novo: "
+                  f"as partes concluídas não são reprocessadas.")
+        else:
+            print(f"\n✅ Migração concluída com sucesso!")
         print(f"Fim: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("=" * 80)
 
@@ -254,4 +330,8 @@ def migrate_historico():
 
 
 if __name__ == "__main__":
-    migrate_historico()
+    parser = argparse.ArgumentParser(description="Importa o histórico de viagens do Access")
+    parser.add_argument("arquivo", nargs="?", type=Path, help="CSV do histórico (padrão: MIGRACAO/historico_viagens.csv)")
+    parser.add_argument("--processos", type=int, help="Processos em paralelo (padrão: número de CPUs)")
+    args = parser.parse_args()
+    migrate_historico(args.arquivo, args.processos)
@@ -0,0 +1,75 @@
+"""
+Script de Migração - Índices de passagens e viagens
+Cria os índices compostos e parciais declarados nos models, usados pelo
+manifesto, emissão, dashboard e relatórios:
+
+    passagens (data_viagem, horario, motorista_id, status)
+    passagens (data_viagem, horario, motorista_id) WHERE status = 'EMITIDA'
+    passagens (motorista_id, data_viagem)
+    viagens   (motorista_id, data)
+
+e remove os índices de uma coluna que eles substituem. No PostgreSQL usa
+CREATE INDEX CONCURRENTLY e pode rodar com o sistema em uso. Idempotente.
+
+Uso:
+    python migrate_indices.py             # aplica
+    python migrate_indices.py --verificar # só lista o que está pendente
+"""
+import sys
+import io
+import time
+import argparse
+from pathlib import Path
+
+# Configura encoding para UTF-8
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# Adiciona o diretório raiz ao path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import init_db
+from app.services.indice_service import indice_service
+
+
+def migrate(verificar: bool = False) -> bool:
+    """Cria os índices que faltam e remove os obsoletos"""
+    print("=" * 60)
+    print("MIGRAÇÃO - ÍNDICES DE PASSAGENS E VIAGENS - EXPRESSO EMBUIBE")
+    print("=" * 60)
+
+    init_db()
+
+    pendentes = indice_service.pendentes()
+    if not pendentes:
+        print("\n✅ Índices já estão atualizados, nada a fazer")
+        return True
+
+    print("\nPendente:")
+    for indice in pendentes.faltando:
+        colunas = ", ".join(c.name for c in indice.columns)
+        print(f"  + {indice.name} ON {indice.table.name} ({colunas})")
+    for nome in pendentes.obsoletos:
+        print(f"  - {nome}")
+
+    if verificar:
+        print("\n⚠️ Rode sem --verificar para aplicar")
+        return False
+
+    print("\nAplicando (tabelas grandes podem levar alguns minutos)...")
+    inicio = time.perf_counter()
+    indice_service.aplicar()
+    duracao = time.perf_counter() - inicio
+
+    print(
+        f"\n✅ {len(pendentes.faltando)} índices criados e {len(pendentes.obsoletos)} removidos "
+        f"em {duracao:.2f}s (estatísticas atualizadas)"
+    )
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra os índices de passagens e viagens")
+    parser.add_argument("--verificar", action="store_true", help="Só lista os índices pendentes, sem alterar o banco")
+    args = parser.parse_args()
+
+    sys.exit(0 if migrate(args.verificar) else 1)
@@ -0,0 +1,58 @@
+"""
+Reconstrução do Resumo Diário - Expresso Embuibe
+Recalcula a tabela resumos_diarios a partir das passagens
+Execute após importar histórico (migrate_historico.py) ou corrigir dados direto no banco
+
+Uso:
+    python reconstruir_resumo_diario.py                          # todo o histórico
+    python reconstruir_resumo_diario.py 2024-01-01 2024-12-31    # apenas o período
+"""
+import sys
+import io
+import time
+from pathlib import Path
+from datetime import date
+
+# Configura encoding para UTF-8
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# Adiciona o diretório raiz ao path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import SessionLocal, init_db
+from app.services.resumo_service import resumo_service
+
+
+def reconstruir(data_inicio: date = None, data_fim: date = None):
+    """Recalcula o resumo diário no período informado (ou inteiro)"""
+    print("=" * 60)
+    print("RECONSTRUÇÃO DO RESUMO DIÁRIO - EXPRESSO EMBUIBE")
+    print("=" * 60)
+
+    if data_inicio or data_fim:
+        print(f"\nPeríodo: {data_inicio or 'início'} até {data_fim or 'hoje'}")
+    else:
+        print("\nPeríodo: todo o histórico")
+
+    # Garante que a tabela existe em bancos antigos
+    init_db()
+
+    db = SessionLocal()
+    try:
+        inicio = time.perf_counter()
+        linhas = resumo_service.reconstruir(db, data_inicio, data_fim)
+        db.commit()
+        duracao = time.perf_counter() - inicio
+
+        print(f"\n✅ {linhas} linhas de resumo gravadas em {duracao:.2f}s")
+    except Exception as e:
+        print(f"\n❌ ERRO durante a reconstrução: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    args = [date.fromisoformat(a) for a in sys.argv[1:3]]
+    reconstruir(*args)
@@ -0,0 +1,122 @@
+"""
+Script para testar vendas simultâneas na mesma viagem
+Dispara emissões em paralelo e confere que não há venda acima das vagas
+do motorista nem incrementos perdidos no contador da viagem
+
+Uso (com o servidor rodando):
+    python testar_concorrencia_vagas.py                # viagem daqui a 1 ano, motorista 1
+    python testar_concorrencia_vagas.py 2 2025-12-24   # motorista 2 na data informada
+"""
+import sys
+import requests
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_URL = "http://localhost:8001/api/v1"
+HORARIO = "05:30"
+THREADS = 16
+EXCEDENTE = 10  # Emissões a mais do que as vagas livres
+
+motorista_id = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+data_viagem = sys.argv[2] if len(sys.argv) > 2 else (date.today() + timedelta(days=365)).isoformat()
+
+print("=" * 60)
+print("TESTE DE CONCORRÊNCIA DE VAGAS - SISTEMA EXPRESSO EMBUIBE")
+print("=" * 60)
+
+# 1. Login
+print("\n1. Fazendo login...")
+response = requests.post(f"{BASE_URL}/auth/login", json={
+    "login": "admin",
+    "senha": "embuibe@2025"
+})
+
+if response.status_code != 200:
+    print(f"ERRO no login: {response.text}")
+    exit(1)
+
+headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+print("[OK] Login bem-sucedido!")
+
+# 2. Situação atual da viagem
+print("\n2. Consultando vagas da viagem...")
+motorista = requests.get(f"{BASE_URL}/motoristas/{motorista_id}", headers=headers).json()
+viagem = {"data": data_viagem, "horario": HORARIO, "motorista_id": motorista_id}
+manifesto = requests.post(f"{BASE_URL}/viagens/buscar-manifesto", json=viagem, headers=headers).json()
+
+vagas = motorista["vagas"]
+ocupadas = manifesto["total_passageiros"]
+livres = vagas - ocupadas
+tentativas = livres + EXCEDENTE
+
+print(f"  Viagem: {data_viagem} {HORARIO} - {motorista['nome']}")
+print(f"  Vagas: {vagas} | Ocupadas: {ocupadas} | Livres: {livres}")
+
+clientes = requests.get(f"{BASE_URL}/clientes?limit=1", headers=headers).json()["items"]
+if not clientes:
+    print("ERRO: cadastre ao menos um cliente antes do teste")
+    exit(1)
+
+# 3. Emissões simultâneas
+print(f"\n3. Disparando {tentativas} emissões em {THREADS} threads...")
+passagem_data = {
+    "cliente_id": clientes[0]["id"],
+    "local_embarque_id": 1,
+    "motorista_id": motorista_id,
+    "horario": HORARIO,
+    "data_viagem": data_viagem,
+    "forma_pagamento": "PIX"
+}
+
+
+def emitir(_):
+    return requests.post(
+        f"{BASE_URL}/passagens?pdf_assincrono=true",
+        json=passagem_data,
+        headers=headers
+    ).status_code
+
+
+with ThreadPoolExecutor(max_workers=THREADS) as executor:
+    status_codes = list(executor.map(emitir, range(tentativas)))
+
+emitidas = status_codes.count(201)
+lotadas = status_codes.count(409)
+outros = [c for c in status_codes if c not in (201, 409)]
+print(f"  Emitidas: {emitidas} | Recusadas por lotação: {lotadas} | Outros: {outros}")
+
+# 4. Conferência
+print("\n4. Conferindo contadores...")
+manifesto = requests.post(f"{BASE_URL}/viagens/buscar-manifesto", json=viagem, headers=headers).json()
+registro = [
+    v for v in requests.get(
+        f"{BASE_URL}/viagens/listar?data_inicio={data_viagem}&data_fim={data_viagem}&motorista_id={motorista_id}",
+        headers=headers
+    ).json()
+    if v["horario"].startswith(HORARIO)
+]
+contador = registro[0]["total_passageiros"] if registro else 0
+
+print(f"  Passagens no manifesto: {manifesto['total_passageiros']}")
+print(f"  Contador da viagem:     {contador}")
+
+erros = []
+if outros:
+    erros.append(f"respostas inesperadas: {outros}")
+if emitidas != livres:
+    erros.append(f"esperava {livres} emissões, houve {emitidas}")
+if manifesto["total_passageiros"] > vagas:
+    erros.append(f"venda acima das vagas: {manifesto['total_passageiros']} > {vagas}")
+if contador != manifesto["total_passageiros"]:
+    erros.append(f"incrementos perdidos: contador {contador} != {manifesto['total_passageiros']} passagens")
+
+if erros:
+    for erro in erros:
+        print(f"ERRO: {erro}")
+    exit(1)
+
+print("[OK] Sem venda acima das vagas e sem incrementos perdidos!")
+
+print("\n" + "=" * 60)
+print("TESTE COMPLETO!")
+print("=" * 60)
@@ -238,6 +238,14 @@ class ApiService {
     return this.client.get(`/clientes?${queryString}`);
   }
 
+  /**
+   * Sugestões de clientes por início do nome ou telefone (autocomplete)
+   */
+  async getSugestoesClientes(prefix, limit = 10) {
+    const queryString = new URLSearchParams({ prefix, limit }).toString();
+    return this.client.get(`/clientes/sugestoes?${queryString}`);
+  }
+
   /**
    * Busca cliente por ID
    */